@@ -0,0 +1,72 @@
+import time
+from urllib.parse import parse_qs
+
+from starlette.responses import JSONResponse
+
+from app.core.metrics import REQUEST_DURATION
+from app.core.tenants import DEFAULT_TENANT_ID, TenantRegistry, use_tenant
+
+TENANT_HEADER = b"x-tenant-id"
+
+
+class TenantMiddleware:
+    """
+    Resolves the calendar owner for each request from the `X-Tenant-ID` header
+    (or a `tenant` query parameter, for browser redirects such as /authorize)
+    and makes it the current tenant for everything the request runs, including
+    work handed to the worker pools. Unknown tenants get a 404.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tenant_id = dict(scope["headers"]).get(TENANT_HEADER, b"").decode("latin-1")
+        if not tenant_id:
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            tenant_id = (query.get("tenant") or [DEFAULT_TENANT_ID])[0]
+
+        tenant = TenantRegistry.get(tenant_id)
+        if tenant is None:
+            response = JSONResponse({"error": f"Unknown tenant: {tenant_id}"}, status_code=404)
+            await response(scope, receive, send)
+            return
+
+        with use_tenant(tenant):
+            await self.app(scope, receive, send)
+
+
+class MetricsMiddleware:
+    """Observes request latency per route template (e.g. /booking/slots), until the last body chunk is sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            )
@@ -1,14 +1,24 @@
+import hmac
+import json
 import logging
 
-from fastapi import APIRouter, Request, Body
-from fastapi.responses import RedirectResponse, JSONResponse
-from typing import Dict, Any
+from fastapi import APIRouter, BackgroundTasks, Request, Body, Query
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse, Response
+from pydantic import ValidationError
+from typing import Dict, Any, Optional
 
+from app.core.admission import PRIORITY_BOOKING, Overloaded, admission_priority
+from app.core.concurrency import GOOGLE, LLM, iterate_blocking, run_blocking
+from app.core.config import settings
+from app.core.metrics import registry, span
+from app.core.tenants import TenantRegistry, get_current_tenant, use_tenant
 from app.services.google_auth import GoogleAuthService
 from app.services.calendar import CalendarService
 from app.services.preferences import PreferencesService
+from app.services.reservations import SlotConflictError
 from app.services.ai_service import AIService
-from app.models.schemas import BookingRequest
+from app.services.availability import AvailabilityMaterializer
+from app.models.schemas import BatchBookingRequest, BookingRequest, SlotQuery
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +28,10 @@ router = APIRouter()
 def read_root():
     return {"message": "Booking backend is running (Modular Version)."}
 
+@router.get("/metrics")
+def metrics():
+    return Response(registry.render(), media_type=registry.CONTENT_TYPE)
+
 @router.get("/authorize")
 def authorize():
     authorization_url = GoogleAuthService.get_authorization_url()
@@ -28,21 +42,56 @@ def oauth2callback(request: Request):
     code = request.query_params.get('code')
     if not code:
         return JSONResponse({"error": "Missing authorization code in callback."}, status_code=400)
+    # /authorize sent the tenant id as the OAuth state
+    state = request.query_params.get('state')
+    tenant = TenantRegistry.get(state) if state else get_current_tenant()
+    if tenant is None:
+        return JSONResponse({"error": "Unknown tenant in OAuth state."}, status_code=400)
     try:
-        creds = GoogleAuthService.fetch_token(code)
-        GoogleAuthService.save_credentials(creds)
+        with use_tenant(tenant):
+            creds = GoogleAuthService.fetch_token(code)
+            GoogleAuthService.save_credentials(creds)
         return JSONResponse({"message": "Tokens saved successfully."})
     except Exception as e:
         return JSONResponse({"error": f"OAuth2 callback failed: {str(e)}"}, status_code=500)
 
+def _overloaded(e: Overloaded) -> JSONResponse:
+    """Fast rejection when admission control sheds an upstream call."""
+    return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": str(e.retry_after)})
+
 @router.get("/calendar/events")
 def get_calendar_events():
     try:
         events = CalendarService.get_events()
         return {"events": events}
+    except Overloaded as e:
+        return _overloaded(e)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+async def _sync_mirror():
+    try:
+        await run_blocking(GOOGLE, CalendarService.sync_mirror)
+    except Exception as e:
+        logger.warning("Event mirror sync after push notification failed: %s", e)
+
+@router.post("/calendar/webhook")
+async def calendar_webhook(request: Request, background_tasks: BackgroundTasks):
+    """
+    Receiver for Calendar push notifications (events.watch with address
+    .../calendar/webhook?tenant=<id> and token CALENDAR_WEBHOOK_TOKEN).
+    Each change notification triggers an incremental sync of the event mirror.
+    """
+    if not settings.CALENDAR_WEBHOOK_TOKEN or not settings.EVENT_MIRROR_ENABLED:
+        return JSONResponse({"error": "Not Found"}, status_code=404)
+    token = request.headers.get("X-Goog-Channel-Token", "")
+    if not hmac.compare_digest(token.encode(), settings.CALENDAR_WEBHOOK_TOKEN.encode()):
+        return JSONResponse({"error": "Invalid channel token."}, status_code=403)
+    # "sync" only confirms that a new channel is set up
+    if request.headers.get("X-Goog-Resource-State") != "sync":
+        background_tasks.add_task(_sync_mirror)
+    return Response(status_code=200)
+
 @router.get("/preferences")
 def get_preferences():
     try:
@@ -60,44 +109,197 @@ def update_preferences(prefs: Dict[str, Any] = Body(...)):
 
 
 
+TEST_MODE_RESULT = {
+    "suggested_slots": [
+        {"start": "2025-12-02T19:00:00-08:00", "end": "2025-12-02T20:00:00-08:00"},
+        {"start": "2025-12-03T19:00:00-08:00", "end": "2025-12-03T20:00:00-08:00"}
+    ],
+    "ai_message": "This is a mock message for testing purposes."
+}
+
+
+def _slot_query(params: Dict[str, Any]) -> SlotQuery:
+    """Slot shape requested by the client; fields left out keep their defaults."""
+    return SlotQuery(**{k: params[k] for k in SlotQuery.model_fields if params.get(k) is not None})
+
+
+async def _json_body(request: Request) -> Dict[str, Any]:
+    """The request body as a JSON object; raises ValueError for anything else."""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise ValueError("Request body must be valid JSON.")
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object.")
+    return body
+
+
+def _query_error(e: ValidationError) -> JSONResponse:
+    detail = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'query'}: {err['msg']}" for err in e.errors())
+    return JSONResponse({"error": f"Invalid slot query: {detail}"}, status_code=400)
+
+
+@router.get("/booking/slots")
+def list_slots(
+    timezone: Optional[str] = None,
+    duration_minutes: Optional[int] = None,
+    step_minutes: Optional[int] = None,
+    horizon_days: Optional[int] = None,
+    day_start: Optional[str] = None,
+    day_end: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500)
+):
+    """
+    Pages through the legal slots in chronological order. Pass the returned
+    `next_cursor` back as `cursor` to get the following page.
+    """
+    try:
+        query = _slot_query(locals())
+    except ValidationError as e:
+        return _query_error(e)
+    try:
+        return CalendarService.get_slot_page(timezone, limit=limit, cursor=cursor, **query.model_dump())
+    except Overloaded as e:
+        return _overloaded(e)
+    except ValueError as ve:
+        return JSONResponse({"error": str(ve)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def _busy_for_ranking(user_tz, query: SlotQuery):
+    # Busy intervals only steer the local pre-ranker (batching), so they are best effort
+    try:
+        return await run_blocking(GOOGLE, AvailabilityMaterializer.get_busy_index, user_tz, **query.model_dump())
+    except Exception as e:
+        logger.warning("Busy ranges unavailable for ranking: %s", e)
+        return None
+
+
 @router.post("/booking/suggest-ai")
 async def suggest_booking_ai(request: Request):
     try:
-        body = await request.json()
+        body = await _json_body(request)
+    except ValueError as ve:
+        return JSONResponse({"error": str(ve)}, status_code=400)
+    try:
         user_tz = body.get("timezone")
         user_feedback = body.get("user_feedback")
         test_mode = body.get("test_mode")
 
         if test_mode:
-             return {
-                "suggested_slots": [
-                    {"start": "2025-12-02T19:00:00-08:00", "end": "2025-12-02T20:00:00-08:00"},
-                    {"start": "2025-12-03T19:00:00-08:00", "end": "2025-12-03T20:00:00-08:00"}
-                ],
-                "ai_message": "This is a mock message for testing purposes."
-            }
+             return TEST_MODE_RESULT
+
+        try:
+            query = _slot_query(body)
+        except ValidationError as e:
+            return _query_error(e)
 
         # 1. Get all legal slots
-        legal_slots = CalendarService.get_available_slots(user_tz)
+        with span("suggest.slots"):
+            legal_slots = await run_blocking(GOOGLE, AvailabilityMaterializer.get_available_slots, user_tz, **query.model_dump())
+        with span("suggest.busy"):
+            busy = await _busy_for_ranking(user_tz, query)
         
         # 2. Rank with AI
-        result = AIService.rank_slots(legal_slots, user_feedback)
+        with span("suggest.rank"):
+            result = await run_blocking(LLM, AIService.rank_slots, legal_slots, user_feedback, busy)
         
         if "error" in result:
              return JSONResponse(result, status_code=500)
              
         return result
 
+    except Overloaded as e:
+        return _overloaded(e)
     except Exception as e:
         logger.exception("Error in /booking/suggest-ai")
         return JSONResponse({"error": str(e)}, status_code=500)
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/booking/suggest-ai/stream")
+async def suggest_booking_ai_stream(request: Request):
+    """
+    Server-Sent Events variant of /booking/suggest-ai. Emits `slots` (all legal slots)
+    as soon as the calendar is read, `message` deltas while the model writes, then
+    `suggestions` (same body as /booking/suggest-ai) or `error`, and finally `done`.
+    """
+    try:
+        body = await _json_body(request)
+    except ValueError as ve:
+        return JSONResponse({"error": str(ve)}, status_code=400)
+    user_tz = body.get("timezone")
+    user_feedback = body.get("user_feedback")
+    test_mode = body.get("test_mode")
+    try:
+        query = _slot_query(body)
+    except ValidationError as e:
+        return _query_error(e)
+
+    async def events():
+        try:
+            if test_mode:
+                yield _sse("slots", {"legal_slots": TEST_MODE_RESULT["suggested_slots"]})
+                yield _sse("message", {"delta": TEST_MODE_RESULT["ai_message"]})
+                yield _sse("suggestions", TEST_MODE_RESULT)
+            else:
+                with span("suggest.slots"):
+                    legal_slots = await run_blocking(GOOGLE, AvailabilityMaterializer.get_available_slots, user_tz, **query.model_dump())
+                yield _sse("slots", {"legal_slots": legal_slots})
+
+                with span("suggest.busy"):
+                    busy = await _busy_for_ranking(user_tz, query)
+                async for kind, payload in iterate_blocking(LLM, AIService.stream_rank_slots, legal_slots, user_feedback, busy):
+                    if kind == "message":
+                        yield _sse("message", {"delta": payload})
+                    elif kind == "message_reset":
+                        yield _sse("message_reset", {})
+                    elif "error" in payload:
+                        yield _sse("error", payload)
+                    else:
+                        yield _sse("suggestions", payload)
+        except Overloaded as e:
+            # Headers are already sent, so the retry hint travels in the event
+            yield _sse("error", {"error": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            logger.exception("Error in /booking/suggest-ai/stream")
+            yield _sse("error", {"error": str(e)})
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/booking/book")
 def book_meeting(booking_request: BookingRequest):
     try:
-        event = CalendarService.book_slot(booking_request.model_dump())
+        # Bookings are served ahead of suggestions when Google calls queue
+        with admission_priority(PRIORITY_BOOKING):
+            event = CalendarService.book_slot(booking_request.model_dump())
         return {"message": "Meeting booked!", "event": event}
+    except Overloaded as e:
+        return _overloaded(e)
+    except SlotConflictError as ce:
+        return JSONResponse({"error": str(ce)}, status_code=409)
     except ValueError as ve:
         return JSONResponse({"error": str(ve)}, status_code=400)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
+
+@router.post("/booking/book/batch")
+def book_meetings(batch_request: BatchBookingRequest):
+    """Books several slots with one availability check and one Google batch request; returns a result per slot."""
+    try:
+        with admission_priority(PRIORITY_BOOKING):
+            results = CalendarService.book_slots([b.model_dump() for b in batch_request.bookings])
+        return {"results": results}
+    except Overloaded as e:
+        return _overloaded(e)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
@@ -0,0 +1,186 @@
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.concurrency import GOOGLE, LLM
+from app.core.config import settings
+from app.core.metrics import ADMISSION_REJECTIONS, UPSTREAM_RATE_LIMITED
+
+# Lower is served first when calls queue for the same upstream
+PRIORITY_BOOKING = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2
+
+_PRIORITY_NAMES = {PRIORITY_BOOKING: "booking", PRIORITY_DEFAULT: "default", PRIORITY_BACKGROUND: "background"}
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("admission_priority", default=PRIORITY_DEFAULT)
+
+
+class Overloaded(Exception):
+    """An upstream call was shed by admission control; retry after `retry_after` seconds."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        self.upstream = upstream
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Too many requests to {upstream}; retry in {self.retry_after} s.")
+
+
+@contextmanager
+def admission_priority(priority: int) -> Iterator[None]:
+    """Upstream calls made inside the block (including on worker pools) queue with `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _rate_limited_for(e: BaseException) -> Optional[float]:
+    """Seconds to back off if `e` is an upstream 429 (Retry-After when given), else None."""
+    resp = getattr(e, "resp", None)  # googleapiclient HttpError
+    status = getattr(resp, "status", None) or getattr(e, "code", None)
+    if status != 429 and type(e).__name__ != "ResourceExhausted":
+        return None
+    try:
+        return float(resp.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return settings.UPSTREAM_429_COOLDOWN_SECONDS
+
+
+class Limiter:
+    """
+    Token bucket for one upstream with a bounded, priority-ordered wait queue.
+
+    Calls take a token each; tokens refill at `rate` per second up to `burst`.
+    When none is free, a call waits its turn (booking before default before
+    background, then first come first served) as long as its expected wait
+    fits within ADMISSION_MAX_WAIT_SECONDS and the queue holds fewer than
+    ADMISSION_MAX_QUEUE calls; otherwise it is rejected right away with
+    Overloaded instead of tying up a worker thread. An upstream 429 empties
+    the bucket for the Retry-After period so the next calls are shed locally.
+    A rate of 0 disables the limiter.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting: List[Tuple[int, int]] = []  # heap of (priority, arrival)
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _expected_wait(self, now: float, ahead: int, tokens: int) -> float:
+        missing = ahead + tokens - self._tokens
+        return max(0.0, self._paused_until - now) + max(0.0, missing) / self.rate
+
+    def acquire(self, tokens: int = 1) -> None:
+        if self.rate <= 0:
+            return
+        # A batch larger than the bucket is admitted once the bucket is full
+        tokens = min(tokens, self.burst)
+        priority = _priority.get()
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if not self._waiting and now >= self._paused_until and self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+
+            ahead = sum(1 for p, _ in self._waiting if p <= priority)
+            expected = self._expected_wait(now, ahead, tokens)
+            if len(self._waiting) >= settings.ADMISSION_MAX_QUEUE or expected > settings.ADMISSION_MAX_WAIT_SECONDS:
+                self._reject(priority, expected)
+
+            entry = (priority, next(self._arrivals))
+            heapq.heappush(self._waiting, entry)
+            deadline = now + settings.ADMISSION_MAX_WAIT_SECONDS
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiting[0] == entry and now >= self._paused_until and self._tokens >= tokens:
+                        heapq.heappop(self._waiting)
+                        self._tokens -= tokens
+                        return
+                    if now >= deadline:
+                        self._reject(priority, self._expected_wait(now, ahead, tokens))
+                    self._cond.wait(min(deadline - now, max(0.001, self._expected_wait(now, 0, tokens))))
+            finally:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                # The next waiter may be able to go now
+                self._cond.notify_all()
+
+    def _reject(self, priority: int, retry_after: float) -> None:
+        ADMISSION_REJECTIONS.inc(upstream=self.name, priority=_PRIORITY_NAMES.get(priority, str(priority)))
+        raise Overloaded(self.name, retry_after)
+
+    def pause(self, seconds: float) -> None:
+        """Stops admitting calls for `seconds` (e.g. the upstream answered 429)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+
+    @contextmanager
+    def call(self, tokens: int = 1) -> Iterator[None]:
+        """Admits one upstream call (`tokens` requests, e.g. a batch); pauses the limiter if it is rate limited."""
+        self.acquire(tokens)
+        try:
+            yield
+        except Exception as e:
+            cooldown = _rate_limited_for(e)
+            if cooldown is not None:
+                UPSTREAM_RATE_LIMITED.inc(upstream=self.name)
+                self.pause(cooldown)
+            raise
+
+
+_limiters: Dict[str, Limiter] = {}
+_lock = threading.Lock()
+
+
+def _limits(name: str) -> Tuple[float, int]:
+    if name == LLM:
+        return settings.LLM_RATE_LIMIT_PER_SECOND, settings.LLM_RATE_BURST
+    return settings.GOOGLE_RATE_LIMIT_PER_SECOND, settings.GOOGLE_RATE_BURST
+
+
+def get_limiter(name: str) -> Limiter:
+    """The process-wide limiter for an upstream (GOOGLE or LLM)."""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = _limiters[name] = Limiter(name, *_limits(name))
+    return limiter
+
+
+def upstream_call(name: str, tokens: int = 1):
+    """Shorthand for get_limiter(name).call(tokens)."""
+    return get_limiter(name).call(tokens)
+
+
+def reset_limiters() -> None:
+    with _lock:
+        _limiters.clear()
+
+
+__all__ = [
+    "GOOGLE", "LLM", "Limiter", "Overloaded", "PRIORITY_BACKGROUND", "PRIORITY_BOOKING", "PRIORITY_DEFAULT",
+    "admission_priority", "get_limiter", "reset_limiters", "upstream_call",
+]
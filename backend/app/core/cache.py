@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with optional per-entry TTL.
+
+    `get_or_load` coalesces concurrent misses for the same key into a single
+    loader call (single-flight): the first caller loads, the others wait for
+    its result. Entries invalidated while a load is in flight are not
+    repopulated with that (possibly stale) result.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._on_evict = on_evict
+        self._clock = clock
+        # key -> (expires_at, value, stored_at)
+        self._data: "OrderedDict[Hashable, Tuple[Optional[float], Any, float]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _expired(self, expires_at: Optional[float], now: float) -> bool:
+        return expires_at is not None and expires_at <= now
+
+    def _lookup(self, key: Hashable, evicted: list) -> Tuple[bool, Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value, _ = entry
+        if self._expired(expires_at, self._clock()):
+            del self._data[key]
+            evicted.append((key, value))
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float], evicted: list) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        now = self._clock()
+        expires_at = now + ttl if ttl is not None else None
+        old = self._data.pop(key, None)
+        if old is not None and old[1] is not value:
+            evicted.append((key, old[1]))
+        self._data[key] = (expires_at, value, now)
+        while len(self._data) > self.maxsize:
+            old_key, (_, old_value, _) = self._data.popitem(last=False)
+            evicted.append((old_key, old_value))
+
+    def _notify(self, evicted: list) -> None:
+        if self._on_evict:
+            for key, value in evicted:
+                self._on_evict(key, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        evicted: list = []
+        with self._lock:
+            found, value = self._lookup(key, evicted)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._notify(evicted)
+        return value if found else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        evicted: list = []
+        with self._lock:
+            self._store(key, value, ttl, evicted)
+        self._notify(evicted)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        evicted: list = []
+        with self._lock:
+            found, value = self._lookup(key, evicted)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+                call = self._in_flight.get(key)
+                leader = call is None
+                if leader:
+                    call = self._in_flight[key] = _InFlight()
+                    generation = self._generation
+        self._notify(evicted)
+        if found:
+            return value
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            evicted = []
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if call.error is None and generation == self._generation:
+                    self._store(key, call.value, ttl, evicted)
+            call.done.set()
+            self._notify(evicted)
+        return call.value
+
+    def values(self) -> list:
+        """Snapshot of the live values (does not affect LRU order or hit counts)."""
+        with self._lock:
+            now = self._clock()
+            return [value for expires_at, value, _ in self._data.values() if not self._expired(expires_at, now)]
+
+    def find(self, predicate: Callable[[Hashable], bool], max_age: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Returns (True, value) for the most recently used live entry whose key matches
+        and, if `max_age` is given, that was stored at most `max_age` seconds ago.
+        """
+        with self._lock:
+            now = self._clock()
+            for key in reversed(self._data):
+                expires_at, value, stored_at = self._data[key]
+                if max_age is not None and now - stored_at > max_age:
+                    continue
+                if not self._expired(expires_at, now) and predicate(key):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+            self.misses += 1
+        return False, None
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drops entries whose key matches `predicate` (all entries if None)."""
+        with self._lock:
+            self._generation += 1
+            keys = [k for k in self._data if predicate is None or predicate(k)]
+            evicted = [(k, self._data.pop(k)[1]) for k in keys]
+        self._notify(evicted)
+        return len(evicted)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
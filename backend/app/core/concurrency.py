@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable
+
+from app.core.config import settings
+
+# Blocking work is split into per-upstream pools so a burst of slow LLM calls
+# cannot starve Google Calendar lookups (and vice versa). Pool size is the
+# concurrency limit; excess work queues instead of spawning threads.
+GOOGLE = "google"
+LLM = "llm"
+# Model calls raced against the ranking deadline; they may outlive the request that started them
+RANKING = "ranking"
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def _max_workers(name: str) -> int:
+    if name in (LLM, RANKING):
+        return settings.LLM_MAX_CONCURRENCY
+    return settings.GOOGLE_MAX_CONCURRENCY
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    executor = _executors.get(name)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=_max_workers(name), thread_name_prefix=f"{name}-worker")
+                _executors[name] = executor
+    return executor
+
+
+async def run_blocking(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Runs a blocking call on the named bounded pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    # Carry contextvars (e.g. request-scoped state) into the worker thread
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(name), functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def submit_blocking(name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """Starts a call on the named pool from synchronous code, carrying the caller's contextvars."""
+    ctx = contextvars.copy_context()
+    return get_executor(name).submit(ctx.run, fn, *args, **kwargs)
+
+
+async def iterate_blocking(name: str, gen_fn: Callable[..., Iterable[Any]], *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+    """
+    Drives a blocking generator on the named pool and yields its items to the event
+    loop as they are produced. Stops the producer if the consumer goes away.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+    ctx = contextvars.copy_context()
+
+    def produce():
+        try:
+            for item in gen_fn(*args, **kwargs):
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (False, item))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (True, e))
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, (True, None))
+
+    future = loop.run_in_executor(get_executor(name), functools.partial(ctx.run, produce))
+    try:
+        while True:
+            finished, item = await queue.get()
+            if finished:
+                if item is not None:
+                    raise item
+                break
+            yield item
+        await future
+    finally:
+        stopped.set()
+
+
+def shutdown_executors(wait: bool = False) -> None:
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
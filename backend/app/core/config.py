@@ -19,15 +19,75 @@ class Settings(BaseSettings):
     
     GOOGLE_SECRETS_JSON: Optional[str] = None
     GOOGLE_TOKEN_JSON: Optional[str] = None
+    GOOGLE_HTTP_TIMEOUT_SECONDS: float = 30.0
+    GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS: float = 300.0
+    GOOGLE_TOKEN_POLL_SECONDS: float = 60.0
+    GOOGLE_API_ENDPOINT: Optional[str] = None  # Calendar API base URL override, e.g. a local stand-in for load tests
     
     # Google AI (Gemini)
     GOOGLE_AI_API_KEY: Optional[str] = None
+    AI_PROMPT_ENCODING: str = "compact"  # "compact" (slot IDs, free ranges per day) or "verbose" (one line per slot)
+    AI_MAX_PROMPT_SLOTS: int = 50  # slots shown to the model with the verbose encoding
+    AI_MAX_COMPACT_PROMPT_SLOTS: int = 1000  # slots shown to the model with the compact encoding
+    AI_RANKING_MODE: str = "structured"  # "structured" (one call) or "agent" (tool-calling loop)
+    AI_WARMUP_CALL: bool = False  # send a 1-token request at startup to open the Gemini connection
+    AI_RANKING_DEADLINE_SECONDS: float = 8.0  # budget for the model's ranking; a local ranking is served past it (0 waits indefinitely)
+    AI_CHAT_MODEL_FACTORY: Optional[str] = None  # "module:function" returning a LangChain chat model to use instead of Gemini
     
     # Files (Legacy/Local)
     SECRETS_FILE: str = "secrets.json"
     TOKEN_FILE: str = "tokens.json"
     PREFERENCES_FILE: str = "preferences.json"
 
+    # Tenants (calendar owners); non-default tenants keep their files under TENANTS_DIR/<id>/
+    OWNER_NAME: str = "Birgit"
+    TENANTS_FILE: str = "tenants.json"
+    TENANTS_DIR: str = "tenants"
+    TENANT_POOL_MAX_ENTRIES: int = 256  # per pool: credentials, compiled preferences, API clients
+
+    # Availability
+    AVAILABILITY_MAX_HORIZON_DAYS: int = 90
+    AVAILABILITY_FETCH_DAYS: int = 7  # busy intervals are read from Google in chunks of this many days
+    AVAILABILITY_ENGINE: str = "python"  # "python" (slot by slot) or "numpy" (vectorized minute masks)
+
+    # Availability materializer (keeps requested slot views precomputed in memory)
+    MATERIALIZER_ENABLED: bool = True
+    MATERIALIZER_REFRESH_SECONDS: float = 60.0  # full rebuild interval per view
+    MATERIALIZER_POLL_SECONDS: float = 1.0  # how quickly a booking or preference change is picked up
+    MATERIALIZER_IDLE_SECONDS: float = 1800.0  # views not read for this long are dropped
+    MATERIALIZER_MAX_VIEWS: int = 512
+
+    # Booking
+    BOOKING_SNAPSHOT_MAX_AGE_SECONDS: float = 15.0  # older cached busy times are re-read before booking
+    RESERVATION_PENDING_TIMEOUT_SECONDS: float = 120.0
+    RESERVATION_BOOKED_TTL_SECONDS: float = 300.0
+
+    # Local event mirror (SQLite per tenant, kept current with Calendar incremental sync)
+    EVENT_MIRROR_ENABLED: bool = False
+    EVENT_MIRROR_FILE: str = "events.sqlite3"
+    EVENT_MIRROR_SYNC_SECONDS: float = 30.0  # longest a query can go without a delta sync
+    CALENDAR_WEBHOOK_TOKEN: Optional[str] = None  # channel token for push notifications; unset disables /calendar/webhook
+
+    # Concurrency (worker threads for blocking upstream calls, per worker process)
+    GOOGLE_MAX_CONCURRENCY: int = 16
+    LLM_MAX_CONCURRENCY: int = 8
+
+    # Admission control (token bucket per upstream, per worker process; a rate of 0 disables it).
+    # Off by default: set the rates to your upstream quota divided by the number of worker processes.
+    GOOGLE_RATE_LIMIT_PER_SECOND: float = 0.0
+    GOOGLE_RATE_BURST: int = 20
+    LLM_RATE_LIMIT_PER_SECOND: float = 0.0
+    LLM_RATE_BURST: int = 8
+    ADMISSION_MAX_QUEUE: int = 64  # calls waiting per upstream before new ones are rejected
+    ADMISSION_MAX_WAIT_SECONDS: float = 2.0  # calls expected to wait longer are rejected with 503 right away
+    UPSTREAM_429_COOLDOWN_SECONDS: float = 5.0  # pause after a 429 without Retry-After
+
+    # Caching
+    EVENTS_CACHE_TTL_SECONDS: float = 60.0
+    EVENTS_CACHE_MAX_ENTRIES: int = 256
+    RANKING_CACHE_TTL_SECONDS: float = 300.0
+    RANKING_CACHE_MAX_ENTRIES: int = 512
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
     def get_file_path(self, filename: str) -> Path:
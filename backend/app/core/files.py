@@ -0,0 +1,19 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+
+def atomic_write_json(path: Path, data: Any, indent: Optional[int] = None) -> None:
+    """Writes JSON to a temp file next to `path` and renames it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,112 @@
+import contextvars
+import json
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT_ID = "default"
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class Tenant(NamedTuple):
+    """One calendar owner served by this deployment."""
+    id: str
+    owner_name: str
+    calendar_id: str = "primary"
+
+    @property
+    def is_default(self) -> bool:
+        return self.id == DEFAULT_TENANT_ID
+
+    def _file(self, filename: str) -> Path:
+        # The default owner keeps the original single-tenant file layout
+        if self.is_default:
+            return settings.get_file_path(filename)
+        return settings.get_file_path(settings.TENANTS_DIR) / self.id / filename
+
+    @property
+    def token_path(self) -> Path:
+        return self._file(settings.TOKEN_FILE)
+
+    @property
+    def preferences_path(self) -> Path:
+        return self._file(settings.PREFERENCES_FILE)
+
+    @property
+    def mirror_path(self) -> Path:
+        return self._file(settings.EVENT_MIRROR_FILE)
+
+
+class TenantRegistry:
+    """
+    Known owners, read from TENANTS_FILE ({"<id>": {"owner_name": ..., "calendar_id": ...}}).
+    The file is re-read only when it changes. The default tenant always exists.
+    """
+
+    _cache: Optional[Tuple[Any, Dict[str, Dict[str, Any]]]] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _entries() -> Dict[str, Dict[str, Any]]:
+        path = settings.get_file_path(settings.TENANTS_FILE)
+        try:
+            stat = path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        cached = TenantRegistry._cache
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        with TenantRegistry._lock:
+            entries: Dict[str, Dict[str, Any]] = {}
+            if signature is not None:
+                try:
+                    with open(path, "r") as f:
+                        entries = json.load(f)
+                except Exception:
+                    logger.warning("Failed to read tenants file, serving the default tenant only")
+            TenantRegistry._cache = (signature, entries)
+            return entries
+
+    @staticmethod
+    def get(tenant_id: str) -> Optional[Tenant]:
+        if not TENANT_ID_PATTERN.match(tenant_id or ""):
+            return None
+        entry = TenantRegistry._entries().get(tenant_id)
+        if entry is None:
+            if tenant_id != DEFAULT_TENANT_ID:
+                return None
+            entry = {}
+        return Tenant(
+            id=tenant_id,
+            owner_name=entry.get("owner_name") or settings.OWNER_NAME,
+            calendar_id=entry.get("calendar_id") or "primary"
+        )
+
+
+_current_tenant: contextvars.ContextVar[Optional[Tenant]] = contextvars.ContextVar("tenant", default=None)
+
+
+def get_current_tenant() -> Tenant:
+    """The tenant of the current request (the default tenant outside of one)."""
+    tenant = _current_tenant.get()
+    if tenant is None:
+        tenant = TenantRegistry.get(DEFAULT_TENANT_ID)
+    return tenant
+
+
+@contextmanager
+def use_tenant(tenant: Tenant) -> Iterator[Tenant]:
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
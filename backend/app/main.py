@@ -1,10 +1,36 @@
+import logging
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.middleware import MetricsMiddleware, TenantMiddleware
 from app.api.routes import router
+from app.core.concurrency import LLM, run_blocking, shutdown_executors
+from app.services.ai_service import AIService
+from app.services.availability import AvailabilityMaterializer
 
-app = FastAPI(title="Booking Backend")
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the long-lived LLM client/agent before taking traffic
+    try:
+        await run_blocking(LLM, AIService.warm_up)
+    except Exception as e:
+        logger.warning("AI ranking engine warm-up failed: %s", e)
+    AvailabilityMaterializer.start()
+    yield
+    await AvailabilityMaterializer.stop()
+    shutdown_executors()
+
+
+app = FastAPI(title="Booking Backend", lifespan=lifespan)
+
+# Added before CORS so error responses from tenant resolution still carry CORS headers
+app.add_middleware(TenantMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 allowed_origins = os.environ.get("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 
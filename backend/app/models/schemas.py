@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 
+from app.core.config import settings
+
 class Slot(BaseModel):
     start: str = Field(description="ISO8601 start time")
     end: str = Field(description="ISO8601 end time")
@@ -9,6 +11,10 @@ class SlotList(BaseModel):
     slots: List[Slot] = Field(description="List of suggested meeting slots")
     message: Optional[str] = Field(default="", description="A friendly message to the user explaining the choices or answering their question.")
 
+class SlotIdList(BaseModel):
+    slot_ids: List[str] = Field(description="IDs of the suggested slots (day number, a dot and the start time as HHMM, e.g. '2.0930'), best first")
+    message: Optional[str] = Field(default="", description="A friendly message to the user explaining the choices or answering their question.")
+
 class BookingRequest(BaseModel):
     start: str
     end: str
@@ -16,3 +22,19 @@ class BookingRequest(BaseModel):
     email: Optional[str] = None
     first_name: Optional[str] = None
     last_name: Optional[str] = None
+
+class BatchBookingRequest(BaseModel):
+    bookings: List[BookingRequest] = Field(min_length=1, max_length=50, description="Slots to book in one Google batch request")
+
+class SlotQuery(BaseModel):
+    duration_minutes: int = Field(default=60, ge=5, le=480, description="Length of each slot")
+    step_minutes: Optional[int] = Field(default=None, ge=5, le=1440, description="Distance between slot starts (defaults to the duration)")
+    horizon_days: int = Field(default=7, ge=1, le=settings.AVAILABILITY_MAX_HORIZON_DAYS, description="Number of days to search, starting today")
+    day_start: str = Field(default="07:00", pattern=r"^([01]\d|2[0-3]):[0-5]\d$", description="Earliest slot start (HH:MM, local time)")
+    day_end: str = Field(default="22:00", pattern=r"^([01]\d|2[0-3]):[0-5]\d$", description="Latest slot end (HH:MM, local time)")
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.day_start >= self.day_end:
+            raise ValueError("day_start must be before day_end")
+        return self
@@ -1,16 +1,33 @@
+import copy
+import hashlib
+import importlib
+import json
 import logging
-from typing import List, Dict, Any
-from collections import defaultdict
+import queue
+import re
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
 from datetime import datetime
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import tool
 from langchain.output_parsers import PydanticOutputParser
+from pydantic import BaseModel
 
+from app.core.admission import LLM, Overloaded, upstream_call
+from app.core.cache import TTLCache
+from app.core.concurrency import RANKING, submit_blocking
 from app.core.config import settings
-from app.models.schemas import SlotList
+from app.core.metrics import HALLUCINATED_SLOTS, LLM_TOKENS, LLM_TOOL_CALL_ROUNDS, RANKING_FALLBACKS, span
+from app.models.schemas import SlotIdList, SlotList
+from app.services.busy_index import BusyIndex
+from app.services.heuristic_ranker import HeuristicRanker
 from app.services.preferences import PreferencesService
+from app.services.prompt_encoding import CompactSlots, PromptEncoder
 
 logger = logging.getLogger(__name__)
 
@@ -30,44 +47,323 @@ def get_days_of_week(date_strings: List[str]) -> Dict[str, str]:
             results[date_str] = f"Invalid date format: {str(e)}"
     return results
 
-class AIService:
+STRUCTURED_SYSTEM_PROMPT = (
+    "You are a helpful booking assistant. Select meeting slots for the user from the list provided "
+    "and reply using the {schema} schema. Put any friendly message in the 'message' field."
+)
+
+AGENT_SYSTEM_PROMPT = (
+    "You are a helpful booking assistant. You have access to a tool `get_days_of_week` that can tell you the day name for a list of dates. "
+    "Use it whenever you need to verify dates to answer the user's request (e.g. 'find slots on Friday'). "
+    "When you have selected the slots, you MUST return the result as a JSON object matching the specified format. "
+    "Put any friendly message in the 'message' field."
+)
+
+
+# SlotList as a plain JSON schema (no $refs or nullable unions) for Gemini's JSON mode
+SLOT_LIST_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "slots": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"start": {"type": "string"}, "end": {"type": "string"}},
+                "required": ["start", "end"],
+            },
+        },
+        "message": {"type": "string"},
+    },
+    "required": ["slots", "message"],
+}
+
+SLOT_ID_LIST_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "slot_ids": {"type": "array", "items": {"type": "string"}},
+        "message": {"type": "string"},
+    },
+    "required": ["slot_ids", "message"],
+}
+
+
+def _record_usage(usage: UsageMetadataCallbackHandler) -> None:
+    for tokens in usage.usage_metadata.values():
+        LLM_TOKENS.inc(tokens.get("input_tokens", 0), type="input")
+        LLM_TOKENS.inc(tokens.get("output_tokens", 0), type="output")
+
+
+def _token_counts(usage: UsageMetadataCallbackHandler) -> Optional[Dict[str, int]]:
+    """Prompt and completion tokens of one ranking, summed over the models (and agent rounds) it used; None if unreported."""
+    if not usage.usage_metadata:
+        return None
+    counts = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for tokens in usage.usage_metadata.values():
+        for name in counts:
+            counts[name] += tokens.get(name, 0)
+    return counts
+
+
+class RankingContext(NamedTuple):
+    legal_slots: List[Dict[str, str]]
+    prefs: Dict[str, Any]
+    busy: Optional[BusyIndex]
+    user_feedback: Optional[str]
+    cache_key: str
+    prompt: str
+    slot_ids: Optional[Dict[str, Dict[str, str]]] = None  # compact encoding: the slot behind each ID
+
+    @property
+    def schema(self) -> Type[BaseModel]:
+        """What the model answers with: slot IDs for the compact encoding, start/end pairs otherwise."""
+        return SlotIdList if self.slot_ids is not None else SlotList
+
+
+class RankingEngine:
+    """
+    Long-lived LLM objects used for ranking: the chat model (which owns the
+    pooled connection to Gemini), the structured-output runnable, the output
+    parser and the tool-calling agent. LangChain runnables keep no per-call
+    state, so one engine is shared by all request threads.
+    """
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.llm = self._chat_model(api_key)
+        # One variant per answer schema: SlotList (verbose prompts) and SlotIdList (compact prompts)
+        self.structured_llms = {
+            schema: self.llm.with_structured_output(schema, include_raw=True) for schema in (SlotList, SlotIdList)
+        }
+        # JSON-mode output parsed incrementally, so partial objects can be streamed
+        self.json_stream_llms = {
+            SlotList: self.llm.with_structured_output(SLOT_LIST_JSON_SCHEMA, method="json_mode"),
+            SlotIdList: self.llm.with_structured_output(SLOT_ID_LIST_JSON_SCHEMA, method="json_mode"),
+        }
+        self.parsers = {schema: PydanticOutputParser(pydantic_object=schema) for schema in (SlotList, SlotIdList)}
+
+        tools = [get_days_of_week]
+        prompt_template = ChatPromptTemplate.from_messages([
+            ("system", AGENT_SYSTEM_PROMPT),
+            ("human", "{input}"),
+            ("placeholder", "{agent_scratchpad}"),
+        ])
+        agent = create_tool_calling_agent(self.llm, tools, prompt_template)
+        self.agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False, return_intermediate_steps=True)
+
     @staticmethod
-    def rank_slots(legal_slots: List[Dict[str, str]], user_feedback: str = None) -> Dict[str, Any]:
+    def _chat_model(api_key: str):
+        if settings.AI_CHAT_MODEL_FACTORY:
+            # e.g. a local stand-in for load tests
+            module_name, _, factory = settings.AI_CHAT_MODEL_FACTORY.partition(":")
+            return getattr(importlib.import_module(module_name), factory)(api_key)
+        return ChatGoogleGenerativeAI(
+            google_api_key=api_key,
+            model="gemini-2.0-flash",
+            temperature=0,
+        )
+
+    def warm_up(self) -> None:
+        """Opens the connection to Gemini with a minimal request so the first user doesn't pay the handshake."""
+        with upstream_call(LLM):
+            self.llm.invoke("ping", max_output_tokens=1)
+
+    def run_structured(self, prompt: str, schema: Type[BaseModel] = SlotList,
+                       usage: Optional[UsageMetadataCallbackHandler] = None):
         """
-        Uses LLM to rank and select the best slots based on user feedback and preferences.
+        Single round trip with native structured output against `schema`.
+        Returns (raw model output, callable producing the parsed schema object).
+        Token usage is also collected in `usage` when given.
         """
-        # Limit slots to avoid token limits, but sample evenly across days
-        # so that later days (e.g. Friday/Saturday) aren't cut off
-        max_slots = 50
-        if len(legal_slots) <= max_slots:
-            legal_slots_subset = legal_slots
+        usage = usage if usage is not None else UsageMetadataCallbackHandler()
+        with upstream_call(LLM):
+            result = self.structured_llms[schema].invoke([
+                ("system", STRUCTURED_SYSTEM_PROMPT.format(schema=schema.__name__)),
+                ("human", prompt),
+            ], config={"callbacks": [usage]})
+        _record_usage(usage)
+        raw = result.get("raw")
+        tool_calls = getattr(raw, "tool_calls", None)
+        response_content = json.dumps(tool_calls[0]["args"]) if tool_calls else str(getattr(raw, "content", ""))
+
+        def parse_result() -> BaseModel:
+            if result.get("parsed") is None:
+                raise result.get("parsing_error") or ValueError("Model returned no structured output")
+            return result["parsed"]
+
+        return response_content, parse_result
+
+    def stream_json(self, prompt: str, schema: Type[BaseModel] = SlotList,
+                    usage: Optional[UsageMetadataCallbackHandler] = None) -> Iterator[Dict[str, Any]]:
+        """Streams progressively more complete `schema`-shaped dicts as the model generates tokens."""
+        usage = usage if usage is not None else UsageMetadataCallbackHandler()
+        with upstream_call(LLM):
+            yield from self.json_stream_llms[schema].stream([
+                ("system", STRUCTURED_SYSTEM_PROMPT.format(schema=schema.__name__)),
+                ("human", prompt),
+            ], config={"callbacks": [usage]})
+        _record_usage(usage)
+
+    def run_agent(self, prompt: str, schema: Type[BaseModel] = SlotList,
+                  usage: Optional[UsageMetadataCallbackHandler] = None):
+        """
+        Tool-calling agent mode (AI_RANKING_MODE=agent): the model may call
+        get_days_of_week before answering with JSON, which is parsed from the text.
+        """
+        usage = usage if usage is not None else UsageMetadataCallbackHandler()
+        parser = self.parsers[schema]
+        # One admission for the whole agent loop; its tool round trips are short follow-ups
+        with upstream_call(LLM):
+            result = self.agent_executor.invoke(
+                {"input": prompt + parser.get_format_instructions()}, config={"callbacks": [usage]}
+            )
+        _record_usage(usage)
+        LLM_TOOL_CALL_ROUNDS.inc(len(result.get("intermediate_steps", [])))
+        response_content = result["output"]
+
+        def parse_result() -> BaseModel:
+            # Clean up response content
+            cleaned_response = response_content.strip()
+            if "```json" in cleaned_response:
+                cleaned_response = cleaned_response.split("```json")[1].split("```")[0].strip()
+            elif "```" in cleaned_response:
+                cleaned_response = cleaned_response.split("```")[1].split("```")[0].strip()
+            return parser.parse(cleaned_response)
+
+        return response_content, parse_result
+
+
+class AIService:
+    _engine: Optional[RankingEngine] = None
+    _engine_lock = threading.Lock()
+
+    # Successful rankings keyed by hash of (slots shown to the model, preferences, normalized feedback)
+    _ranking_cache = TTLCache(maxsize=settings.RANKING_CACHE_MAX_ENTRIES, ttl=settings.RANKING_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def get_engine() -> RankingEngine:
+        """The process-wide RankingEngine, rebuilt only if the API key changes."""
+        engine = AIService._engine
+        if engine is not None and engine.api_key == settings.GOOGLE_AI_API_KEY:
+            return engine
+        with AIService._engine_lock:
+            if AIService._engine is None or AIService._engine.api_key != settings.GOOGLE_AI_API_KEY:
+                AIService._engine = RankingEngine(settings.GOOGLE_AI_API_KEY)
+            return AIService._engine
+
+    @staticmethod
+    def reset_engine() -> None:
+        with AIService._engine_lock:
+            AIService._engine = None
+
+    @staticmethod
+    def warm_up() -> None:
+        """Builds the ranking engine (and optionally opens its connection) ahead of the first request."""
+        if not settings.GOOGLE_AI_API_KEY:
+            return
+        engine = AIService.get_engine()
+        if settings.AI_WARMUP_CALL:
+            engine.warm_up()
+
+    @staticmethod
+    def normalize_feedback(user_feedback: Optional[str]) -> str:
+        """Case/whitespace/punctuation-insensitive form of the user's request, so common phrasings share a cache entry."""
+        if not user_feedback:
+            return ""
+        text = re.sub(r"[^\w\s:]", " ", user_feedback.lower())
+        return " ".join(text.split())
+
+    @staticmethod
+    def ranking_cache_key(slots: List[Dict[str, str]], prefs: Dict[str, Any], user_feedback: Optional[str]) -> str:
+        payload = json.dumps({
+            "slots": [f"{s['start']}|{s['end']}" for s in slots],
+            "prefs": prefs,
+            "feedback": AIService.normalize_feedback(user_feedback),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _cached_ranking(key: str, legal_slots: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """Returns a cached ranking whose slots are all still legal, dropping any that are not."""
+        cached = AIService._ranking_cache.get(key)
+        if cached is None:
+            return None
+        legal_signatures = {f"{s['start']}|{s['end']}" for s in legal_slots}
+        still_legal = [s for s in cached["suggested_slots"] if f"{s['start']}|{s['end']}" in legal_signatures]
+        if not still_legal:
+            AIService._ranking_cache.invalidate(lambda k: k == key)
+            return None
+        result = copy.deepcopy(cached)
+        result["suggested_slots"] = still_legal
+        return result
+
+    @staticmethod
+    def ranking_cache_stats() -> Dict[str, int]:
+        return AIService._ranking_cache.stats()
+
+    @staticmethod
+    def heuristic_result(legal_slots: List[Dict[str, str]], prefs: Dict[str, Any],
+                         busy: Optional[BusyIndex] = None, user_feedback: str = None) -> Dict[str, Any]:
+        """A preference-aware ranking computed locally, without a model call."""
+        return {
+            "suggested_slots": HeuristicRanker.rank(legal_slots, prefs, busy, user_feedback),
+            "ai_message": "Here are some available times that should work well."
+        }
+
+    @staticmethod
+    def _slot_line(slot: Dict[str, str]) -> str:
+        """One prompt line per slot, pre-annotated with weekday and local time so the model needn't work them out."""
+        start = datetime.fromisoformat(slot['start'])
+        end = datetime.fromisoformat(slot['end'])
+        return f"- {start:%A %Y-%m-%d %H:%M}-{end:%H:%M} (start={slot['start']}, end={slot['end']})"
+
+    @staticmethod
+    def _slot_scope(slots: List[Dict[str, str]]) -> str:
+        """Describes the slot length and date range, e.g. '30-minute meeting slots from 2025-11-20 to 2025-12-19'."""
+        first = datetime.fromisoformat(slots[0]['start'])
+        last = datetime.fromisoformat(slots[-1]['start'])
+        minutes = int((datetime.fromisoformat(slots[0]['end']) - first).total_seconds() // 60)
+        length = f"{minutes // 60}-hour" if minutes % 60 == 0 else f"{minutes}-minute"
+        return f"{length} meeting slots from {first:%Y-%m-%d} to {last:%Y-%m-%d}"
+
+    @staticmethod
+    def _compact_slot_section(slots: List[Dict[str, str]], compact: CompactSlots) -> Tuple[str, str]:
+        """The slot list and answer instructions of a compact prompt."""
+        step = f", and within a range a meeting can start every {compact.step_minutes} minutes" if compact.step_minutes else ""
+        example_id, example_slot = next(iter(compact.slots_by_id.items()))
+        example_time = datetime.fromisoformat(example_slot['start'])
+        slot_list = (
+            f"Here are all legal {AIService._slot_scope(slots)} (fully respecting blocked times and busy events), "
+            f"one line per day: day number, weekday and date, then the free start times. "
+            f"Ranges give the first and last start time{step}:\n"
+            f"{compact.text}\n\n"
+        )
+        instructions = (
+            "Please select and rank 5-10 diverse options for the user. Refer to each chosen slot by its ID: the day number, "
+            f"a dot and the start time as HHMM (e.g. {example_id} for {example_time:%H:%M} on day {example_id.split('.')[0]}). "
+            "Only start times listed above are valid.\n"
+        )
+        return slot_list, instructions
+
+    @staticmethod
+    def build_prompt(slots: List[Dict[str, str]], prefs: Dict[str, Any], user_feedback: str = None,
+                     compact: Optional[CompactSlots] = None) -> str:
+        """Ranking prompt for `slots`; with `compact` (PromptEncoder.encode(slots)) the slots are listed by ID."""
+        if compact is not None:
+            slot_list_str, answer_str = AIService._compact_slot_section(slots, compact)
         else:
-            by_day = defaultdict(list)
-            for slot in legal_slots:
-                day = slot['start'][:10]
-                by_day[day].append(slot)
-            per_day = max(1, max_slots // len(by_day))
-            legal_slots_subset = []
-            for day in sorted(by_day):
-                legal_slots_subset.extend(by_day[day][:per_day])
-
-        if not legal_slots_subset:
-            return {"error": "No legal slots available."}
+            slot_list_str = (
+                f"Here is a list of all legal {AIService._slot_scope(slots)} (fully respecting blocked times and busy events), "
+                f"with the weekday and local time of each:\n"
+                + "\n".join(AIService._slot_line(slot) for slot in slots)
+                + "\n\n"
+            )
+            answer_str = "Please select and rank 5-10 diverse options for the user. Copy each chosen slot's start and end values exactly.\n"
 
-        prefs = PreferencesService.get_preferences()
-        
-        slot_list_str = "\n".join([
-            f"- {slot['start']} to {slot['end']}" for slot in legal_slots_subset
-        ])
-        
         owner_prefs_str = "Calendar Owner Preferences (Internal Guidelines - try to follow these but prioritize User Request if valid):\n"
         if prefs.get('batch_meetings'):
             owner_prefs_str += "- Try to batch meetings together if possible.\n"
         owner_prefs_str += "- Avoid meetings after 21:00 if possible.\n"
         owner_prefs_str += "- Prefer weekends over weekdays, but offer a few weekday options for diversity if the user didn't specify.\n"
-        
-        parser = PydanticOutputParser(pydantic_object=SlotList)
-        format_instructions = parser.get_format_instructions()
 
         user_request_str = "User Request (The user is asking for this):\n"
         if user_feedback:
@@ -75,80 +371,259 @@ class AIService:
         else:
             user_request_str += "- (No specific request)\n"
 
-        prompt = (
-            f"Here is a list of all legal 1-hour meeting slots for the next 7 days (fully respecting blocked times and busy events):\n"
-            f"{slot_list_str}\n\n"
+        return (
+            f"{slot_list_str}"
             f"{owner_prefs_str}\n"
             f"{user_request_str}\n"
-            "Please select and rank 5-10 diverse options for the user.\n"
+            f"{answer_str}"
             "INSTRUCTIONS FOR 'message' FIELD:\n"
             "- Address the USER directly.\n"
             "- Explain why these slots are good matches for THEIR request.\n"
             "- Ensure your message accurately describes the slots you selected (e.g. do not claim to show weekdays if you only selected weekends).\n"
             "- Do NOT explicitly mention 'Owner Preferences' or 'Internal Guidelines' unless necessary to explain a constraint.\n"
             "- Be friendly and helpful.\n"
-            f"{format_instructions}"
         )
-        
-        llm = ChatGoogleGenerativeAI(
-            google_api_key=settings.GOOGLE_AI_API_KEY,
-            model="gemini-2.0-flash",
-            temperature=0,
-        )
-        
-        tools = [get_days_of_week]
-        
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", "You are a helpful booking assistant. You have access to a tool `get_days_of_week` that can tell you the day name for a list of dates. Use it whenever you need to verify dates to answer the user's request (e.g. 'find slots on Friday'). When you have selected the slots, you MUST return the result as a JSON object matching the specified format. Put any friendly message in the 'message' field."),
-            ("human", "{input}"),
-            ("placeholder", "{agent_scratchpad}"),
-        ])
-        
-        agent = create_tool_calling_agent(llm, tools, prompt_template)
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False)
-        
-        result = agent_executor.invoke({"input": prompt})
-        response_content = result["output"]
-        
+
+    @staticmethod
+    def _prepare(legal_slots: List[Dict[str, str]], user_feedback: Optional[str],
+                 busy: Optional[BusyIndex]) -> Tuple[Optional[Dict[str, Any]], Optional[RankingContext]]:
+        """Returns (result, None) when no model call is needed, else (None, context for the model call)."""
+        if not legal_slots:
+            return {"error": "No legal slots available."}, None
+
+        prefs = PreferencesService.get_preferences()
+
+        if not settings.GOOGLE_AI_API_KEY:
+            logger.warning("GOOGLE_AI_API_KEY not set; returning heuristic ranking")
+            RANKING_FALLBACKS.inc(reason="no_api_key")
+            return dict(AIService.heuristic_result(legal_slots, prefs, busy, user_feedback), degraded=True), None
+
+        # Score locally and only show the model the most promising slots (keeping every day represented)
+        compact_encoding = settings.AI_PROMPT_ENCODING == "compact"
+        max_slots = settings.AI_MAX_COMPACT_PROMPT_SLOTS if compact_encoding else settings.AI_MAX_PROMPT_SLOTS
+        legal_slots_subset = HeuristicRanker.top_k(legal_slots, max_slots, prefs, busy, user_feedback)
+
+        cache_key = AIService.ranking_cache_key(legal_slots_subset, prefs, user_feedback)
+        cached = AIService._cached_ranking(cache_key, legal_slots)
+        if cached is not None:
+            logger.info("Serving cached AI ranking")
+            return cached, None
+
+        compact = PromptEncoder.encode(legal_slots_subset) if compact_encoding else None
+        prompt = AIService.build_prompt(legal_slots_subset, prefs, user_feedback, compact)
+        slot_ids = compact.slots_by_id if compact is not None else None
+        return None, RankingContext(legal_slots, prefs, busy, user_feedback, cache_key, prompt, slot_ids)
+
+    @staticmethod
+    def _chosen_slots(ctx: RankingContext, parsed_result: BaseModel) -> List[Dict[str, str]]:
+        """The model's picks as start/end dicts; slot IDs map back to the exact values of the slot they name."""
+        if not isinstance(parsed_result, SlotIdList):
+            return [slot.model_dump() for slot in parsed_result.slots]
+        chosen = []
+        for slot_id in parsed_result.slot_ids:
+            slot = (ctx.slot_ids or {}).get(PromptEncoder.normalize_id(slot_id))
+            if slot is None:
+                logger.warning("LLM returned an unknown slot ID: %s", slot_id)
+                HALLUCINATED_SLOTS.inc()
+            else:
+                chosen.append({"start": slot["start"], "end": slot["end"]})
+        return chosen
+
+    @staticmethod
+    def _finalize(ctx: RankingContext, response_content: str, parse_result: Callable[[], BaseModel],
+                  token_usage: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Validates the model's slots against the legal set, falls back if none survive, and caches good results."""
         try:
-            # Clean up response content
-            cleaned_response = response_content.strip()
-            if "```json" in cleaned_response:
-                cleaned_response = cleaned_response.split("```json")[1].split("```")[0].strip()
-            elif "```" in cleaned_response:
-                cleaned_response = cleaned_response.split("```")[1].split("```")[0].strip()
+            parsed_result = parse_result()
+            parsed_result.message = parsed_result.message or ""
 
-            parsed_result = parser.parse(cleaned_response)
-            
             # Post-validation: Ensure returned slots are actually in the legal_slots list
             # We create a set of signatures "start|end" for O(1) lookup
-            legal_signatures = {f"{s['start']}|{s['end']}" for s in legal_slots}
+            legal_signatures = {f"{s['start']}|{s['end']}" for s in ctx.legal_slots}
             
             validated_slots = []
-            for slot in parsed_result.slots:
-                sig = f"{slot.start}|{slot.end}"
+            for slot in AIService._chosen_slots(ctx, parsed_result):
+                sig = f"{slot['start']}|{slot['end']}"
                 if sig in legal_signatures:
-                    validated_slots.append(slot.model_dump())
+                    validated_slots.append(slot)
                 else:
                     logger.warning("LLM hallucinated or modified a slot: %s", sig)
+                    HALLUCINATED_SLOTS.inc()
             
             # If LLM failed completely, fallback to top legal slots
             if not validated_slots:
-                logger.warning("No valid slots returned by LLM. Falling back to raw legal slots.")
-                validated_slots = legal_slots[:5]
-                parsed_result.message += " (Note: I had trouble finding exact matches for your request, so here are the next available times.)"
+                logger.warning("No valid slots returned by LLM. Falling back to heuristic ranking.")
+                RANKING_FALLBACKS.inc(reason="no_valid_slots")
+                validated_slots = HeuristicRanker.rank(ctx.legal_slots, ctx.prefs, ctx.busy, ctx.user_feedback)
+                parsed_result.message += " (Note: I had trouble finding exact matches for your request, so here are some other good times.)"
+                degraded = True
+            else:
+                degraded = False
+                AIService._ranking_cache.set(ctx.cache_key, {
+                    "suggested_slots": copy.deepcopy(validated_slots),
+                    "ai_message": parsed_result.message,
+                    "llm_input": ctx.prompt,
+                    "llm_output": response_content
+                })
 
-            return {
+            result = {
                 "suggested_slots": validated_slots,
                 "ai_message": parsed_result.message,
-                "llm_input": prompt,
+                "llm_input": ctx.prompt,
                 "llm_output": response_content
             }
+            if degraded:
+                result["degraded"] = True
+            if token_usage is not None:
+                result["token_usage"] = token_usage
+            return result
         except Exception as e:
             logger.error("Failed to parse LLM response: %s", e)
-            return {
-                "error": "Failed to parse LLM response", 
-                "details": str(e),
-                "llm_input": prompt,
-                "llm_output": response_content
-            }
+            result = dict(AIService._degraded_result(ctx, "parse_error"), llm_output=response_content)
+            if token_usage is not None:
+                result["token_usage"] = token_usage
+            return result
+
+    @staticmethod
+    def _degraded_result(ctx: RankingContext, reason: str) -> Dict[str, Any]:
+        """The local ranking served instead of the model's, marked `degraded`."""
+        RANKING_FALLBACKS.inc(reason=reason)
+        result = AIService.heuristic_result(ctx.legal_slots, ctx.prefs, ctx.busy, ctx.user_feedback)
+        result.update(degraded=True, llm_input=ctx.prompt)
+        return result
+
+    @staticmethod
+    def _remaining(started: float) -> Optional[float]:
+        """Seconds left of the ranking deadline for a request that started at `started`; None without a deadline."""
+        if settings.AI_RANKING_DEADLINE_SECONDS <= 0:
+            return None
+        return max(0.0, started + settings.AI_RANKING_DEADLINE_SECONDS - time.monotonic())
+
+    @staticmethod
+    def _failure_reason(e: Exception) -> str:
+        return "overloaded" if isinstance(e, Overloaded) else "llm_error"
+
+    @staticmethod
+    def _model_ranking(ctx: RankingContext) -> Dict[str, Any]:
+        """
+        The model call and validation, run on the RANKING pool. It finishes (and
+        caches a good result) even when the request gave up on it at the deadline.
+        """
+        engine = AIService.get_engine()
+        usage = UsageMetadataCallbackHandler()
+        if settings.AI_RANKING_MODE == "agent":
+            with span("llm.agent"):
+                response_content, parse_result = engine.run_agent(ctx.prompt, schema=ctx.schema, usage=usage)
+        else:
+            with span("llm.structured"):
+                response_content, parse_result = engine.run_structured(ctx.prompt, schema=ctx.schema, usage=usage)
+
+        with span("llm.parse"):
+            return AIService._finalize(ctx, response_content, parse_result, _token_counts(usage))
+
+    @staticmethod
+    def _stream_model_ranking(ctx: RankingContext, emit: Callable[[Tuple[str, Any]], None]) -> None:
+        """
+        Streaming counterpart of _model_ranking: emits ("partial", dict) as the model
+        writes, then ("result", dict) or ("error", exception).
+        """
+        final: Dict[str, Any] = {}
+        usage = UsageMetadataCallbackHandler()
+        try:
+            for partial in AIService.get_engine().stream_json(ctx.prompt, schema=ctx.schema, usage=usage):
+                if not isinstance(partial, dict):
+                    continue
+                final = partial
+                emit(("partial", partial))
+            with span("llm.parse"):
+                result = AIService._finalize(
+                    ctx, json.dumps(final), lambda: ctx.schema.model_validate(final), _token_counts(usage)
+                )
+            emit(("result", result))
+        except Exception as e:
+            emit(("error", e))
+
+    @staticmethod
+    def rank_slots(legal_slots: List[Dict[str, str]], user_feedback: str = None,
+                   busy: Optional[BusyIndex] = None) -> Dict[str, Any]:
+        """
+        Uses LLM to rank and select the best slots based on user feedback and preferences.
+        `busy` (the owner's busy intervals) lets the local pre-ranker favour batched meetings.
+
+        The model gets AI_RANKING_DEADLINE_SECONDS. If it misses that or fails, the
+        local heuristic ranking is returned with `degraded: true`. A model call that
+        had not started by then is dropped; one already running finishes and its
+        answer still lands in the ranking cache for the next identical request.
+        """
+        started = time.monotonic()
+        with span("ranking.prepare"):
+            result, ctx = AIService._prepare(legal_slots, user_feedback, busy)
+        if ctx is None:
+            return result
+
+        future = submit_blocking(RANKING, AIService._model_ranking, ctx)
+        try:
+            return future.result(timeout=AIService._remaining(started))
+        except FutureTimeoutError:
+            # Still queued behind other slow calls: nobody is waiting for it any more
+            future.cancel()
+            logger.warning("AI ranking missed its %.1f s deadline; serving the local ranking", settings.AI_RANKING_DEADLINE_SECONDS)
+            return AIService._degraded_result(ctx, "deadline")
+        except Exception as e:
+            logger.warning("AI ranking failed (%s); serving the local ranking", e)
+            return AIService._degraded_result(ctx, AIService._failure_reason(e))
+
+    @staticmethod
+    def stream_rank_slots(legal_slots: List[Dict[str, str]], user_feedback: str = None,
+                          busy: Optional[BusyIndex] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Streaming variant of rank_slots. Yields ("message", text_delta) as the model writes
+        its message, then a final ("result", dict) shaped like rank_slots' return value.
+        The same deadline applies to the whole stream. If the final message does not
+        continue the text already streamed (e.g. the result is degraded), ("message_reset",
+        None) is yielded first and the final message follows as a fresh delta.
+        """
+        started = time.monotonic()
+        with span("ranking.prepare"):
+            result, ctx = AIService._prepare(legal_slots, user_feedback, busy)
+        if ctx is None:
+            if result.get("ai_message"):
+                yield "message", result["ai_message"]
+            yield "result", result
+            return
+
+        updates: queue.Queue = queue.Queue()
+        future = submit_blocking(RANKING, AIService._stream_model_ranking, ctx, updates.put)
+        sent = ""
+        try:
+            while True:
+                try:
+                    kind, payload = updates.get(timeout=AIService._remaining(started))
+                except queue.Empty:
+                    logger.warning("AI ranking missed its %.1f s deadline; serving the local ranking", settings.AI_RANKING_DEADLINE_SECONDS)
+                    result = AIService._degraded_result(ctx, "deadline")
+                    break
+                if kind == "result":
+                    result = payload
+                    break
+                if kind == "error":
+                    logger.warning("AI ranking failed (%s); serving the local ranking", payload)
+                    result = AIService._degraded_result(ctx, AIService._failure_reason(payload))
+                    break
+                message = payload.get("message")
+                if isinstance(message, str) and len(message) > len(sent) and message.startswith(sent):
+                    yield "message", message[len(sent):]
+                    sent = message
+        finally:
+            # Drops the call if it never started (deadline passed or the client went away)
+            future.cancel()
+
+        message = result.get("ai_message", "")
+        if sent and not message.startswith(sent):
+            # The streamed text is not part of the final message (e.g. a degraded result after a deadline)
+            yield "message_reset", None
+            sent = ""
+        if len(message) > len(sent):
+            # e.g. the fallback note appended after validation
+            yield "message", message[len(sent):]
+        yield "result", result
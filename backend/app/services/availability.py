@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional
+
+from app.core.admission import PRIORITY_BACKGROUND, Overloaded, admission_priority
+from app.core.cache import TTLCache
+from app.core.concurrency import GOOGLE, run_blocking
+from app.core.config import settings
+from app.core.tenants import Tenant, get_current_tenant, use_tenant
+from app.services.busy_index import BusyIndex
+from app.services.calendar import CalendarService
+from app.services.preferences import CompiledPreferences, PreferencesService
+from app.services.reservations import ReservationLedger
+
+logger = logging.getLogger(__name__)
+
+
+class _Build(NamedTuple):
+    slots: List[Dict[str, str]]
+    starts: List[float]  # slot start timestamps, for bisecting past slots away
+    tz: Any
+    first_day: date
+    revision: int
+    compiled: CompiledPreferences
+    built_at: float
+    busy: Optional[BusyIndex]  # for the ranking's batching preference; None if it could not be read
+
+
+class _View:
+    """Precomputed slots of one (tenant, timezone, slot query), plus what they were computed from."""
+
+    def __init__(self, key: Hashable, tenant: Tenant, user_tz: Optional[str], params: Dict[str, Any]):
+        self.key = key
+        self.tenant = tenant
+        self.user_tz = user_tz
+        self.params = params
+        self.last_read = time.monotonic()
+        self.retry_at = 0.0  # background rebuilds back off after a failure
+        # Replaced as a whole, so readers never see a half-finished rebuild
+        self.current: Optional[_Build] = None
+        self._build_lock = threading.Lock()
+
+    def build(self, replaces: Optional[_Build] = None) -> "_View":
+        """
+        Recomputes the slots, unless the build `replaces` was already replaced by a
+        concurrent caller (so concurrent rebuilds coalesce into one). Must run under
+        the view's tenant.
+        """
+        with self._build_lock:
+            if self.current is not replaces:
+                return self
+            revision = CalendarService.revision()
+            compiled = PreferencesService.get_compiled()
+            tz = CalendarService.resolve_timezone(self.user_tz)
+            first_day = datetime.now(tz).date()
+            slots = CalendarService.get_available_slots(self.user_tz, **self.params)
+            starts = [datetime.fromisoformat(s["start"]).timestamp() for s in slots]
+            try:
+                busy = CalendarService.get_busy_index(self.user_tz)
+            except Exception as e:
+                logger.warning("Busy ranges unavailable for ranking: %s", e)
+                busy = None
+            self.current = _Build(slots, starts, tz, first_day, revision, compiled, time.monotonic(), busy)
+        return self
+
+    def age(self) -> float:
+        return time.monotonic() - self.current.built_at if self.current else float("inf")
+
+    def is_current(self) -> bool:
+        """True if nothing the slots depend on changed since the build; must run under the view's tenant."""
+        build = self.current
+        return (
+            build is not None
+            and build.revision == CalendarService.revision()
+            and build.compiled is PreferencesService.get_compiled()
+            and build.first_day == datetime.now(build.tz).date()
+            and self.age() < 2 * settings.MATERIALIZER_REFRESH_SECONDS
+        )
+
+    def read(self) -> List[Dict[str, str]]:
+        self.last_read = time.monotonic()
+        build = self.current
+        slots = build.slots[bisect_right(build.starts, time.time()):]
+        held = ReservationLedger.busy_index()
+        if held:
+            slots = [s for s in slots if not held.overlaps(datetime.fromisoformat(s["start"]), datetime.fromisoformat(s["end"]))]
+        return slots
+
+
+class AvailabilityMaterializer:
+    """
+    Keeps the slot lists that clients actually request precomputed in memory.
+
+    The first request for a (tenant, timezone, slot query) computes it and
+    registers it as a view. From then on a background task started in the app
+    lifespan rebuilds the view every MATERIALIZER_REFRESH_SECONDS, and within
+    MATERIALIZER_POLL_SECONDS of a booking or preference change, so requests
+    are answered from memory. Views not read for MATERIALIZER_IDLE_SECONDS are
+    dropped, and at most MATERIALIZER_MAX_VIEWS are kept (LRU).
+
+    Reads are answered from the view's last build, even when a booking,
+    preference change or new day has made it out of date: the background task
+    replaces it within MATERIALIZER_POLL_SECONDS, held reservations are filtered
+    out on every read, and bookings are validated against Google anyway. Only
+    the first read of a view computes on the request path, once for all
+    concurrent readers. The busy intervals used for ranking are kept with the
+    view as well.
+    """
+
+    _views = TTLCache(maxsize=settings.MATERIALIZER_MAX_VIEWS)
+    _task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def running() -> bool:
+        return AvailabilityMaterializer._task is not None and not AvailabilityMaterializer._task.done()
+
+    @staticmethod
+    def _view(user_tz_str: Optional[str], params: Dict[str, Any]) -> _View:
+        """The current tenant's view for this query, built on first use."""
+        tenant = get_current_tenant()
+        key = (tenant.id, user_tz_str or "", tuple(sorted(params.items())))
+        view = AvailabilityMaterializer._views.get_or_load(key, lambda: _View(key, tenant, user_tz_str, params))
+        if view.current is None:
+            view.build()
+        return view
+
+    @staticmethod
+    def get_available_slots(user_tz_str: str = None, **params) -> List[Dict[str, str]]:
+        """CalendarService.get_available_slots, served from the materialized view."""
+        if not AvailabilityMaterializer.running():
+            return CalendarService.get_available_slots(user_tz_str, **params)
+        return AvailabilityMaterializer._view(user_tz_str, params).read()
+
+    @staticmethod
+    def get_busy_index(user_tz_str: str = None, **params) -> Optional[BusyIndex]:
+        """CalendarService.get_busy_index, kept with the view of the same slot query."""
+        if not AvailabilityMaterializer.running():
+            return CalendarService.get_busy_index(user_tz_str)
+        view = AvailabilityMaterializer._view(user_tz_str, params)
+        view.last_read = time.monotonic()
+        return view.current.busy
+
+    @staticmethod
+    def _maintain(view: _View) -> None:
+        # Refreshes yield to user requests when Google calls are being rationed
+        with use_tenant(view.tenant), admission_priority(PRIORITY_BACKGROUND):
+            if time.monotonic() - view.last_read > settings.MATERIALIZER_IDLE_SECONDS:
+                AvailabilityMaterializer._views.invalidate(lambda k: k == view.key)
+                return
+            if time.monotonic() < view.retry_at:
+                return
+            build = view.current
+            if not view.is_current() or view.age() >= settings.MATERIALIZER_REFRESH_SECONDS:
+                view.build(replaces=build)
+
+    @staticmethod
+    async def _run() -> None:
+        while True:
+            await asyncio.sleep(settings.MATERIALIZER_POLL_SECONDS)
+            for view in AvailabilityMaterializer._views.values():
+                try:
+                    await run_blocking(GOOGLE, AvailabilityMaterializer._maintain, view)
+                except Overloaded as e:
+                    view.retry_at = time.monotonic() + e.retry_after
+                except Exception as e:
+                    view.retry_at = time.monotonic() + settings.MATERIALIZER_REFRESH_SECONDS
+                    logger.warning("Refreshing availability for tenant %s failed: %s", view.tenant.id, e)
+
+    @staticmethod
+    def start() -> None:
+        if settings.MATERIALIZER_ENABLED and not AvailabilityMaterializer.running():
+            AvailabilityMaterializer._task = asyncio.create_task(AvailabilityMaterializer._run())
+
+    @staticmethod
+    async def stop() -> None:
+        task, AvailabilityMaterializer._task = AvailabilityMaterializer._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        AvailabilityMaterializer._views.clear()
@@ -0,0 +1,63 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Tuple
+
+
+class BusyIndex:
+    """
+    Sorted, merged view of busy intervals.
+
+    Overlapping and touching ranges are coalesced when the index is built, so
+    both the start and end sequences are monotonic and an overlap query is a
+    single bisect over the end times.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[datetime, datetime]] = ()):
+        merged: List[Tuple[datetime, datetime]] = []
+        for start, end in sorted(ranges, key=lambda r: r[0].timestamp()):
+            if end <= start:
+                continue
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+
+        self._ranges = merged
+        self._starts = [s.timestamp() for s, _ in merged]
+        self._ends = [e.timestamp() for _, e in merged]
+
+    def __iter__(self) -> Iterator[Tuple[datetime, datetime]]:
+        return iter(self._ranges)
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def __bool__(self) -> bool:
+        return bool(self._ranges)
+
+    def bounds(self) -> Tuple[List[float], List[float]]:
+        """Start and end timestamps of the merged intervals, both ascending."""
+        return self._starts, self._ends
+
+    @staticmethod
+    def _ts(dt: datetime) -> float:
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """True if [start, end) intersects any busy interval."""
+        start_ts = self._ts(start)
+        # First interval that ends strictly after our start is the only candidate
+        i = bisect_right(self._ends, start_ts)
+        return i < len(self._ends) and self._starts[i] < self._ts(end)
+
+    def touches(self, start: datetime, end: datetime, gap_seconds: float = 0) -> bool:
+        """True if a busy interval ends within `gap_seconds` before start or begins within `gap_seconds` after end."""
+        start_ts, end_ts = self._ts(start), self._ts(end)
+        i = bisect_left(self._ends, start_ts - gap_seconds)
+        if i < len(self._ends) and self._ends[i] <= start_ts:
+            return True
+        j = bisect_left(self._starts, end_ts)
+        return j < len(self._starts) and self._starts[j] <= end_ts + gap_seconds
@@ -1,27 +1,89 @@
+import logging
 import uuid
 import re
-from datetime import datetime, timedelta, time, timezone
+from datetime import date, datetime, timedelta, time, timezone
+from itertools import count, islice
 from zoneinfo import ZoneInfo
-from typing import List, Dict, Optional, Any, Tuple
+from typing import Iterator, List, Dict, Optional, Any, Tuple, Union
 
-from googleapiclient.discovery import build
+from app.core.admission import GOOGLE, Overloaded, upstream_call
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import span
+from app.core.tenants import get_current_tenant
+from app.services.busy_index import BusyIndex
+from app.services.event_mirror import EventMirror, blocks_time
 from app.services.google_auth import GoogleAuthService
-from app.services.preferences import PreferencesService
+from app.services.google_client import CalendarClient
+from app.services.reservations import ReservationLedger, SlotConflictError
+from app.services.slot_mask import SlotMask
+from app.services.preferences import CompiledPreferences, PreferencesService, _parse_minutes
+
+logger = logging.getLogger(__name__)
+
+def _window_key(time_min: Optional[str], time_max: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """Normalizes an RFC3339 window so equivalent spellings share a cache entry."""
+    def to_ts(value):
+        if not value:
+            return None
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    return to_ts(time_min), to_ts(time_max)
+
+
+def _subtract_block(ranges: List[Tuple[int, int]], b_start: int, b_end: int) -> List[Tuple[int, int]]:
+    """Subtract a block [b_start, b_end) from a list of minute ranges."""
+    new_ranges = []
+    for r_start, r_end in ranges:
+        if b_end <= r_start or b_start >= r_end:
+            new_ranges.append((r_start, r_end))
+        else:
+            if r_start < b_start:
+                new_ranges.append((r_start, b_start))
+            if b_end < r_end:
+                new_ranges.append((b_end, r_end))
+    return new_ranges
+
 
 class CalendarService:
+    # Upstream event lists keyed by (tenant_id, "events", window_start_ts, window_end_ts, max_results)
+    _events_cache = TTLCache(maxsize=settings.EVENTS_CACHE_MAX_ENTRIES, ttl=settings.EVENTS_CACHE_TTL_SECONDS)
+    # Calendar timezone per tenant
+    _calendar_tz_cache = TTLCache(maxsize=settings.TENANT_POOL_MAX_ENTRIES, ttl=3600)
+    # Per tenant, replaced whenever a local change (a booking) invalidates cached calendar data.
+    # An evicted tenant gets a fresh revision on its next read, so nothing built before counts as current.
+    _revisions = TTLCache(maxsize=settings.TENANT_POOL_MAX_ENTRIES)
+    _revision_counter = count(1)
+
     @staticmethod
     def get_service():
         creds = GoogleAuthService.load_credentials()
         if not creds:
             raise Exception("Unauthorized: No valid credentials found.")
-        return build('calendar', 'v3', credentials=creds)
+        return CalendarClient.get(creds)
 
     @staticmethod
-    def get_events(time_min: str = None, time_max: str = None, max_results: int = 10):
+    def _list_all(service, **kwargs) -> List[Dict[str, Any]]:
+        """Runs events().list following nextPageToken until the window is exhausted."""
+        items = []
+        while True:
+            result = service.events().list(**kwargs).execute()
+            items.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return items
+            kwargs['pageToken'] = page_token
+
+    @staticmethod
+    def _fetch_events(time_min: str = None, time_max: str = None, max_results: int = 10):
+        if EventMirror.enabled():
+            EventMirror.ensure_synced(CalendarService.get_service)
+            start_ts, end_ts = _window_key(time_min, time_max)
+            return EventMirror.events_between(start_ts, end_ts, None if (time_min or time_max) else max_results)
+
         service = CalendarService.get_service()
         
         kwargs = {
-            'calendarId': 'primary',
+            'calendarId': get_current_tenant().calendar_id,
             'singleEvents': True,
             'orderBy': 'startTime'
         }
@@ -29,207 +91,325 @@ class CalendarService:
             kwargs['timeMin'] = time_min
         if time_max:
             kwargs['timeMax'] = time_max
-        if not time_min and not time_max:
-            kwargs['maxResults'] = max_results
+        with span("google.events_list"):
+            if not time_min and not time_max:
+                kwargs['maxResults'] = max_results
+                events_result = service.events().list(**kwargs).execute()
+                return events_result.get('items', [])
+
+            return CalendarService._list_all(service, **kwargs)
+
+    @staticmethod
+    def _fetch_busy(time_min: str, time_max: str) -> List[Dict[str, Any]]:
+        """
+        Busy intervals for the tenant's calendar. Uses the freebusy endpoint (which
+        already ignores transparent and declined events) and falls back to a
+        paginated, field-projected events().list if freebusy fails. With the event
+        mirror enabled, the intervals come from the local copy instead.
+        """
+        if EventMirror.enabled():
+            EventMirror.ensure_synced(CalendarService.get_service)
+            return EventMirror.busy_between(*_window_key(time_min, time_max))
+
+        service = CalendarService.get_service()
+        calendar_id = get_current_tenant().calendar_id
+        try:
+            with span("google.freebusy"):
+                result = service.freebusy().query(body={
+                    'timeMin': time_min,
+                    'timeMax': time_max,
+                    'items': [{'id': calendar_id}]
+                }).execute()
+            calendar = result.get('calendars', {}).get(calendar_id, {})
+            if calendar.get('errors'):
+                raise Exception(f"freebusy errors: {calendar['errors']}")
+            return calendar.get('busy', [])
+        except Overloaded:
+            # Shed locally; falling back would only spend more of the quota
+            raise
+        except Exception as e:
+            logger.warning("freebusy query failed, falling back to events().list: %s", e)
+
+        with span("google.events_list"):
+            events = CalendarService._list_all(
+                service,
+                calendarId=calendar_id,
+                singleEvents=True,
+                timeMin=time_min,
+                timeMax=time_max,
+                maxResults=2500,
+                fields='nextPageToken,items(start,end,status,transparency,attendees(self,responseStatus))'
+            )
+        return [e for e in events if blocks_time(e)]
+
+    @staticmethod
+    def _cached_covering(kind: str, start: datetime, end: datetime, max_age: Optional[float] = None):
+        """Returns (found, value) from any cached `kind` window that fully contains [start, end), fetched at most `max_age` seconds ago."""
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        tenant_id = get_current_tenant().id
+
+        def covers(key):
+            return (key[0] == tenant_id and key[1] == kind and key[2] is not None and key[3] is not None
+                    and key[2] <= start_ts and end_ts <= key[3])
+
+        return CalendarService._events_cache.find(covers, max_age=max_age)
+
+    @staticmethod
+    def get_events(time_min: str = None, time_max: str = None, max_results: int = 10):
+        """
+        Lists events in a window. Results are cached for EVENTS_CACHE_TTL_SECONDS and
+        concurrent requests for the same window share a single upstream call.
+        """
+        windowed = bool(time_min or time_max)
+        key = (get_current_tenant().id, "events") + _window_key(time_min, time_max) + (None if windowed else max_results,)
+        return CalendarService._events_cache.get_or_load(
+            key, lambda: CalendarService._fetch_events(time_min, time_max, max_results)
+        )
+
+    @staticmethod
+    def get_busy_times(time_min: str, time_max: str) -> List[Dict[str, Any]]:
+        """Busy intervals in a window, cached and coalesced like get_events. Feed to get_busy_ranges."""
+        key = (get_current_tenant().id, "busy") + _window_key(time_min, time_max)
+        return CalendarService._events_cache.get_or_load(
+            key, lambda: CalendarService._fetch_busy(time_min, time_max)
+        )
+
+    @staticmethod
+    def get_busy_times_covering(start: datetime, end: datetime, max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Busy intervals overlapping [start, end), served from any cached window that
+        fully contains it (and is at most `max_age` seconds old); falls back to
+        fetching exactly that window.
+        """
+        found, busy = CalendarService._cached_covering("busy", start, end, max_age)
+        if found:
+            return busy
+        return CalendarService.get_busy_times(start.isoformat(), end.isoformat())
+
+    @staticmethod
+    def invalidate_events(start: Optional[datetime] = None, end: Optional[datetime] = None) -> None:
+        """Drops the current tenant's cached windows overlapping [start, end) (e.g. after a booking); all of them by default."""
+        start_ts = start.timestamp() if start else float('-inf')
+        end_ts = end.timestamp() if end else float('inf')
+        tenant_id = get_current_tenant().id
+
+        def overlaps(key):
+            window_start = key[2] if key[2] is not None else float('-inf')
+            window_end = key[3] if key[3] is not None else float('inf')
+            return key[0] == tenant_id and window_start < end_ts and start_ts < window_end
 
-        events_result = service.events().list(**kwargs).execute()
-        return events_result.get('items', [])
+        CalendarService._events_cache.invalidate(overlaps)
+        CalendarService._revisions.set(tenant_id, next(CalendarService._revision_counter))
 
     @staticmethod
-    def is_slot_blocked(dt_start: datetime, dt_end: datetime, prefs: Dict[str, Any]) -> bool:
+    def sync_mirror() -> None:
+        """Pulls the current tenant's calendar changes into the event mirror right away (e.g. on a push notification)."""
+        EventMirror.mark_stale()
+        EventMirror.ensure_synced(CalendarService.get_service)
+        CalendarService.invalidate_events()
+
+    @staticmethod
+    def revision() -> int:
+        """Changes whenever the current tenant's calendar was modified through this process."""
+        return CalendarService._revisions.get_or_load(get_current_tenant().id, lambda: next(CalendarService._revision_counter))
+
+    @staticmethod
+    def is_slot_blocked(dt_start: datetime, dt_end: datetime, prefs: Union[Dict[str, Any], CompiledPreferences]) -> bool:
         """Checks if a slot overlaps with any blocked rules in preferences."""
-        # Ensure dt_start/dt_end have timezone info for comparison
-        if dt_start.tzinfo is None:
-            dt_start = dt_start.replace(tzinfo=timezone.utc)
-        
-        # We need to check the day of the week in the user's local time or the rule's intended time.
-        # The original code used the slot's timezone.
-        
-        for rule in prefs.get('no_meetings', []):
-            if dt_start.strftime('%A') in rule['days']:
-                rule_start_time = datetime.strptime(rule['start'], '%H:%M').time()
-                rule_end_time = datetime.strptime(rule['end'], '%H:%M').time()
-
-                if rule_end_time <= rule_start_time:
-                    # Overnight rule (e.g. 22:00-07:00): split into two blocks
-                    # Block 1: rule_start to midnight (same day)
-                    b1_start = datetime.combine(dt_start.date(), rule_start_time).replace(tzinfo=dt_start.tzinfo)
-                    b1_end = datetime.combine(dt_start.date() + timedelta(days=1), time(0, 0)).replace(tzinfo=dt_start.tzinfo)
-                    # Block 2: midnight to rule_end (same day)
-                    b2_start = datetime.combine(dt_start.date(), time(0, 0)).replace(tzinfo=dt_start.tzinfo)
-                    b2_end = datetime.combine(dt_start.date(), rule_end_time).replace(tzinfo=dt_start.tzinfo)
-
-                    if (dt_start < b1_end and dt_end > b1_start) or (dt_start < b2_end and dt_end > b2_start):
-                        return True
-                else:
-                    block_start = datetime.combine(dt_start.date(), rule_start_time).replace(tzinfo=dt_start.tzinfo)
-                    block_end = datetime.combine(dt_start.date(), rule_end_time).replace(tzinfo=dt_start.tzinfo)
-
-                    if dt_start < block_end and dt_end > block_start:
-                        return True
-        return False
+        # Rules are evaluated against the slot's own day of week and wall-clock time.
+        # Callers on the hot path pass the cached CompiledPreferences; raw dicts are compiled on the fly.
+        if not isinstance(prefs, CompiledPreferences):
+            prefs = CompiledPreferences(prefs)
+        return prefs.is_blocked(dt_start, dt_end)
 
     @staticmethod
-    def get_busy_ranges(events: List[Dict], tz: timezone) -> List[Tuple[datetime, datetime]]:
+    def get_busy_ranges(events: List[Dict], tz: timezone) -> BusyIndex:
+        """
+        Builds a sorted, merged busy-interval index. Accepts full event resources
+        ({'start': {'dateTime'|'date': ...}}) as well as freebusy intervals ({'start': '...'}).
+        """
         busy = []
         for event in events:
-            start = event['start'].get('dateTime') or event['start'].get('date')
-            end = event['end'].get('dateTime') or event['end'].get('date')
+            start, end = event['start'], event['end']
+            if isinstance(start, dict):
+                start = start.get('dateTime') or start.get('date')
+            if isinstance(end, dict):
+                end = end.get('dateTime') or end.get('date')
             try:
                 b_start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
             except Exception:
-                b_start_dt = datetime.strptime(start, '%Y-%m-%d').replace(tzinfo=tz)
+                b_start_dt = datetime.strptime(start, '%Y-%m-%d')
             try:
                 b_end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
             except Exception:
-                b_end_dt = datetime.strptime(end, '%Y-%m-%d').replace(tzinfo=tz)
+                b_end_dt = datetime.strptime(end, '%Y-%m-%d')
+            # All-day events come back as bare dates; anchor them in the calendar's timezone
+            if b_start_dt.tzinfo is None:
+                b_start_dt = b_start_dt.replace(tzinfo=tz)
+            if b_end_dt.tzinfo is None:
+                b_end_dt = b_end_dt.replace(tzinfo=tz)
             busy.append((b_start_dt, b_end_dt))
-        return busy
+        return BusyIndex(busy)
 
     @staticmethod
-    def get_available_slots(user_tz_str: str = None) -> List[Dict[str, str]]:
-        """
-        Generates available 1-hour slots for the next 7 days.
-        """
-        service = CalendarService.get_service()
-        
-        # Determine timezone
+    def resolve_timezone(user_tz_str: str = None):
+        """The requested timezone, or the calendar's own timezone when none is given."""
         if not user_tz_str:
-            cal_info = service.calendarList().get(calendarId='primary').execute()
-            user_tz_str = cal_info.get('timeZone', 'UTC')
-        
+            tenant = get_current_tenant()
+            user_tz_str = CalendarService._calendar_tz_cache.get_or_load(tenant.id, lambda: (
+                CalendarService.get_service().calendarList().get(calendarId=tenant.calendar_id).execute().get('timeZone', 'UTC')
+            ))
         try:
-            tz = ZoneInfo(user_tz_str)
+            return ZoneInfo(user_tz_str)
         except Exception:
-            tz = timezone.utc
+            return timezone.utc
 
+    @staticmethod
+    def _default_window(tz) -> Tuple[datetime, datetime]:
         now = datetime.now(tz)
-        end_time = now + timedelta(days=7)
-        
-        # Fetch events
-        events = CalendarService.get_events(
-            time_min=now.isoformat(),
-            time_max=end_time.isoformat()
-        )
-        
-        busy = CalendarService.get_busy_ranges(events, tz)
-        prefs = PreferencesService.get_preferences()
-        
-        # Build allowed time ranges per day (default 7am-10pm)
-        allowed_ranges = {}
-        for i in range(7):
-            day = (now + timedelta(days=i)).date()
-            allowed_ranges[day] = [(time(7,0), time(22,0))]
-
-        # Apply hard blocks from preferences to allowed_ranges
-        def subtract_block(ranges, b_start, b_end):
-            """Subtract a block [b_start, b_end) from a list of time ranges."""
-            new_ranges = []
-            for r_start, r_end in ranges:
-                if b_end <= r_start or b_start >= r_end:
-                    new_ranges.append((r_start, r_end))
-                else:
-                    if r_start < b_start:
-                        new_ranges.append((r_start, b_start))
-                    if b_end < r_end:
-                        new_ranges.append((b_end, r_end))
-            return new_ranges
-
-        for rule in prefs.get('no_meetings', []):
-            rule_start = datetime.strptime(rule['start'], '%H:%M').time()
-            rule_end = datetime.strptime(rule['end'], '%H:%M').time()
-
-            for i in range(7):
-                day = (now + timedelta(days=i))
-                day_name = day.strftime('%A')
-                if day_name in rule['days']:
-                    if rule_end <= rule_start:
-                        # Overnight rule: block from rule_start to midnight, and midnight to rule_end
-                        allowed_ranges[day.date()] = subtract_block(
-                            allowed_ranges[day.date()], rule_start, time(23, 59, 59))
-                        # Apply the morning portion to the next day if it exists
-                        next_day = (day + timedelta(days=1)).date()
-                        if next_day in allowed_ranges:
-                            allowed_ranges[next_day] = subtract_block(
-                                allowed_ranges[next_day], time(0, 0), rule_end)
-                    else:
-                        allowed_ranges[day.date()] = subtract_block(
-                            allowed_ranges[day.date()], rule_start, rule_end)
-
-        legal_slots = []
-        for i in range(7):
-            day = (now + timedelta(days=i)).date()
-            if day not in allowed_ranges: 
+        # Start at local midnight so the window (and its cache entry) is stable for the whole day
+        window_start = datetime.combine(now.date(), time(0, 0), tzinfo=tz)
+        window_end = datetime.combine(now.date() + timedelta(days=7), time(0, 0), tzinfo=tz)
+        return window_start, window_end
+
+    @staticmethod
+    def _busy_index(tz) -> BusyIndex:
+        window_start, window_end = CalendarService._default_window(tz)
+        busy_times = CalendarService.get_busy_times(window_start.isoformat(), window_end.isoformat())
+        return CalendarService.get_busy_ranges(busy_times, tz)
+
+    @staticmethod
+    def get_busy_index(user_tz_str: str = None) -> BusyIndex:
+        """Busy intervals for the default 7-day suggestion window (shares the cached fetch with get_available_slots)."""
+        return CalendarService._busy_index(CalendarService.resolve_timezone(user_tz_str))
+
+    @staticmethod
+    def _allowed_ranges(prefs: CompiledPreferences, day: date, day_start: int, day_end: int) -> List[Tuple[int, int]]:
+        """Minute-of-day ranges on `day` within the day bounds that no preference rule blocks."""
+        ranges = [(day_start, day_end)]
+        # Rules for this weekday, plus the morning portion of the previous day's overnight rules
+        blocks = prefs.blocks_for(day.weekday()) + prefs.carry_over_for((day - timedelta(days=1)).weekday())
+        for b_start, b_end in blocks:
+            ranges = _subtract_block(ranges, b_start, b_end)
+        return ranges
+
+    @staticmethod
+    def iter_available_slots(user_tz_str: str = None, duration_minutes: int = 60, step_minutes: int = None,
+                             horizon_days: int = 7, day_start: str = "07:00", day_end: str = "22:00",
+                             after: Optional[datetime] = None) -> Iterator[Dict[str, str]]:
+        """
+        Lazily yields free slots of `duration_minutes`, starting every `step_minutes`
+        (default: the duration) within [day_start, day_end) each day, for `horizon_days`
+        days from today. Only slots starting after `after` (and not in the past) are
+        yielded. Busy intervals are fetched in AVAILABILITY_FETCH_DAYS chunks as the
+        generator advances, so a short page never reads the whole horizon. With
+        AVAILABILITY_ENGINE=numpy each chunk's slots are computed at once by SlotMask.
+        """
+        tz = CalendarService.resolve_timezone(user_tz_str)
+        now = datetime.now(tz)
+        earliest = max(now, after) if after else now
+        step = step_minutes or duration_minutes
+        bounds = (_parse_minutes(day_start), _parse_minutes(day_end))
+        prefs = PreferencesService.get_compiled()
+        # Slots being booked or just booked here may not show up in freebusy yet
+        held = ReservationLedger.busy_index()
+
+        first_day = now.date()
+        last_day = first_day + timedelta(days=horizon_days)
+        masks = SlotMask.allowed_by_weekday(prefs, *bounds) if settings.AVAILABILITY_ENGINE == "numpy" else None
+        day = max(first_day, earliest.astimezone(tz).date())
+        while day < last_day:
+            chunk_end = min(day + timedelta(days=settings.AVAILABILITY_FETCH_DAYS), last_day)
+            busy_times = CalendarService.get_busy_times(
+                datetime.combine(day, time(0, 0), tzinfo=tz).isoformat(),
+                datetime.combine(chunk_end, time(0, 0), tzinfo=tz).isoformat()
+            )
+            if masks is not None:
+                busy = SlotMask.busy_minutes(busy_times, tz, held)
+                yield from SlotMask.find_slots(tz, day, chunk_end, masks, busy, duration_minutes, step, earliest)
+                day = chunk_end
                 continue
-                
-            for r_start, r_end in allowed_ranges[day]:
-                slot_start_dt = datetime.combine(day, r_start, tzinfo=tz)
-                
-                while slot_start_dt.time() < r_end:
-                    slot_end_dt = slot_start_dt + timedelta(hours=1)
-                    
-                    # Check if slot goes beyond range end
-                    if slot_end_dt.time() > r_end and slot_end_dt.date() == slot_start_dt.date():
-                         # If it stays on same day but exceeds time
-                         break
-                    if slot_end_dt.date() > slot_start_dt.date():
-                        # Handle overnight if necessary, but here we assume daily ranges
-                        break
-
-                    # Check overlap with busy events
-                    overlap = False
-                    for b_start_dt, b_end_dt in busy:
-                        if slot_start_dt < b_end_dt and slot_end_dt > b_start_dt:
-                            overlap = True
-                            break
-                    
-                    # Double check with is_slot_blocked (redundant but safe)
-                    if not overlap and not CalendarService.is_slot_blocked(slot_start_dt, slot_end_dt, prefs):
-                        legal_slots.append({
-                            "start": slot_start_dt.isoformat(),
-                            "end": slot_end_dt.isoformat()
-                        })
-                    
-                    slot_start_dt += timedelta(hours=1)
-                    
-        return legal_slots
+
+            busy = CalendarService.get_busy_ranges(busy_times, tz)
+
+            for offset in range((chunk_end - day).days):
+                slot_day = day + timedelta(days=offset)
+                for r_start, r_end in CalendarService._allowed_ranges(prefs, slot_day, *bounds):
+                    minute = r_start
+                    # Slots must end within the range (and therefore on the same day)
+                    while minute + duration_minutes <= r_end:
+                        slot_start_dt = datetime.combine(slot_day, time(minute // 60, minute % 60), tzinfo=tz)
+                        slot_end_dt = slot_start_dt + timedelta(minutes=duration_minutes)
+
+                        # Preference rules are already applied via the allowed ranges; only busy events remain
+                        if (slot_start_dt > earliest and not busy.overlaps(slot_start_dt, slot_end_dt)
+                                and not (held and held.overlaps(slot_start_dt, slot_end_dt))):
+                            yield {
+                                "start": slot_start_dt.isoformat(),
+                                "end": slot_end_dt.isoformat()
+                            }
+
+                        minute += step
+            day = chunk_end
+
+    @staticmethod
+    def get_available_slots(user_tz_str: str = None, **params) -> List[Dict[str, str]]:
+        """
+        Generates available slots (by default 1-hour slots between 07:00 and 22:00 for
+        the next 7 days). See iter_available_slots for the accepted parameters.
+        """
+        with span("slots.generate"):
+            return list(CalendarService.iter_available_slots(user_tz_str, **params))
 
     @staticmethod
-    def validate_slot(slot_start: datetime, slot_end: datetime, tz) -> None:
-        """Validates that a slot doesn't conflict with busy events or preference rules."""
+    def get_slot_page(user_tz_str: str = None, limit: int = 50, cursor: str = None, **params) -> Dict[str, Any]:
+        """
+        One page of available slots. `cursor` is the `next_cursor` of the previous page
+        (the start of its last slot in epoch seconds, so it is URL-safe as is);
+        `next_cursor` is None on the last page.
+        """
+        after = None
+        if cursor:
+            try:
+                after = datetime.fromtimestamp(int(cursor), timezone.utc)
+            except (ValueError, OverflowError, OSError):
+                raise ValueError("Invalid cursor.")
+        page = list(islice(CalendarService.iter_available_slots(user_tz_str, after=after, **params), limit + 1))
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            "slots": page,
+            "next_cursor": str(int(datetime.fromisoformat(page[-1]["start"]).timestamp())) if has_more else None
+        }
+
+    @staticmethod
+    def validate_slot(slot_start: datetime, slot_end: datetime, tz, busy: Optional[BusyIndex] = None) -> None:
+        """
+        Validates that a slot doesn't conflict with busy events or preference rules.
+        `busy` lets callers checking many slots share one busy-range fetch.
+        """
         now = datetime.now(tz)
         if slot_start < now:
             raise ValueError("Cannot book a slot in the past.")
 
         # Check preference rules
-        prefs = PreferencesService.get_preferences()
+        prefs = PreferencesService.get_compiled()
         if CalendarService.is_slot_blocked(slot_start, slot_end, prefs):
             raise ValueError("This time slot is not available.")
 
-        # Check busy events
-        events = CalendarService.get_events(
-            time_min=slot_start.isoformat(),
-            time_max=slot_end.isoformat()
-        )
-        busy = CalendarService.get_busy_ranges(events, tz)
-        for b_start, b_end in busy:
-            if slot_start < b_end and slot_end > b_start:
-                raise ValueError("This time slot conflicts with an existing event.")
+        # Check busy events against a recent snapshot; older snapshots trigger an upstream read
+        if busy is None:
+            busy_times = CalendarService.get_busy_times_covering(
+                slot_start, slot_end, max_age=settings.BOOKING_SNAPSHOT_MAX_AGE_SECONDS
+            )
+            busy = CalendarService.get_busy_ranges(busy_times, tz)
+        if busy.overlaps(slot_start, slot_end):
+            raise ValueError("This time slot conflicts with an existing event.")
 
     @staticmethod
-    def book_slot(slot_data: Dict[str, Any]):
-        service = CalendarService.get_service()
-
-        # Validate the slot before booking
-        start_dt = datetime.fromisoformat(slot_data['start'])
-        end_dt = datetime.fromisoformat(slot_data['end'])
-        tz = start_dt.tzinfo or timezone.utc
-        CalendarService.validate_slot(start_dt, end_dt, tz)
-
-        default_summary = 'Meeting with Birgit'
-
+    def _build_event(slot_data: Dict[str, Any], owner_name: str) -> Dict[str, Any]:
         event = {
-            'summary': slot_data.get('summary') or default_summary,
+            'summary': slot_data.get('summary') or f'Meeting with {owner_name}',
             'start': {'dateTime': slot_data['start']},
             'end': {'dateTime': slot_data['end']},
             'conferenceData': {
@@ -247,12 +427,126 @@ class CalendarService:
             if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
                  raise ValueError("Invalid email address provided.")
             event['attendees'] = [{'email': email}]
-            
-        created_event = service.events().insert(
-            calendarId='primary', 
-            body=event, 
-            sendUpdates='all',
-            conferenceDataVersion=1
-        ).execute()
-        
+        return event
+
+    @staticmethod
+    def book_slot(slot_data: Dict[str, Any]):
+        service = CalendarService.get_service()
+
+        start_dt = datetime.fromisoformat(slot_data['start'])
+        end_dt = datetime.fromisoformat(slot_data['end'])
+        tz = start_dt.tzinfo or timezone.utc
+
+        tenant = get_current_tenant()
+        event = CalendarService._build_event(slot_data, tenant.owner_name)
+
+        # Hold the slot first so a concurrent booking of it fails instead of also passing validation
+        hold = ReservationLedger.hold(start_dt, end_dt)
+        try:
+            with span("booking.validate"):
+                CalendarService.validate_slot(start_dt, end_dt, tz)
+
+            with span("google.events_insert"):
+                created_event = service.events().insert(
+                    calendarId=tenant.calendar_id,
+                    body=event,
+                    sendUpdates='all',
+                    conferenceDataVersion=1
+                ).execute()
+        except BaseException:
+            ReservationLedger.release(hold)
+            raise
+
+        ReservationLedger.confirm(hold)
+        if EventMirror.enabled():
+            EventMirror.upsert(created_event)
+        CalendarService.invalidate_events(start_dt, end_dt)
         return created_event
+
+    @staticmethod
+    def book_slots(slots_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Books several slots at once. All slots are validated against a single busy-range
+        fetch covering them, and the inserts go to Google as one batch HTTP request.
+        Returns one result per input, in order: {"status": "booked", "event": ...} or
+        {"status": "rejected" | "conflict" | "failed", "error": ...}.
+        """
+        service = CalendarService.get_service()
+        tenant = get_current_tenant()
+        results: List[Dict[str, Any]] = [{} for _ in slots_data]
+
+        # Parse and build every event first; malformed entries are rejected individually
+        parsed = []
+        for i, slot_data in enumerate(slots_data):
+            try:
+                start_dt = datetime.fromisoformat(slot_data['start'])
+                end_dt = datetime.fromisoformat(slot_data['end'])
+                if start_dt.tzinfo is None or end_dt.tzinfo is None:
+                    raise ValueError("Slot times must include a UTC offset.")
+                if end_dt <= start_dt:
+                    raise ValueError("Slot must end after it starts.")
+                event = CalendarService._build_event(slot_data, tenant.owner_name)
+            except (KeyError, ValueError) as e:
+                results[i] = {"status": "rejected", "error": str(e)}
+                continue
+            parsed.append((i, start_dt, end_dt, event))
+
+        # Hold every slot; overlaps within the batch or with other bookings become conflicts
+        held = []
+        for i, start_dt, end_dt, event in parsed:
+            try:
+                held.append((i, start_dt, end_dt, event, ReservationLedger.hold(start_dt, end_dt)))
+            except SlotConflictError as e:
+                results[i] = {"status": "conflict", "error": str(e)}
+        if not held:
+            return results
+
+        window_start = min(h[1] for h in held)
+        window_end = max(h[2] for h in held)
+        # Holds not yet settled, by batch request id
+        holds = {str(h[0]): h[4] for h in held}
+
+        def on_response(request_id, response, exception):
+            hold = holds.pop(request_id)
+            if exception is not None:
+                ReservationLedger.release(hold)
+                results[int(request_id)] = {"status": "failed", "error": str(exception)}
+            else:
+                ReservationLedger.confirm(hold)
+                if EventMirror.enabled():
+                    EventMirror.upsert(response)
+                results[int(request_id)] = {"status": "booked", "event": response}
+
+        batch = service.new_batch_http_request()
+        try:
+            with span("booking.validate"):
+                busy_times = CalendarService.get_busy_times_covering(
+                    window_start, window_end, max_age=settings.BOOKING_SNAPSHOT_MAX_AGE_SECONDS
+                )
+                tz = window_start.tzinfo or timezone.utc
+                busy = CalendarService.get_busy_ranges(busy_times, tz)
+                for i, start_dt, end_dt, event, _ in held:
+                    try:
+                        CalendarService.validate_slot(start_dt, end_dt, start_dt.tzinfo or timezone.utc, busy)
+                    except ValueError as e:
+                        ReservationLedger.release(holds.pop(str(i)))
+                        results[i] = {"status": "rejected", "error": str(e)}
+                        continue
+                    batch.add(service.events().insert(
+                        calendarId=tenant.calendar_id,
+                        body=event,
+                        sendUpdates='all',
+                        conferenceDataVersion=1
+                    ), callback=on_response, request_id=str(i))
+
+            if holds:
+                # One HTTP request, but each part counts against the Calendar quota
+                with span("google.events_batch_insert"), upstream_call(GOOGLE, tokens=len(holds)):
+                    batch.execute()
+        finally:
+            # Anything not settled (e.g. the busy fetch or the batch request itself failed) is released
+            for hold in holds.values():
+                ReservationLedger.release(hold)
+
+        CalendarService.invalidate_events(window_start, window_end)
+        return results
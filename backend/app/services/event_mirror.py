@@ -0,0 +1,207 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import span
+from app.core.tenants import Tenant, get_current_tenant
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    blocks INTEGER NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_range ON events (start_ts, end_ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def blocks_time(event: Dict[str, Any]) -> bool:
+    """False for events that leave the owner free: cancelled, transparent ("free") or declined by the owner."""
+    if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+        return False
+    for attendee in event.get('attendees', []):
+        if attendee.get('self') and attendee.get('responseStatus') == 'declined':
+            return False
+    return True
+
+
+def _event_range(event: Dict[str, Any], tz) -> Tuple[float, float]:
+    bounds = []
+    for field in ('start', 'end'):
+        value = event[field]
+        if value.get('dateTime'):
+            dt = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        else:
+            # All-day events are bare dates in the calendar's timezone
+            dt = datetime.fromisoformat(value['date']).replace(tzinfo=tz)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=tz)
+        bounds.append(dt.timestamp())
+    return bounds[0], bounds[1]
+
+
+class EventMirror:
+    """
+    Local SQLite copy of each tenant's calendar (EVENT_MIRROR_FILE, next to its
+    tokens), kept current with Calendar incremental sync.
+
+    The first sync lists the whole calendar and stores Google's nextSyncToken;
+    later syncs fetch only what changed since. A 410 Gone (token expired)
+    triggers a full resync. Syncs run at most every EVENT_MIRROR_SYNC_SECONDS
+    (or right away after a push notification), so range queries are normally
+    answered from disk. The file, including the sync token, survives restarts.
+    """
+
+    # tenant_id -> True while the last sync is recent enough
+    _synced = TTLCache(maxsize=settings.TENANT_POOL_MAX_ENTRIES)
+    # mirror path -> True once its schema exists; an evicted path just re-runs the (idempotent) schema
+    _initialized = TTLCache(maxsize=settings.TENANT_POOL_MAX_ENTRIES)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.EVENT_MIRROR_ENABLED
+
+    @staticmethod
+    def _connect(tenant: Tenant) -> sqlite3.Connection:
+        path = tenant.mirror_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30)
+        if not EventMirror._initialized.get(str(path)):
+            with EventMirror._lock:
+                # WAL lets readers keep querying while a sync writes
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                EventMirror._initialized.set(str(path), True)
+        return conn
+
+    @staticmethod
+    def _get_meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value: Optional[str]) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, items: List[Dict[str, Any]], tz) -> None:
+        for event in items:
+            if event.get('status') == 'cancelled':
+                conn.execute("DELETE FROM events WHERE id = ?", (event['id'],))
+                continue
+            start_ts, end_ts = _event_range(event, tz)
+            conn.execute(
+                "INSERT OR REPLACE INTO events (id, start_ts, end_ts, blocks, body) VALUES (?, ?, ?, ?, ?)",
+                (event['id'], start_ts, end_ts, int(blocks_time(event)), json.dumps(event))
+            )
+
+    @staticmethod
+    def sync(service) -> None:
+        """Brings the current tenant's mirror up to date (incremental when a sync token is stored)."""
+        tenant = get_current_tenant()
+        with closing(EventMirror._connect(tenant)) as conn:
+            token = EventMirror._get_meta(conn, "sync_token")
+            if EventMirror._get_meta(conn, "calendar_id") != tenant.calendar_id:
+                token = None
+
+            kwargs = {'calendarId': tenant.calendar_id, 'singleEvents': True, 'maxResults': 2500}
+            if token:
+                kwargs['syncToken'] = token
+            items: List[Dict[str, Any]] = []
+            try:
+                with span("google.events_sync"):
+                    while True:
+                        result = service.events().list(**kwargs).execute()
+                        items.extend(result.get('items', []))
+                        if not result.get('nextPageToken'):
+                            break
+                        kwargs['pageToken'] = result['nextPageToken']
+            except HttpError as e:
+                if token and e.resp.status == 410:
+                    logger.info("Sync token for tenant %s expired, running a full sync", tenant.id)
+                    with conn:
+                        EventMirror._set_meta(conn, "sync_token", None)
+                    return EventMirror.sync(service)
+                raise
+
+            time_zone = result.get('timeZone') or EventMirror._get_meta(conn, "time_zone") or "UTC"
+            with conn:
+                if not token:
+                    conn.execute("DELETE FROM events")
+                EventMirror._apply(conn, items, ZoneInfo(time_zone))
+                EventMirror._set_meta(conn, "sync_token", result.get('nextSyncToken'))
+                EventMirror._set_meta(conn, "calendar_id", tenant.calendar_id)
+                EventMirror._set_meta(conn, "time_zone", time_zone)
+
+    @staticmethod
+    def ensure_synced(get_service: Callable[[], Any]) -> None:
+        """Syncs unless the current tenant's mirror was synced within EVENT_MIRROR_SYNC_SECONDS."""
+        def load():
+            EventMirror.sync(get_service())
+            return True
+
+        EventMirror._synced.get_or_load(get_current_tenant().id, load, ttl=settings.EVENT_MIRROR_SYNC_SECONDS)
+
+    @staticmethod
+    def mark_stale() -> None:
+        """Forces the next ensure_synced for the current tenant to sync (e.g. after a push notification)."""
+        tenant_id = get_current_tenant().id
+        EventMirror._synced.invalidate(lambda k: k == tenant_id)
+
+    @staticmethod
+    def upsert(event: Dict[str, Any]) -> None:
+        """Stores an event this process just created, ahead of the next sync."""
+        tenant = get_current_tenant()
+        with closing(EventMirror._connect(tenant)) as conn, conn:
+            tz = ZoneInfo(EventMirror._get_meta(conn, "time_zone") or "UTC")
+            EventMirror._apply(conn, [event], tz)
+
+    @staticmethod
+    def _bounds(start_ts: Optional[float], end_ts: Optional[float]) -> Tuple[float, float]:
+        return (float('-inf') if start_ts is None else start_ts, float('inf') if end_ts is None else end_ts)
+
+    @staticmethod
+    def events_between(start_ts: Optional[float], end_ts: Optional[float], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Event resources overlapping [start_ts, end_ts), ordered by start (None means unbounded)."""
+        start_ts, end_ts = EventMirror._bounds(start_ts, end_ts)
+        with closing(EventMirror._connect(get_current_tenant())) as conn:
+            rows = conn.execute(
+                "SELECT body FROM events WHERE start_ts < ? AND end_ts > ? ORDER BY start_ts LIMIT ?",
+                (end_ts, start_ts, -1 if limit is None else limit)
+            ).fetchall()
+        return [json.loads(body) for body, in rows]
+
+    @staticmethod
+    def busy_between(start_ts: Optional[float], end_ts: Optional[float]) -> List[Dict[str, str]]:
+        """Freebusy-shaped intervals of the events that block time in [start_ts, end_ts)."""
+        start_ts, end_ts = EventMirror._bounds(start_ts, end_ts)
+        with closing(EventMirror._connect(get_current_tenant())) as conn:
+            rows = conn.execute(
+                "SELECT start_ts, end_ts FROM events WHERE blocks = 1 AND start_ts < ? AND end_ts > ? ORDER BY start_ts",
+                (end_ts, start_ts)
+            ).fetchall()
+        return [
+            {
+                'start': datetime.fromtimestamp(s, timezone.utc).isoformat(),
+                'end': datetime.fromtimestamp(e, timezone.utc).isoformat()
+            }
+            for s, e in rows
+        ]
@@ -1,9 +1,16 @@
 import json
 import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request as GoogleRequest
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.files import atomic_write_json
+from app.core.metrics import TOKEN_REFRESHES, span
+from app.core.tenants import Tenant, get_current_tenant, use_tenant
 
 logger = logging.getLogger(__name__)
 
@@ -52,9 +59,11 @@ class GoogleAuthService:
     @staticmethod
     def get_authorization_url():
         flow = GoogleAuthService.get_flow()
+        # The tenant id round-trips through `state` so the callback stores the tokens for the right owner
         authorization_url, state = flow.authorization_url(
             access_type='offline', 
-            include_granted_scopes='true'
+            include_granted_scopes='true',
+            state=get_current_tenant().id
         )
         return authorization_url
 
@@ -73,35 +82,82 @@ class GoogleAuthService:
             "token_uri": credentials.token_uri,
             "client_id": credentials.client_id,
             "client_secret": credentials.client_secret,
-            "scopes": credentials.scopes
+            "scopes": credentials.scopes,
+            "expiry": credentials.expiry.isoformat() if credentials.expiry else None
         }
         
-        token_path = settings.get_file_path(settings.TOKEN_FILE)
-        with open(token_path, "w") as f:
-            json.dump(token_data, f)
+        token_path = get_current_tenant().token_path
+        atomic_write_json(token_path, token_data)
+        CredentialManager.set(credentials)
         return token_data
 
     @staticmethod
     def load_credentials():
-        """Loads credentials from storage (Env or File) and refreshes if needed."""
-        token_data = None
-        
-        # 1. Try Env Var (Production/Heroku)
-        if settings.GOOGLE_TOKEN_JSON:
+        """Returns the current tenant's credentials, loading them from storage (Env or File) on first use."""
+        with span("google.credentials"):
+            return CredentialManager.get()
+
+
+class _TenantCredentials:
+    """Credentials of one tenant plus the fingerprint of the source they were read from."""
+
+    def __init__(self, tenant: Tenant):
+        self.tenant = tenant
+        self.credentials: Optional[Credentials] = None
+        self.source: Any = None
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+
+
+class CredentialManager:
+    """
+    Per-tenant holders for the owners' OAuth credentials, kept in a bounded LRU
+    pool (TENANT_POOL_MAX_ENTRIES); an evicted tenant is simply re-read on its
+    next request.
+
+    Credentials are parsed once and re-read only when their source (the
+    GOOGLE_TOKEN_JSON env var for the default tenant, otherwise the tenant's
+    tokens.json) changes. One daemon thread refreshes every pooled access token
+    GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS before it expires, so requests normally
+    never wait on OAuth. Concurrent refreshes collapse into one.
+    """
+
+    _pool = TTLCache(maxsize=settings.TENANT_POOL_MAX_ENTRIES)
+    _lock = threading.Lock()
+    _refresher: Optional[threading.Thread] = None
+    _wakeup = threading.Event()
+
+    @staticmethod
+    def _holder() -> _TenantCredentials:
+        tenant = get_current_tenant()
+        return CredentialManager._pool.get_or_load(tenant.id, lambda: _TenantCredentials(tenant))
+
+    @staticmethod
+    def _source_fingerprint(tenant: Tenant):
+        if tenant.is_default and settings.GOOGLE_TOKEN_JSON:
+            return ("env", settings.GOOGLE_TOKEN_JSON)
+        token_path = tenant.token_path
+        try:
+            stat = token_path.stat()
+        except FileNotFoundError:
+            return None
+        return ("file", str(token_path), stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _read_token_data(source) -> Optional[Dict[str, Any]]:
+        if source is None:
+            return None
+        if source[0] == "env":
             try:
-                token_data = json.loads(settings.GOOGLE_TOKEN_JSON)
+                return json.loads(source[1])
             except json.JSONDecodeError:
                 logger.error("Error decoding GOOGLE_TOKEN_JSON")
+                return None
+        with open(source[1], "r") as f:
+            return json.load(f)
 
-        # 2. Try File (Local Dev)
-        token_path = settings.get_file_path(settings.TOKEN_FILE)
-        if not token_data and token_path.exists():
-            with open(token_path, "r") as f:
-                token_data = json.load(f)
-        
-        if not token_data:
-            return None
-
+    @staticmethod
+    def _from_token_data(token_data: Dict[str, Any]) -> Credentials:
         creds = Credentials(
             token=token_data["token"],
             refresh_token=token_data.get("refresh_token"),
@@ -110,14 +166,126 @@ class GoogleAuthService:
             token_uri=token_data["token_uri"],
             scopes=SCOPES
         )
+        if token_data.get("expiry"):
+            # google-auth keeps expiry as naive UTC
+            expiry = datetime.fromisoformat(token_data["expiry"])
+            if expiry.tzinfo is not None:
+                expiry = expiry.astimezone(timezone.utc).replace(tzinfo=None)
+            creds.expiry = expiry
+        return creds
+
+    @staticmethod
+    def _install(holder: _TenantCredentials, credentials: Optional[Credentials], source) -> None:
+        """
+        Makes `credentials` the holder's current ones (holder.lock held). A new access
+        token for the same grant is copied into the held object instead of replacing it,
+        because pooled API clients (and the refresher) keep references to that object.
+        """
+        current = holder.credentials
+        if (credentials is not None and current is not None and credentials is not current
+                and (credentials.client_id, credentials.refresh_token) == (current.client_id, current.refresh_token)):
+            current.token = credentials.token
+            current.expiry = credentials.expiry
+        else:
+            holder.credentials = credentials
+        holder.source = source
 
-        if creds and creds.expired and creds.refresh_token:
+    @staticmethod
+    def get() -> Optional[Credentials]:
+        holder = CredentialManager._holder()
+        source = CredentialManager._source_fingerprint(holder.tenant)
+        creds = holder.credentials
+        if creds is None or source != holder.source:
+            with holder.lock:
+                if holder.credentials is None or source != holder.source:
+                    token_data = CredentialManager._read_token_data(source)
+                    credentials = CredentialManager._from_token_data(token_data) if token_data else None
+                    CredentialManager._install(holder, credentials, source)
+                creds = holder.credentials
+
+        if creds is None:
+            return None
+
+        if creds.expired and creds.refresh_token:
+            # Only reached when the background refresher fell behind (e.g. first load of a stale token)
+            if not CredentialManager.refresh(creds):
+                return None
+
+        CredentialManager._ensure_refresher()
+        return creds
+
+    @staticmethod
+    def set(credentials: Credentials) -> None:
+        """Installs freshly issued or refreshed credentials as the current tenant's holder."""
+        holder = CredentialManager._holder()
+        with holder.lock:
+            CredentialManager._install(holder, credentials, CredentialManager._source_fingerprint(holder.tenant))
+        CredentialManager._wakeup.set()
+
+    @staticmethod
+    def refresh(creds: Credentials) -> bool:
+        """Refreshes the current tenant's `creds` unless another thread already did; returns False on failure."""
+        with CredentialManager._holder().refresh_lock:
+            if not CredentialManager._needs_refresh(creds):
+                return True
             try:
-                creds.refresh(GoogleRequest())
-                # Save refreshed token
-                GoogleAuthService.save_credentials(creds)
+                with span("google.token_refresh"):
+                    creds.refresh(GoogleRequest())
             except Exception as e:
                 logger.error("Error refreshing token: %s", e)
-                return None
-                
-        return creds
+                TOKEN_REFRESHES.inc(outcome="failure")
+                return False
+            TOKEN_REFRESHES.inc(outcome="success")
+            try:
+                # Persist the refreshed token (atomic write, also updates the holder)
+                GoogleAuthService.save_credentials(creds)
+            except Exception as e:
+                logger.error("Error saving refreshed token: %s", e)
+            return True
+
+    @staticmethod
+    def _needs_refresh(creds: Credentials) -> bool:
+        if not creds.refresh_token:
+            return False
+        if not creds.token or creds.expiry is None:
+            return not creds.token
+        margin = timedelta(seconds=settings.GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS)
+        return creds.expiry - margin <= datetime.now(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _seconds_until_refresh() -> float:
+        margin = timedelta(seconds=settings.GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS)
+        wait = settings.GOOGLE_TOKEN_POLL_SECONDS
+        for holder in CredentialManager._pool.values():
+            creds = holder.credentials
+            if creds is None or creds.expiry is None or not creds.refresh_token:
+                continue
+            due = creds.expiry - margin - datetime.now(timezone.utc).replace(tzinfo=None)
+            wait = min(wait, due.total_seconds())
+        return max(0.0, wait)
+
+    @staticmethod
+    def _run_refresher() -> None:
+        while True:
+            CredentialManager._wakeup.wait(CredentialManager._seconds_until_refresh())
+            CredentialManager._wakeup.clear()
+            failed = False
+            for holder in CredentialManager._pool.values():
+                creds = holder.credentials
+                if creds is not None and CredentialManager._needs_refresh(creds):
+                    with use_tenant(holder.tenant):
+                        failed |= not CredentialManager.refresh(creds)
+            if failed:
+                # Back off before retrying a failed refresh
+                CredentialManager._wakeup.wait(settings.GOOGLE_TOKEN_POLL_SECONDS)
+
+    @staticmethod
+    def _ensure_refresher() -> None:
+        if CredentialManager._refresher is not None and CredentialManager._refresher.is_alive():
+            return
+        with CredentialManager._lock:
+            if CredentialManager._refresher is None or not CredentialManager._refresher.is_alive():
+                CredentialManager._refresher = threading.Thread(
+                    target=CredentialManager._run_refresher, name="google-token-refresher", daemon=True
+                )
+                CredentialManager._refresher.start()
@@ -0,0 +1,91 @@
+import threading
+from typing import Any, Optional, Tuple
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+
+from app.core.admission import GOOGLE, upstream_call
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.tenants import get_current_tenant
+
+
+class _AdmittedRequest(HttpRequest):
+    """HttpRequest whose execution takes a token from the Google admission limiter."""
+
+    def execute(self, *args, **kwargs):
+        with upstream_call(GOOGLE):
+            return super().execute(*args, **kwargs)
+
+
+class _TenantClient:
+    """A tenant's Calendar Resource plus the per-thread transports that execute its requests."""
+
+    def __init__(self, credentials, key: Tuple[Any, ...]):
+        self.credentials = credentials
+        self.key = key
+        self.local = threading.local()
+        self.service = build(
+            'calendar', 'v3',
+            http=self.http(),
+            requestBuilder=self._request_builder,
+            static_discovery=True,
+            cache_discovery=False,
+            client_options={"api_endpoint": settings.GOOGLE_API_ENDPOINT} if settings.GOOGLE_API_ENDPOINT else None
+        )
+
+    def http(self) -> AuthorizedHttp:
+        if getattr(self.local, "http", None) is None:
+            self.local.http = AuthorizedHttp(
+                self.credentials,
+                http=httplib2.Http(timeout=settings.GOOGLE_HTTP_TIMEOUT_SECONDS)
+            )
+        return self.local.http
+
+    def _request_builder(self, http, *args, **kwargs):
+        # Ignore the shared http and execute on this thread's transport
+        return _AdmittedRequest(self.http(), *args, **kwargs)
+
+
+class CalendarClient:
+    """
+    Calendar v3 clients, one per tenant, held in a bounded LRU pool
+    (TENANT_POOL_MAX_ENTRIES) so the number of open connections stays bounded
+    as tenants come and go.
+
+    The discovery-based Resource is built once per tenant from the static
+    discovery document bundled with google-api-python-client and reused until
+    the credentials rotate. httplib2 is not thread-safe, so each worker thread
+    executes requests over its own keep-alive AuthorizedHttp; those transports
+    are released together with an evicted client.
+    """
+
+    _lock = threading.Lock()
+    _pool = TTLCache(maxsize=settings.TENANT_POOL_MAX_ENTRIES)
+
+    @staticmethod
+    def _credentials_key(credentials) -> Tuple[Any, ...]:
+        # Access tokens refresh in place on the same Credentials object; only a new
+        # client or refresh token means the owner re-authorized.
+        return (credentials.client_id, credentials.refresh_token)
+
+    @staticmethod
+    def get(credentials):
+        """Returns the current tenant's Calendar Resource, rebuilding it only if the credentials rotated."""
+        tenant_id = get_current_tenant().id
+        key = CalendarClient._credentials_key(credentials)
+        client: Optional[_TenantClient] = CalendarClient._pool.get(tenant_id)
+        if client is not None and client.key == key:
+            return client.service
+        with CalendarClient._lock:
+            client = CalendarClient._pool.get(tenant_id)
+            if client is None or client.key != key:
+                client = _TenantClient(credentials, key)
+                CalendarClient._pool.set(tenant_id, client)
+            return client.service
+
+    @staticmethod
+    def reset() -> None:
+        CalendarClient._pool.clear()
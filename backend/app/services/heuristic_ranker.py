@@ -0,0 +1,112 @@
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from app.services.busy_index import BusyIndex
+from app.services.preferences import WEEKDAYS
+
+# Weights mirror the owner guidelines given to the LLM in AIService.rank_slots
+WEEKEND_BONUS = 2.0
+LATE_PENALTY = 1.5          # meetings running past 21:00
+BATCH_BONUS = 1.0           # adjacent to an existing busy event
+BATCH_GAP_SECONDS = 15 * 60
+FEEDBACK_DAY_BONUS = 3.0    # user named the weekday (or weekend/weekday)
+FEEDBACK_PART_BONUS = 2.0   # user named the part of day
+
+PARTS_OF_DAY = {
+    "morning": (5 * 60, 12 * 60),
+    "afternoon": (12 * 60, 17 * 60),
+    "evening": (17 * 60, 24 * 60),
+    "night": (19 * 60, 24 * 60),
+}
+
+
+class HeuristicRanker:
+    """
+    Deterministic, local slot scoring against the owner preferences and the
+    user's request. Used to pick which slots the LLM sees and to answer
+    without a model call when needed.
+    """
+
+    @staticmethod
+    def _feedback_terms(user_feedback: Optional[str]) -> set:
+        if not user_feedback:
+            return set()
+        words = set(re.findall(r"[a-z]+", user_feedback.lower()))
+        # Accept plurals like "fridays" / "evenings"
+        return words | {w[:-1] for w in words if w.endswith("s")}
+
+    @staticmethod
+    def score_slots(slots: List[Dict[str, str]], prefs: Dict[str, Any],
+                    busy: Optional[BusyIndex] = None, user_feedback: Optional[str] = None) -> List[float]:
+        """Scores every slot in one pass; higher is better."""
+        terms = HeuristicRanker._feedback_terms(user_feedback)
+        wanted_days = {i for i, day in enumerate(WEEKDAYS) if day.lower() in terms}
+        if "weekend" in terms:
+            wanted_days |= {5, 6}
+        if "weekday" in terms:
+            wanted_days |= {0, 1, 2, 3, 4}
+        wanted_parts = [PARTS_OF_DAY[p] for p in PARTS_OF_DAY if p in terms]
+        batch = bool(prefs.get('batch_meetings')) and busy is not None and len(busy) > 0
+
+        scores = []
+        for slot in slots:
+            start = datetime.fromisoformat(slot['start'])
+            end = datetime.fromisoformat(slot['end'])
+            weekday = start.weekday()
+            start_min = start.hour * 60 + start.minute
+            end_min = start_min + int((end - start).total_seconds() // 60)
+
+            score = 0.0
+            if weekday >= 5:
+                score += WEEKEND_BONUS
+            if end_min > 21 * 60:
+                score -= LATE_PENALTY
+            if batch and busy.touches(start, end, BATCH_GAP_SECONDS):
+                score += BATCH_BONUS
+            if weekday in wanted_days:
+                score += FEEDBACK_DAY_BONUS
+            if any(p_start <= start_min < p_end for p_start, p_end in wanted_parts):
+                score += FEEDBACK_PART_BONUS
+            scores.append(score)
+        return scores
+
+    @staticmethod
+    def _select(slots: List[Dict[str, str]], order: List[int], limit: int, per_day: int) -> List[int]:
+        """Takes indices in `order`, at most `per_day` per calendar day at first, then fills up to `limit`."""
+        picked: List[int] = []
+        day_counts: Dict[str, int] = defaultdict(int)
+        for i in order:
+            if len(picked) >= limit:
+                break
+            day = slots[i]['start'][:10]
+            if day_counts[day] < per_day:
+                day_counts[day] += 1
+                picked.append(i)
+        if len(picked) < limit:
+            chosen = set(picked)
+            picked += [i for i in order if i not in chosen][:limit - len(picked)]
+        return picked
+
+    @staticmethod
+    def top_k(slots: List[Dict[str, str]], k: int, prefs: Dict[str, Any],
+              busy: Optional[BusyIndex] = None, user_feedback: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Best `k` slots in chronological order. The best slot of every day is taken
+        first so no day disappears entirely; remaining places go by score.
+        """
+        if len(slots) <= k:
+            return list(slots)
+        scores = HeuristicRanker.score_slots(slots, prefs, busy, user_feedback)
+        # sorted() is stable, so equal scores stay chronological
+        order = sorted(range(len(slots)), key=lambda i: -scores[i])
+        return [slots[i] for i in sorted(HeuristicRanker._select(slots, order, k, per_day=1))]
+
+    @staticmethod
+    def rank(slots: List[Dict[str, str]], prefs: Dict[str, Any], busy: Optional[BusyIndex] = None,
+             user_feedback: Optional[str] = None, limit: int = 5) -> List[Dict[str, str]]:
+        """Top `limit` slots, best first, with at most two per day unless there are too few days."""
+        scores = HeuristicRanker.score_slots(slots, prefs, busy, user_feedback)
+        order = sorted(range(len(slots)), key=lambda i: -scores[i])
+        return [slots[i] for i in HeuristicRanker._select(slots, order, limit, per_day=2)]
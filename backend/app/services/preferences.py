@@ -1,26 +1,139 @@
+import copy
 import json
 import logging
-from typing import Dict, Any
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.files import atomic_write_json
+from app.core.tenants import get_current_tenant
 
 logger = logging.getLogger(__name__)
 
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MINUTES_PER_DAY = 24 * 60
+
+
+def _parse_minutes(value: str) -> int:
+    parsed = datetime.strptime(value, '%H:%M')
+    return parsed.hour * 60 + parsed.minute
+
+
+class CompiledRule(NamedTuple):
+    days_mask: int  # bit n set => applies on weekday n (Monday == 0)
+    start: int      # minute of day, inclusive
+    end: int        # minute of day, exclusive
+    carry_over: bool = False  # morning half of an overnight rule
+
+
+class CompiledPreferences:
+    """
+    Preferences with the `no_meetings` rules pre-parsed into weekday bitmasks
+    and minute-of-day ranges. Overnight rules (end <= start) are split into an
+    evening segment and a morning segment up front.
+    """
+
+    def __init__(self, prefs: Dict[str, Any]):
+        self.raw = prefs
+        rules: List[CompiledRule] = []
+        for rule in prefs.get('no_meetings', []):
+            mask = 0
+            for day in rule.get('days', []):
+                if day in WEEKDAYS:
+                    mask |= 1 << WEEKDAYS.index(day)
+            if not mask:
+                continue
+            start = _parse_minutes(rule['start'])
+            end = _parse_minutes(rule['end'])
+            if end <= start:
+                rules.append(CompiledRule(mask, start, MINUTES_PER_DAY))
+                rules.append(CompiledRule(mask, 0, end, carry_over=True))
+            else:
+                rules.append(CompiledRule(mask, start, end))
+        self.rules = tuple(rules)
+
+    def blocks_for(self, weekday: int) -> List[Tuple[int, int]]:
+        """All blocked minute ranges for a weekday, including both halves of overnight rules."""
+        bit = 1 << weekday
+        return [(r.start, r.end) for r in self.rules if r.days_mask & bit]
+
+    def carry_over_for(self, weekday: int) -> List[Tuple[int, int]]:
+        """Morning ranges spilling into the day after `weekday` from its overnight rules."""
+        bit = 1 << weekday
+        return [(r.start, r.end) for r in self.rules if r.carry_over and r.days_mask & bit]
+
+    def is_blocked(self, dt_start: datetime, dt_end: datetime) -> bool:
+        if dt_start.tzinfo is None:
+            dt_start = dt_start.replace(tzinfo=timezone.utc)
+        bit = 1 << dt_start.weekday()
+        start = dt_start.hour * 60 + dt_start.minute + dt_start.second / 60
+        end = start + (dt_end - dt_start).total_seconds() / 60
+        for rule in self.rules:
+            if rule.days_mask & bit and start < rule.end and end > rule.start:
+                return True
+        return False
+
+
 class PreferencesService:
+    # Per tenant: (file signature, raw preferences, compiled preferences), bounded LRU
+    _pool = TTLCache(maxsize=settings.TENANT_POOL_MAX_ENTRIES)
+    _lock = threading.Lock()
+
     @staticmethod
-    def get_preferences() -> Dict[str, Any]:
-        prefs_path = settings.get_file_path(settings.PREFERENCES_FILE)
-        if not prefs_path.exists():
-            return {}
+    def _file_signature(prefs_path) -> Optional[Tuple[int, int]]:
         try:
-            with open(prefs_path, "r") as f:
-                return json.load(f)
-        except Exception:
-            logger.warning("Failed to read preferences file, returning empty defaults")
-            return {}
+            stat = prefs_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _load() -> Tuple[Dict[str, Any], CompiledPreferences]:
+        """Returns the current tenant's cached preferences, re-reading the file only when its mtime/size changed."""
+        tenant = get_current_tenant()
+        prefs_path = tenant.preferences_path
+        signature = PreferencesService._file_signature(prefs_path)
+        cached = PreferencesService._pool.get(tenant.id)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+
+        with PreferencesService._lock:
+            cached = PreferencesService._pool.get(tenant.id)
+            if cached is not None and cached[0] == signature:
+                return cached[1], cached[2]
+
+            prefs: Dict[str, Any] = {}
+            if signature is not None:
+                try:
+                    with open(prefs_path, "r") as f:
+                        prefs = json.load(f)
+                except Exception:
+                    logger.warning("Failed to read preferences file, returning empty defaults")
+                    prefs = {}
+            compiled = CompiledPreferences(prefs)
+            PreferencesService._pool.set(tenant.id, (signature, prefs, compiled))
+            return prefs, compiled
+
+    @staticmethod
+    def get_preferences() -> Dict[str, Any]:
+        prefs, _ = PreferencesService._load()
+        return copy.deepcopy(prefs)
+
+    @staticmethod
+    def get_compiled() -> CompiledPreferences:
+        _, compiled = PreferencesService._load()
+        return compiled
 
     @staticmethod
     def update_preferences(prefs: Dict[str, Any]):
-        prefs_path = settings.get_file_path(settings.PREFERENCES_FILE)
-        with open(prefs_path, "w") as f:
-            json.dump(prefs, f, indent=2)
+        tenant = get_current_tenant()
+        prefs_path = tenant.preferences_path
+        # Compile first so invalid rules are rejected before anything is written
+        stored = copy.deepcopy(prefs)
+        compiled = CompiledPreferences(stored)
+        with PreferencesService._lock:
+            atomic_write_json(prefs_path, prefs, indent=2)
+            signature = PreferencesService._file_signature(prefs_path)
+            PreferencesService._pool.set(tenant.id, (signature, stored, compiled))
         return prefs
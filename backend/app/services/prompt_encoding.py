@@ -0,0 +1,83 @@
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class CompactSlots(NamedTuple):
+    """A slot list as prompt text (one line per day) plus the slot behind each short ID."""
+    text: str
+    slots_by_id: Dict[str, Dict[str, str]]
+    step_minutes: Optional[int]
+
+
+class PromptEncoder:
+    """
+    Compact prompt encoding of a slot list. Each day becomes one line with its
+    number, weekday and date, followed by the free start times, where runs of
+    evenly spaced starts collapse into ranges:
+
+        1 Sat 2025-11-22: 09:00-11:30, 14:00, 16:00-18:00
+        2 Sun 2025-11-23: 10:00-12:00
+
+    A slot's ID is its day number and local start time (`1.0930`), so the model
+    can name any start inside a range without copying timestamps, and every ID
+    maps back to the exact `start`/`end` of a legal slot.
+    """
+
+    @staticmethod
+    def slot_id(day_number: int, start: datetime) -> str:
+        return f"{day_number}.{start:%H%M}"
+
+    @staticmethod
+    def normalize_id(slot_id: str) -> str:
+        """Tolerates the model writing `1.09:30` or padding the ID with spaces."""
+        return slot_id.strip().replace(":", "")
+
+    @staticmethod
+    def _minute(start: datetime) -> int:
+        # Wall-clock minute of the day, which is what the IDs and ranges show
+        return start.hour * 60 + start.minute
+
+    @staticmethod
+    def _step_minutes(days: Dict[date, List[Tuple[datetime, Dict[str, str]]]]) -> Optional[int]:
+        """The smallest distance between two starts on the same day, i.e. the slot grid."""
+        gaps = [
+            PromptEncoder._minute(b) - PromptEncoder._minute(a)
+            for entries in days.values()
+            for (a, _), (b, _) in zip(entries, entries[1:])
+        ]
+        gaps = [g for g in gaps if g > 0]
+        return min(gaps) if gaps else None
+
+    @staticmethod
+    def _format_range(first: int, last: int) -> str:
+        text = f"{first // 60:02d}:{first % 60:02d}"
+        if last != first:
+            text += f"-{last // 60:02d}:{last % 60:02d}"
+        return text
+
+    @staticmethod
+    def encode(slots: List[Dict[str, str]]) -> CompactSlots:
+        """Encodes chronologically ordered slots; days are numbered from 1 in order of appearance."""
+        days: Dict[date, List[Tuple[datetime, Dict[str, str]]]] = {}
+        for slot in slots:
+            start = datetime.fromisoformat(slot["start"])
+            days.setdefault(start.date(), []).append((start, slot))
+        step = PromptEncoder._step_minutes(days)
+
+        lines = []
+        slots_by_id: Dict[str, Dict[str, str]] = {}
+        for number, (day, entries) in enumerate(days.items(), 1):
+            ranges: List[List[int]] = []  # [first, last] start minute
+            for start, slot in entries:
+                slot_id = PromptEncoder.slot_id(number, start)
+                if slot_id in slots_by_id:
+                    # The repeated hour when clocks go back; its first occurrence stays nameable
+                    continue
+                slots_by_id[slot_id] = slot
+                minute = PromptEncoder._minute(start)
+                if ranges and minute - ranges[-1][1] == step:
+                    ranges[-1][1] = minute
+                else:
+                    ranges.append([minute, minute])
+            lines.append(f"{number} {day:%a %Y-%m-%d}: " + ", ".join(PromptEncoder._format_range(*r) for r in ranges))
+        return CompactSlots("\n".join(lines), slots_by_id, step)
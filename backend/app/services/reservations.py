@@ -0,0 +1,112 @@
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.tenants import get_current_tenant
+from app.services.busy_index import BusyIndex
+
+PENDING = "pending"
+BOOKED = "booked"
+
+
+class SlotConflictError(ValueError):
+    """The slot overlaps a booking that is in progress or was just made."""
+
+
+class Hold(NamedTuple):
+    token: int
+    start_ts: float
+    end_ts: float
+    status: str
+    expires_at: float
+
+
+class ReservationLedger:
+    """
+    In-process record of slots that are being booked (pending) or were just
+    booked, per tenant.
+
+    A booking first takes a hold on its slot; any overlapping hold makes a
+    concurrent booking fail fast instead of both passing validation. Pending
+    holds expire after RESERVATION_PENDING_TIMEOUT_SECONDS in case a booking
+    thread dies; confirmed holds keep blocking the slot for
+    RESERVATION_BOOKED_TTL_SECONDS, until Google's freebusy reliably shows the
+    new event.
+    """
+
+    _lock = threading.Lock()
+    _holds: Dict[str, List[Hold]] = {}
+    _tokens = itertools.count(1)
+    _clock = staticmethod(time.monotonic)
+
+    @staticmethod
+    def _live(tenant_id: str, now: float) -> List[Hold]:
+        holds = [h for h in ReservationLedger._holds.get(tenant_id, []) if h.expires_at > now]
+        if holds:
+            ReservationLedger._holds[tenant_id] = holds
+        else:
+            ReservationLedger._holds.pop(tenant_id, None)
+        return holds
+
+    @staticmethod
+    def hold(start: datetime, end: datetime) -> int:
+        """Reserves [start, end) for the current tenant; raises SlotConflictError if it overlaps a live hold."""
+        tenant_id = get_current_tenant().id
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        with ReservationLedger._lock:
+            now = ReservationLedger._clock()
+            holds = ReservationLedger._live(tenant_id, now)
+            for h in holds:
+                if h.start_ts < end_ts and start_ts < h.end_ts:
+                    if h.status == PENDING:
+                        raise SlotConflictError("This time slot is being booked by someone else.")
+                    raise SlotConflictError("This time slot conflicts with an existing event.")
+            token = next(ReservationLedger._tokens)
+            holds.append(Hold(token, start_ts, end_ts, PENDING, now + settings.RESERVATION_PENDING_TIMEOUT_SECONDS))
+            ReservationLedger._holds[tenant_id] = holds
+            return token
+
+    @staticmethod
+    def _replace(token: int, status: Optional[str], ttl: float = 0) -> None:
+        tenant_id = get_current_tenant().id
+        with ReservationLedger._lock:
+            now = ReservationLedger._clock()
+            holds = []
+            for h in ReservationLedger._live(tenant_id, now):
+                if h.token != token:
+                    holds.append(h)
+                elif status is not None:
+                    holds.append(h._replace(status=status, expires_at=now + ttl))
+            if holds:
+                ReservationLedger._holds[tenant_id] = holds
+            else:
+                ReservationLedger._holds.pop(tenant_id, None)
+
+    @staticmethod
+    def confirm(token: int) -> None:
+        """Marks a hold as booked; it keeps blocking the slot for RESERVATION_BOOKED_TTL_SECONDS."""
+        ReservationLedger._replace(token, BOOKED, settings.RESERVATION_BOOKED_TTL_SECONDS)
+
+    @staticmethod
+    def release(token: int) -> None:
+        """Drops a hold whose booking failed."""
+        ReservationLedger._replace(token, None)
+
+    @staticmethod
+    def busy_index() -> BusyIndex:
+        """Live holds of the current tenant as busy intervals (e.g. to hide just-booked slots)."""
+        tenant_id = get_current_tenant().id
+        with ReservationLedger._lock:
+            holds = ReservationLedger._live(tenant_id, ReservationLedger._clock())
+        return BusyIndex(
+            (datetime.fromtimestamp(h.start_ts, timezone.utc), datetime.fromtimestamp(h.end_ts, timezone.utc))
+            for h in holds
+        )
+
+    @staticmethod
+    def clear() -> None:
+        with ReservationLedger._lock:
+            ReservationLedger._holds.clear()
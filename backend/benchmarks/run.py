@@ -0,0 +1,235 @@
+"""
+Microbenchmarks for the scheduling core.
+
+    python -m benchmarks.run                      # run, print a table, compare with baseline.json
+    python -m benchmarks.run --output out.json    # also write the results as JSON
+    python -m benchmarks.run --update-baseline    # store this run as the new baseline
+
+Exits with status 1 if any case's median is more than --tolerance slower than
+the baseline. Google and Gemini are stubbed, so only local work is measured.
+"""
+import argparse
+import json
+import logging
+import platform
+import re
+import statistics
+import sys
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+from app.models.schemas import SlotIdList, SlotList
+from app.services.ai_service import AIService
+from app.services.calendar import CalendarService
+from app.services.preferences import CompiledPreferences, PreferencesService
+from benchmarks import synthetic
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+SLOT_PATTERN = re.compile(r"\(start=(\S+), end=(\S+)\)")
+DAY_PATTERN = re.compile(r"^(\d+) \w{3} \d{4}-\d\d-\d\d: (.+)$", re.MULTILINE)
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[ExitStack], Callable[[], Any]]  # returns the function to time
+    rounds: int = 20
+
+
+class FakeEngine:
+    """Answers like the structured-output model: picks every tenth prompt slot plus one invented slot."""
+
+    def run_structured(self, prompt: str, schema=SlotList, usage=None):
+        if schema is SlotIdList:
+            # Compact prompt: the first start of every range on every day
+            ids = [f"{day}.{r[:5].replace(':', '')}" for day, ranges in DAY_PATTERN.findall(prompt) for r in ranges.split(", ")]
+            payload = {"slot_ids": ids[::2] + ["99.0000"], "message": "Here are some options."}
+            return json.dumps(payload), lambda: SlotIdList.model_validate(payload)
+        slots = [{"start": s, "end": e} for s, e in SLOT_PATTERN.findall(prompt)][::10]
+        slots.append({"start": "2000-01-01T00:00:00+00:00", "end": "2000-01-01T01:00:00+00:00"})
+        payload = {"slots": slots, "message": "Here are some options."}
+        return json.dumps(payload), lambda: SlotList.model_validate(payload)
+
+
+def _busy_ranges_case(events: int) -> Case:
+    def setup(stack):
+        data = synthetic.calendar_events(events)
+        tz = ZoneInfo("America/Los_Angeles")
+        return lambda: CalendarService.get_busy_ranges(data, tz)
+    return Case(f"get_busy_ranges[{events}_events]", setup, rounds=5 if events > 10_000 else 20)
+
+
+def _is_slot_blocked_case(label: str, prefs: Dict[str, Any]) -> Case:
+    def setup(stack):
+        compiled = CompiledPreferences(prefs)
+        tz = ZoneInfo("Asia/Kolkata")
+        starts = [datetime(2030, 1, 1, tzinfo=tz).replace(day=1 + d, hour=h, minute=m)
+                  for d in range(7) for h in range(24) for m in (0, 30)]
+        spans = [(s, s.replace(minute=s.minute + 29)) for s in starts]
+
+        def run():
+            for start, end in spans:
+                CalendarService.is_slot_blocked(start, end, compiled)
+        return run
+    return Case(f"is_slot_blocked[{label},336_slots]", setup)
+
+
+def _busy_in_window(busy: List[Dict[str, str]]) -> Callable[[str, str], List[Dict[str, str]]]:
+    """get_busy_times stand-in that returns only the intervals overlapping the requested window, like Google."""
+    parsed = sorted((datetime.fromisoformat(b["start"]).timestamp(), datetime.fromisoformat(b["end"]).timestamp(), b)
+                    for b in busy)
+    starts = [start for start, _, _ in parsed]
+
+    def get_busy_times(time_min: str, time_max: str):
+        lo, hi = datetime.fromisoformat(time_min).timestamp(), datetime.fromisoformat(time_max).timestamp()
+        # Synthetic events are at most two hours long
+        first = bisect_left(starts, lo - 2 * 3600)
+        return [b for start, end, b in parsed[first:bisect_left(starts, hi)] if end > lo]
+    return get_busy_times
+
+
+def _available_slots_case(label: str, tz_name: str, events: int, prefs: Dict[str, Any],
+                          engine: str = "python", windowed: bool = False, **params) -> Case:
+    def setup(stack):
+        busy = synthetic.busy_intervals(events, days=params.get("horizon_days", 7))
+        if windowed:
+            stack.enter_context(patch.object(CalendarService, "get_busy_times", side_effect=_busy_in_window(busy)))
+        else:
+            stack.enter_context(patch.object(CalendarService, "get_busy_times", return_value=busy))
+        stack.enter_context(patch.object(PreferencesService, "get_compiled", return_value=CompiledPreferences(prefs)))
+        stack.enter_context(patch.object(settings, "AVAILABILITY_ENGINE", engine))
+        return lambda: CalendarService.get_available_slots(tz_name, **params)
+    suffix = "" if engine == "python" else f",{engine}"
+    return Case(f"get_available_slots[{label},{tz_name},{events}_events{suffix}]", setup)
+
+
+def _rank_slots_case(events: int, encoding: str = "verbose") -> Case:
+    def setup(stack):
+        busy_times = synthetic.busy_intervals(events, days=7)
+        stack.enter_context(patch.object(CalendarService, "get_busy_times", return_value=busy_times))
+        stack.enter_context(patch.object(PreferencesService, "get_compiled",
+                                         return_value=CompiledPreferences(synthetic.OVERNIGHT_PREFS)))
+        stack.enter_context(patch.object(PreferencesService, "get_preferences", return_value=synthetic.OVERNIGHT_PREFS))
+        stack.enter_context(patch.object(settings, "GOOGLE_AI_API_KEY", "benchmark"))
+        stack.enter_context(patch.object(AIService, "get_engine", return_value=FakeEngine()))
+        stack.enter_context(patch.object(settings, "AI_PROMPT_ENCODING", encoding))
+        slots = CalendarService.get_available_slots("UTC", duration_minutes=30, step_minutes=15)
+        busy = CalendarService.get_busy_ranges(busy_times, timezone.utc)
+
+        def run():
+            AIService._ranking_cache.clear()
+            return AIService.rank_slots(slots, "evenings on the weekend", busy)
+        return run
+    suffix = "" if encoding == "verbose" else f",{encoding}"
+    return Case(f"rank_slots[fake_llm,{events}_events{suffix}]", setup)
+
+
+def cases() -> List[Case]:
+    many_rules = synthetic.many_rule_prefs()
+    result = [_busy_ranges_case(n) for n in (10, 1_000, 50_000)]
+    result += [
+        _is_slot_blocked_case("overnight", synthetic.OVERNIGHT_PREFS),
+        _is_slot_blocked_case("200_rules", many_rules),
+    ]
+    for tz_name in synthetic.TIMEZONES:
+        result.append(_available_slots_case("default", tz_name, 100, synthetic.OVERNIGHT_PREFS))
+    result += [
+        _available_slots_case("default", "UTC", 10_000, synthetic.OVERNIGHT_PREFS),
+        _available_slots_case("200_rules", "UTC", 1_000, many_rules),
+        _available_slots_case("30m_every_15m_60d", "America/Los_Angeles", 5_000, {"no_meetings": []},
+                              duration_minutes=30, step_minutes=15, horizon_days=60),
+        _available_slots_case("default", "UTC", 10_000, synthetic.OVERNIGHT_PREFS, engine="numpy"),
+        _available_slots_case("200_rules", "UTC", 1_000, many_rules, engine="numpy"),
+        _available_slots_case("30m_every_15m_60d", "America/Los_Angeles", 5_000, {"no_meetings": []},
+                              engine="numpy", duration_minutes=30, step_minutes=15, horizon_days=60),
+        # Months of 5-minute slots, with busy times fetched per chunk as from Google
+        _available_slots_case("5m_every_5m_90d", "Europe/Berlin", 5_000, synthetic.OVERNIGHT_PREFS,
+                              windowed=True, duration_minutes=5, step_minutes=5, horizon_days=90),
+        _available_slots_case("5m_every_5m_90d", "Europe/Berlin", 5_000, synthetic.OVERNIGHT_PREFS,
+                              engine="numpy", windowed=True, duration_minutes=5, step_minutes=5, horizon_days=90),
+        _rank_slots_case(100),
+        _rank_slots_case(100, encoding="compact"),
+    ]
+    return result
+
+
+def measure(case: Case) -> Dict[str, Any]:
+    with ExitStack() as stack:
+        fn = case.setup(stack)
+        fn()  # warm caches and imports outside the timed rounds
+        timings = []
+        for _ in range(case.rounds):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return {
+        "rounds": case.rounds,
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[Tuple[str, float]]:
+    """(case, slowdown ratio) for every case whose median exceeds the baseline by more than `tolerance`."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, help="write results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown vs. baseline (0.5 = 50%%)")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    args = parser.parse_args(argv)
+    # The fake model's invented slot is logged on every round otherwise
+    logging.disable(logging.WARNING)
+
+    results = {}
+    for case in cases():
+        if args.filter in case.name:
+            results[case.name] = measure(case)
+            print(f"{case.name:<70} {results[case.name]['median_s'] * 1000:10.3f} ms")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+    baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    for name, ratio in regressions:
+        print(f"REGRESSION {name}: {ratio:.2f}x baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Seeded synthetic calendars and preference sets for the benchmarks."""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from app.services.preferences import WEEKDAYS
+
+TIMEZONES = ["UTC", "America/Los_Angeles", "Asia/Kolkata"]
+
+# Sleep rule wrapping midnight plus a weekday work block, as in the sample preferences
+OVERNIGHT_PREFS: Dict[str, Any] = {
+    "no_meetings": [
+        {"days": WEEKDAYS[:5], "start": "08:00", "end": "19:00", "reason": "work"},
+        {"days": WEEKDAYS, "start": "22:00", "end": "07:00", "reason": "sleep"},
+    ],
+    "batch_meetings": True
+}
+
+
+def many_rule_prefs(rules: int = 200, seed: int = 0) -> Dict[str, Any]:
+    """`rules` short blocks on random days, a fifth of them overnight."""
+    rng = random.Random(seed)
+    no_meetings = []
+    for _ in range(rules):
+        start = rng.randrange(0, 24 * 60, 15)
+        length = rng.choice([15, 30, 60, 90])
+        if rng.random() < 0.2:
+            start = rng.randrange(21 * 60, 24 * 60, 15)
+            length = rng.choice([180, 360, 540])
+        end = (start + length) % (24 * 60)
+        no_meetings.append({
+            "days": rng.sample(WEEKDAYS, rng.randint(1, 7)),
+            "start": f"{start // 60:02d}:{start % 60:02d}",
+            "end": f"{end // 60:02d}:{end % 60:02d}",
+        })
+    return {"no_meetings": no_meetings, "batch_meetings": True}
+
+
+def calendar_events(count: int, days: int = 60, seed: int = 0, start: datetime = None) -> List[Dict[str, Any]]:
+    """
+    `count` events spread over `days` from `start`, shaped like events().list items:
+    mostly timed events (some overlapping), a few all-day events.
+    """
+    rng = random.Random(seed)
+    start = start or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    events = []
+    for _ in range(count):
+        if rng.random() < 0.02:
+            day = (start + timedelta(days=rng.randrange(days))).date()
+            events.append({
+                "start": {"date": day.isoformat()},
+                "end": {"date": (day + timedelta(days=1)).isoformat()},
+            })
+            continue
+        begin = start + timedelta(minutes=rng.randrange(0, days * 24 * 60, 5))
+        end = begin + timedelta(minutes=rng.choice([15, 30, 45, 60, 90, 120]))
+        events.append({
+            "start": {"dateTime": begin.isoformat()},
+            "end": {"dateTime": end.isoformat()},
+        })
+    return events
+
+
+def busy_intervals(count: int, days: int = 60, seed: int = 0, start: datetime = None) -> List[Dict[str, str]]:
+    """The same calendar as freebusy intervals ({'start': ..., 'end': ...}), timed events only."""
+    return [
+        {"start": e["start"]["dateTime"], "end": e["end"]["dateTime"]}
+        for e in calendar_events(count, days, seed, start)
+        if "dateTime" in e["start"]
+    ]
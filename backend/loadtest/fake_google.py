@@ -0,0 +1,161 @@
+"""
+Local stand-in for the Calendar v3 endpoints the backend uses: events list and
+insert, calendarList get and freebusy query. Point the backend at it with
+GOOGLE_API_ENDPOINT=http://<host>:<port>/calendar/v3/.
+
+    python -m loadtest.fake_google --port 8101 --latency-ms 80 --events-per-day 8
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from zoneinfo import ZoneInfo
+
+PAGE_SIZE = 250
+# Synthetic events are at most this long, which bounds the range scan
+MAX_EVENT_SECONDS = 3 * 3600
+
+
+def _ts(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class FakeCalendar:
+    """One calendar's events, seeded with `events_per_day` timed events per day around today."""
+
+    def __init__(self, events_per_day: float = 8, days: int = 120, time_zone: str = "Europe/Berlin",
+                 latency_seconds: float = 0.05, seed: int = 0):
+        self.time_zone = time_zone
+        self.latency_seconds = latency_seconds
+        self._lock = threading.Lock()
+        # (start_ts, end_ts, id) sorted by start, plus the resources by id
+        self._index: List[Tuple[float, float, str]] = []
+        self._events: Dict[str, Dict[str, Any]] = {}
+
+        rng = random.Random(seed)
+        tz = ZoneInfo(time_zone)
+        first = datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        for _ in range(int(events_per_day * days)):
+            start = first + timedelta(minutes=rng.randrange(0, days * 24 * 60, 15))
+            end = start + timedelta(minutes=rng.choice([15, 30, 45, 60, 90, 120]))
+            self.add({
+                "summary": "Busy",
+                "start": {"dateTime": start.isoformat()},
+                "end": {"dateTime": end.isoformat()},
+                "transparency": "transparent" if rng.random() < 0.1 else "opaque",
+            })
+
+    def add(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        event = dict(event, id=uuid.uuid4().hex, status="confirmed")
+        event.pop("conferenceData", None)
+        event["hangoutLink"] = f"https://meet.google.com/{event['id'][:10]}"
+        with self._lock:
+            self._events[event["id"]] = event
+            insort(self._index, (_ts(event["start"]["dateTime"]), _ts(event["end"]["dateTime"]), event["id"]))
+        return event
+
+    def between(self, time_min: Optional[str], time_max: Optional[str]) -> List[Dict[str, Any]]:
+        lo = _ts(time_min) if time_min else float("-inf")
+        hi = _ts(time_max) if time_max else float("inf")
+        with self._lock:
+            first = bisect_left(self._index, (lo - MAX_EVENT_SECONDS,))
+            last = bisect_left(self._index, (hi,))
+            return [self._events[i] for _, end, i in self._index[first:last] if end > lo]
+
+    def busy(self, time_min: str, time_max: str) -> List[Dict[str, str]]:
+        return [
+            {"start": e["start"]["dateTime"], "end": e["end"]["dateTime"]}
+            for e in self.between(time_min, time_max)
+            if e.get("transparency") != "transparent"
+        ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    calendar: FakeCalendar
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _route(self) -> Tuple[List[str], Dict[str, str]]:
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        if parts[:2] == ["calendar", "v3"]:
+            parts = parts[2:]
+        return parts, {k: v[0] for k, v in parse_qs(url.query).items()}
+
+    def do_GET(self):
+        time.sleep(self.calendar.latency_seconds)
+        parts, query = self._route()
+        if len(parts) == 3 and parts[0] == "calendars" and parts[2] == "events":
+            items = self.calendar.between(query.get("timeMin"), query.get("timeMax"))
+            offset = int(query.get("pageToken", 0))
+            size = min(int(query.get("maxResults", PAGE_SIZE)), 2500)
+            body = {"kind": "calendar#events", "timeZone": self.calendar.time_zone, "items": items[offset:offset + size]}
+            if offset + size < len(items):
+                body["nextPageToken"] = str(offset + size)
+            return self._send(200, body)
+        if parts[:3] == ["users", "me", "calendarList"] and len(parts) == 4:
+            return self._send(200, {"kind": "calendar#calendarListEntry", "id": parts[3], "timeZone": self.calendar.time_zone})
+        self._send(404, {"error": {"code": 404, "message": "Not Found"}})
+
+    def do_POST(self):
+        time.sleep(self.calendar.latency_seconds)
+        parts, _ = self._route()
+        body = self._body()
+        if parts == ["freeBusy"]:
+            busy = self.calendar.busy(body["timeMin"], body["timeMax"])
+            return self._send(200, {"calendars": {item["id"]: {"busy": busy} for item in body.get("items", [])}})
+        if len(parts) == 3 and parts[0] == "calendars" and parts[2] == "events":
+            return self._send(200, self.calendar.add(body))
+        self._send(404, {"error": {"code": 404, "message": "Not Found"}})
+
+
+def serve(calendar: FakeCalendar, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Starts the fake API on a daemon thread; `server.server_port` is the bound port."""
+    handler = type("Handler", (_Handler,), {"calendar": calendar})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8101)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--events-per-day", type=float, default=8)
+    parser.add_argument("--time-zone", default="Europe/Berlin")
+    args = parser.parse_args(argv)
+
+    calendar = FakeCalendar(args.events_per_day, time_zone=args.time_zone, latency_seconds=args.latency_ms / 1000)
+    server = serve(calendar, args.host, args.port)
+    print(f"Fake Calendar API on http://{args.host}:{server.server_port}/calendar/v3/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Stand-in for the Gemini chat model: answers ranking prompts with schema-valid
+SlotList output after a fixed delay, without network access. Select it with
+AI_CHAT_MODEL_FACTORY=loadtest.fake_llm:create (delay from FAKE_LLM_DELAY_SECONDS).
+"""
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+SLOT_PATTERN = re.compile(r"\(start=(\S+), end=(\S+)\)")
+# Compact prompts: "3 Sat 2025-11-22: 09:00-11:30, 14:00"
+DAY_PATTERN = re.compile(r"^(\d+) \w{3} \d{4}-\d\d-\d\d: (.+)$", re.MULTILINE)
+RANGE_START_PATTERN = re.compile(r"(\d\d):(\d\d)(?:-\d\d:\d\d)?")
+
+
+class FakeRankingModel(BaseChatModel):
+    """Picks `picks` slots (or, for compact prompts, range starts) spread evenly over the prompt's slot list."""
+
+    delay_seconds: float = 0.5
+    picks: int = 8
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-ranking"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, method: Optional[str] = None, **kwargs):
+        if method == "json_mode":
+            return self | JsonOutputParser()
+        return super().with_structured_output(schema, include_raw=include_raw, **kwargs)
+
+    def _spread(self, items: List[Any]) -> List[Any]:
+        return items[::max(1, len(items) // self.picks)][:self.picks]
+
+    def _answer(self, prompt: str) -> Dict[str, Any]:
+        message = "Here are a few times spread across the coming days."
+        slots = SLOT_PATTERN.findall(prompt)
+        if slots:
+            return {"slots": [{"start": s, "end": e} for s, e in self._spread(slots)], "message": message}
+        ids = [
+            f"{day}.{hour}{minute}"
+            for day, ranges in DAY_PATTERN.findall(prompt)
+            for hour, minute in RANGE_START_PATTERN.findall(ranges)
+        ]
+        return {"slot_ids": self._spread(ids), "message": message}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.delay_seconds)
+        prompt = "\n".join(str(m.content) for m in messages)
+        answer = self._answer(prompt)
+        content = json.dumps(answer)
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        # Token usage is attributed per model name
+        metadata = {"model_name": self._llm_type}
+
+        tool_names = [t["function"]["name"] for t in kwargs.get("tools", [])]
+        schema = next((name for name in tool_names if name in ("SlotList", "SlotIdList")), None)
+        if schema:
+            message = AIMessage(content="", usage_metadata=usage, response_metadata=metadata,
+                                tool_calls=[{"name": schema, "args": answer, "id": "call_0"}])
+        else:
+            # Agent mode (only get_days_of_week is bound) and JSON mode answer in text
+            message = AIMessage(content=content, usage_metadata=usage, response_metadata=metadata)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def create(api_key: str) -> FakeRankingModel:
+    return FakeRankingModel(delay_seconds=float(os.environ.get("FAKE_LLM_DELAY_SECONDS", "0.5")))
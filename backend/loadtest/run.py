@@ -0,0 +1,231 @@
+"""
+End-to-end load test against local stand-ins for Google Calendar and Gemini.
+
+    python -m loadtest.run                                     # suggest-ai, 1 and 4 workers, 1..64 clients
+    python -m loadtest.run --endpoint book --workers 2 --concurrency 8 32
+    python -m loadtest.run --calendar-latency-ms 120 --llm-delay-ms 1500 --output load.json
+
+Starts the fake Calendar API in this process, then for each worker count a
+`uvicorn --workers N` server wired to it (GOOGLE_API_ENDPOINT) and to the fake
+chat model (AI_CHAT_MODEL_FACTORY). Each concurrency level runs that many
+closed-loop clients for --duration seconds and reports throughput and
+p50/p95/p99 latency, plus how many suggestions came back `degraded` (the
+local ranking, served when the model missed its deadline or was shed). Suggest
+requests carry unique feedback, so the ranking cache does not hide the model's
+latency. The backend runs with the app's own admission settings (off by
+default); --google-rate-limit and --llm-rate-limit override them.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import quote
+
+from loadtest.fake_google import FakeCalendar, serve
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TIMEZONE = "Europe/Berlin"
+
+Request = Tuple[str, str, Any]  # method, path, JSON body
+# Suggestions answered by the local ranking instead of the model (JSON and SSE bodies)
+DEGRADED_PATTERN = re.compile(rb'"degraded":\s*true')
+
+
+def _token_json(token_uri: str) -> str:
+    # No refresh token or expiry: the access token is used as is and never refreshed
+    return json.dumps({"token": "load-test", "client_id": "load-test", "client_secret": "load-test", "token_uri": token_uri})
+
+
+def start_backend(workers: int, port: int, api_root: str, args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        GOOGLE_API_ENDPOINT=f"{api_root}/calendar/v3/",
+        GOOGLE_TOKEN_JSON=_token_json(f"{api_root}/token"),
+        GOOGLE_AI_API_KEY="load-test",
+        AI_CHAT_MODEL_FACTORY="loadtest.fake_llm:create",
+        FAKE_LLM_DELAY_SECONDS=str(args.llm_delay_ms / 1000),
+        PYTHONPATH=str(BACKEND_DIR),
+    )
+    # The backend runs with the shipped admission defaults unless a rate is given
+    if args.google_rate_limit is not None:
+        env["GOOGLE_RATE_LIMIT_PER_SECOND"] = str(args.google_rate_limit)
+    if args.llm_rate_limit is not None:
+        env["LLM_RATE_LIMIT_PER_SECOND"] = str(args.llm_rate_limit)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            call(http.client.HTTPConnection("127.0.0.1", port, timeout=5), ("GET", "/", None))
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 60 s")
+
+
+def call(conn: http.client.HTTPConnection, request: Request) -> Tuple[int, bytes]:
+    method, path, body = request
+    payload = json.dumps(body).encode() if body is not None else None
+    conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def suggest_requests(args, port: int) -> Callable[[], Request]:
+    counter = itertools.count()
+    path = "/booking/suggest-ai/stream" if args.endpoint == "suggest-stream" else "/booking/suggest-ai"
+    return lambda: ("POST", path, {"timezone": TIMEZONE, "user_feedback": f"load test request {next(counter)}"})
+
+
+def slots_requests(args, port: int) -> Callable[[], Request]:
+    return lambda: ("GET", f"/booking/slots?timezone={TIMEZONE}&duration_minutes=30&horizon_days=30&limit=100", None)
+
+
+def book_requests(args, port: int) -> Callable[[], Request]:
+    """Books distinct free slots, read up front from /booking/slots."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    slots, cursor = [], None
+    while len(slots) < args.max_bookings:
+        query = f"/booking/slots?timezone={TIMEZONE}&duration_minutes=15&horizon_days=90&limit=500"
+        status, body = call(conn, ("GET", query + (f"&cursor={quote(cursor)}" if cursor else ""), None))
+        page = json.loads(body)
+        if status != 200:
+            raise RuntimeError(f"Listing slots failed: {page}")
+        slots += page["slots"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    pool = iter(slots[:args.max_bookings])
+    lock = threading.Lock()
+
+    def next_request() -> Request:
+        with lock:
+            slot = next(pool)
+        return ("POST", "/booking/book", {"start": slot["start"], "end": slot["end"], "summary": "Load test"})
+    return next_request
+
+
+REQUESTS = {
+    "suggest": suggest_requests,
+    "suggest-stream": suggest_requests,
+    "slots": slots_requests,
+    "book": book_requests,
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_level(port: int, concurrency: int, duration: float, next_request: Callable[[], Request]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    degraded = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        nonlocal degraded
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        while time.monotonic() < deadline:
+            try:
+                request = next_request()
+            except StopIteration:
+                return
+            start = time.perf_counter()
+            body = b""
+            try:
+                status, body = call(conn, request)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+                status = "error"
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(status)] += 1
+                degraded += bool(DEGRADED_PATTERN.search(body))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    wall = time.perf_counter() - started
+
+    result: Dict[str, Any] = {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "statuses": dict(statuses),
+        "degraded": degraded,
+        "throughput_rps": len(latencies) / wall,
+    }
+    if latencies:
+        result.update({f"p{q}_ms": percentile(latencies, q / 100) * 1000 for q in (50, 95, 99)})
+    return result
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=sorted(REQUESTS), default="suggest")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="uvicorn worker processes to compare")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="concurrent clients per level")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--calendar-latency-ms", type=float, default=50)
+    parser.add_argument("--events-per-day", type=float, default=8)
+    parser.add_argument("--llm-delay-ms", type=float, default=800)
+    parser.add_argument("--google-rate-limit", type=float,
+                        help="GOOGLE_RATE_LIMIT_PER_SECOND for the backend (default: the app's setting)")
+    parser.add_argument("--llm-rate-limit", type=float,
+                        help="LLM_RATE_LIMIT_PER_SECOND for the backend (default: the app's setting)")
+    parser.add_argument("--max-bookings", type=int, default=2000, help="slots to book with --endpoint book")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--output", type=Path, help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    calendar = FakeCalendar(args.events_per_day, time_zone=TIMEZONE, latency_seconds=args.calendar_latency_ms / 1000)
+    fake_api = serve(calendar)
+    api_root = f"http://127.0.0.1:{fake_api.server_port}"
+
+    print(f"{'workers':>7} {'clients':>7} {'requests':>8} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'degraded':>8}  statuses")
+    results = []
+    for workers in args.workers:
+        backend = start_backend(workers, args.port, api_root, args)
+        try:
+            next_request = REQUESTS[args.endpoint](args, args.port)
+            for concurrency in args.concurrency:
+                level = dict(run_level(args.port, concurrency, args.duration, next_request), workers=workers)
+                results.append(level)
+                print(f"{workers:>7} {concurrency:>7} {level['requests']:>8} {level['throughput_rps']:>8.1f} "
+                      f"{level.get('p50_ms', 0):>9.1f} {level.get('p95_ms', 0):>9.1f} {level.get('p99_ms', 0):>9.1f} "
+                      f"{level['degraded']:>8}  "
+                      f"{level['statuses']}")
+        finally:
+            backend.terminate()
+            backend.wait(timeout=30)
+    fake_api.shutdown()
+
+    if args.output:
+        args.output.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()}, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import pytest
+
+from app.services.ai_service import AIService
+
+
+@pytest.fixture(autouse=True)
+def fresh_ranking_state():
+    """Every test starts and ends without cached rankings or a ranking engine built under other settings."""
+    AIService._ranking_cache.clear()
+    AIService.reset_engine()
+    yield
+    AIService._ranking_cache.clear()
+    AIService.reset_engine()
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from googleapiclient.errors import HttpError
+
+from app.core.admission import (
+    GOOGLE, PRIORITY_BACKGROUND, PRIORITY_BOOKING, Limiter, Overloaded, admission_priority, reset_limiters,
+    upstream_call,
+)
+from app.core.config import Settings, settings
+from app.main import app
+from app.models.schemas import SlotIdList, SlotList
+
+
+def test_sheds_when_expected_wait_is_too_long():
+    limiter = Limiter("test", rate=1, burst=2)
+    limiter.acquire()
+    limiter.acquire()
+    with patch.object(settings, "ADMISSION_MAX_WAIT_SECONDS", 0.5), pytest.raises(Overloaded) as excinfo:
+        limiter.acquire()
+    assert excinfo.value.retry_after == 1
+
+
+def test_bookings_are_admitted_before_background_work():
+    limiter = Limiter("test", rate=20, burst=1)
+    limiter.acquire()
+    order = []
+
+    def waiter(priority, name):
+        with admission_priority(priority):
+            limiter.acquire()
+        order.append(name)
+
+    threads = [threading.Thread(target=waiter, args=(PRIORITY_BACKGROUND, "background"))]
+    threads[0].start()
+    time.sleep(0.01)
+    threads.append(threading.Thread(target=waiter, args=(PRIORITY_BOOKING, "booking")))
+    threads[1].start()
+    for t in threads:
+        t.join()
+    assert order == ["booking", "background"]
+
+
+def test_upstream_429_pauses_the_limiter():
+    limiter = Limiter("test", rate=100, burst=10)
+    resp = MagicMock(status=429)
+    resp.get.return_value = "30"
+    with pytest.raises(HttpError):
+        with limiter.call():
+            raise HttpError(resp, b"{}")
+    # The remaining burst is not spent against an exhausted quota
+    with pytest.raises(Overloaded) as excinfo:
+        limiter.acquire()
+    assert 30 <= excinfo.value.retry_after <= 31
+
+
+def test_zero_rate_disables_the_limiter():
+    limiter = Limiter("test", rate=0, burst=1)
+    for _ in range(100):
+        limiter.acquire()
+
+
+def test_default_configuration_does_not_shed_a_burst_of_suggestions():
+    legal = [{"start": "2030-01-05T10:00:00+00:00", "end": "2030-01-05T11:00:00+00:00"}]
+    defaults = Settings()
+
+    def calendar_read(*args, **kwargs):
+        with upstream_call(GOOGLE):
+            return legal
+
+    def structured(schema, **kwargs):
+        if schema is SlotIdList:
+            parsed = SlotIdList(slot_ids=["1.1000"], message="ok")
+        else:
+            parsed = SlotList(slots=legal, message="ok")
+        runnable = MagicMock()
+        runnable.invoke.return_value = {"raw": MagicMock(tool_calls=[]), "parsed": parsed, "parsing_error": None}
+        return runnable
+
+    llm = MagicMock()
+    llm.with_structured_output.side_effect = structured
+    client = TestClient(app)
+    reset_limiters()
+    try:
+        with patch.multiple(settings, GOOGLE_AI_API_KEY="test-key", **{
+                 name: getattr(defaults, name) for name in (
+                     "GOOGLE_RATE_LIMIT_PER_SECOND", "GOOGLE_RATE_BURST", "LLM_RATE_LIMIT_PER_SECOND", "LLM_RATE_BURST")
+             }), \
+             patch("app.api.routes.AvailabilityMaterializer.get_available_slots", side_effect=calendar_read), \
+             patch("app.api.routes.AvailabilityMaterializer.get_busy_index", side_effect=calendar_read), \
+             patch("app.services.ai_service.ChatGoogleGenerativeAI", return_value=llm), \
+             patch("app.services.ai_service.create_tool_calling_agent"), \
+             patch("app.services.ai_service.AgentExecutor"), \
+             patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}), \
+             ThreadPoolExecutor(max_workers=16) as pool:
+            # Distinct feedback so every request reaches the model instead of the ranking cache
+            responses = list(pool.map(
+                lambda i: client.post("/booking/suggest-ai", json={"timezone": "UTC", "user_feedback": f"request {i}"}),
+                range(40)
+            ))
+    finally:
+        reset_limiters()
+
+    assert [r.status_code for r in responses] == [200] * 40
+    assert not any(r.json().get("degraded") for r in responses)
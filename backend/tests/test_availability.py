@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.availability import AvailabilityMaterializer
+from app.services.calendar import CalendarService
+from app.services.preferences import CompiledPreferences
+
+
+def _future_slots():
+    start = (datetime.now(timezone.utc) + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    return [{"start": (start + timedelta(hours=i)).isoformat(), "end": (start + timedelta(hours=i + 1)).isoformat()}
+            for i in range(3)]
+
+
+def test_materialized_views_serve_from_memory_and_refresh_after_changes():
+    compiled = CompiledPreferences({})
+
+    async def scenario(compute):
+        AvailabilityMaterializer.start()
+        try:
+            first = await asyncio.to_thread(AvailabilityMaterializer.get_available_slots, "UTC", duration_minutes=60)
+            second = await asyncio.to_thread(AvailabilityMaterializer.get_available_slots, "UTC", duration_minutes=60)
+            assert first == second == _future_slots()
+            assert compute.call_count == 1
+
+            # A booking bumps the calendar revision; the worker rebuilds without waiting for a request
+            now = datetime.now(timezone.utc)
+            CalendarService.invalidate_events(now, now + timedelta(hours=1))
+            for _ in range(100):
+                if compute.call_count > 1:
+                    break
+                await asyncio.sleep(0.01)
+            assert compute.call_count == 2
+
+            await asyncio.to_thread(AvailabilityMaterializer.get_available_slots, "UTC", duration_minutes=60)
+            assert compute.call_count == 2
+        finally:
+            await AvailabilityMaterializer.stop()
+
+    with patch.object(settings, "MATERIALIZER_POLL_SECONDS", 0.01), \
+         patch.object(CalendarService, "resolve_timezone", return_value=timezone.utc), \
+         patch("app.services.availability.PreferencesService.get_compiled", return_value=compiled), \
+         patch.object(CalendarService, "get_available_slots", side_effect=lambda *a, **k: _future_slots()) as compute:
+        asyncio.run(scenario(compute))
+
+
+def test_concurrent_cold_reads_build_once_and_stale_views_are_served_from_memory():
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    compiled = CompiledPreferences({})
+
+    def slow_compute(*args, **kwargs):
+        time.sleep(0.05)
+        return _future_slots()
+
+    async def scenario(compute, busy):
+        AvailabilityMaterializer.start()
+        try:
+            def read():
+                return AvailabilityMaterializer.get_available_slots("UTC", duration_minutes=60)
+            with ThreadPoolExecutor(8) as pool:
+                results = await asyncio.gather(*(asyncio.wrap_future(pool.submit(read)) for _ in range(8)))
+            assert all(r == _future_slots() for r in results)
+            assert compute.call_count == 1
+
+            # Out of date after a booking, but the request still answers from the last build
+            now = datetime.now(timezone.utc)
+            CalendarService.invalidate_events(now, now + timedelta(hours=1))
+            assert read() == _future_slots()
+            assert compute.call_count == 1
+
+            # The ranking's busy intervals come with the view
+            assert AvailabilityMaterializer.get_busy_index("UTC", duration_minutes=60) is busy.return_value
+            assert busy.call_count == 1
+        finally:
+            await AvailabilityMaterializer.stop()
+
+    with patch.object(settings, "MATERIALIZER_POLL_SECONDS", 60), \
+         patch.object(CalendarService, "resolve_timezone", return_value=timezone.utc), \
+         patch("app.services.availability.PreferencesService.get_compiled", return_value=compiled), \
+         patch.object(CalendarService, "get_busy_index") as busy, \
+         patch.object(CalendarService, "get_available_slots", side_effect=slow_compute) as compute:
+        asyncio.run(scenario(compute, busy))
+
+
+def test_without_worker_requests_compute_directly():
+    with patch.object(CalendarService, "get_available_slots", return_value=[]) as compute:
+        AvailabilityMaterializer.get_available_slots("UTC")
+        AvailabilityMaterializer.get_available_slots("UTC")
+    assert compute.call_count == 2
+
+
+def test_evicted_revision_is_never_mistaken_for_current():
+    before = CalendarService.revision()
+    assert CalendarService.revision() == before
+    CalendarService._revisions.clear()
+    assert CalendarService.revision() != before
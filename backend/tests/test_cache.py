@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+
+from app.core.cache import TTLCache
+from app.services.calendar import CalendarService
+from app.services.reservations import ReservationLedger
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry_and_lru_eviction():
+    clock = FakeClock()
+    evicted = []
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock, on_evict=lambda k, v: evicted.append(k))
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # "b" is least recently used
+    assert cache.get("b") is None
+    assert evicted == ["b"]
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_get_or_load_single_flight():
+    cache = TTLCache(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == ["value"] * 8
+
+
+def test_invalidate_during_load_discards_result():
+    cache = TTLCache(ttl=60)
+
+    def loader():
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get_or_load("k", loader) == "stale"
+    assert cache.get("k") is None
+
+
+def test_busy_times_cached_and_invalidated_on_booking():
+    CalendarService._events_cache.clear()
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    end = start + timedelta(hours=1)
+    day_start, day_end = start - timedelta(hours=12), start + timedelta(hours=12)
+
+    with patch.object(CalendarService, "_fetch_busy", return_value=[]) as fetch, \
+         patch.object(CalendarService, "get_service", return_value=MagicMock()), \
+         patch("app.services.calendar.PreferencesService.get_compiled") as compiled:
+        compiled.return_value.is_blocked.return_value = False
+
+        CalendarService.get_busy_times(day_start.isoformat(), day_end.isoformat())
+        CalendarService.get_busy_times(day_start.isoformat(), day_end.isoformat())
+        assert fetch.call_count == 1
+
+        # Validation inside a cached window is answered from the cache
+        CalendarService.book_slot({"start": start.isoformat(), "end": end.isoformat()})
+        assert fetch.call_count == 1
+
+        # The booking dropped the overlapping window
+        CalendarService.get_busy_times(day_start.isoformat(), day_end.isoformat())
+        assert fetch.call_count == 2
+    CalendarService._events_cache.clear()
+    ReservationLedger.clear()
+
+
+def test_find_max_age_skips_old_entries():
+    clock = FakeClock()
+    cache = TTLCache(ttl=60, clock=clock)
+    cache.set("k", "v")
+    clock.now = 10
+    assert cache.find(lambda k: k == "k", max_age=15) == (True, "v")
+    assert cache.find(lambda k: k == "k", max_age=5) == (False, None)
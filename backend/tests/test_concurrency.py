@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import time
+
+from app.core.concurrency import LLM, run_blocking
+
+
+def test_run_blocking_keeps_event_loop_free():
+    main_thread = threading.get_ident()
+
+    def slow_call(x):
+        assert threading.get_ident() != main_thread
+        time.sleep(0.2)
+        return x
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick_task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        results = await asyncio.gather(*(run_blocking(LLM, slow_call, i) for i in range(4)))
+        elapsed = time.monotonic() - started
+        tick_task.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(scenario())
+    assert results == [0, 1, 2, 3]
+    # Calls overlap on the pool instead of running back to back
+    assert elapsed < 0.6
+    # The loop kept serving other coroutines meanwhile
+    assert ticks > 5
@@ -45,3 +45,63 @@ def test_load_credentials_from_env_token():
         creds = GoogleAuthService.load_credentials()
         assert creds.token == "env_tok"
         assert creds.client_id == "env_id"
+
+def test_concurrent_refreshes_collapse_and_write_atomically(tmp_path):
+    import threading
+    import time
+    from datetime import datetime, timedelta, timezone
+    from google.oauth2.credentials import Credentials
+    from app.services.google_auth import CredentialManager
+
+    creds = Credentials(
+        token="old", refresh_token="ref", client_id="id", client_secret="sec",
+        token_uri="https://oauth2.googleapis.com/token"
+    )
+    creds.expiry = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=1)
+    calls = []
+
+    def fake_refresh(self, request):
+        calls.append(1)
+        time.sleep(0.05)
+        self.token = "new"
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+    with patch.object(settings, 'BASE_DIR', tmp_path), \
+         patch.object(settings, 'GOOGLE_TOKEN_JSON', None), \
+         patch.object(Credentials, 'refresh', fake_refresh):
+        threads = [threading.Thread(target=CredentialManager.refresh, args=(creds,)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert len(calls) == 1
+        saved = json.loads((tmp_path / settings.TOKEN_FILE).read_text())
+        assert saved["token"] == "new"
+        assert saved["expiry"]
+        # No temp files left behind
+        assert [p.name for p in tmp_path.iterdir()] == [settings.TOKEN_FILE]
+
+        # The holder serves the refreshed object without re-reading or refreshing
+        assert GoogleAuthService.load_credentials() is creds
+        assert len(calls) == 1
+
+def test_token_file_rewritten_by_another_worker_updates_held_credentials(tmp_path):
+    from datetime import datetime, timedelta, timezone
+    from app.core.files import atomic_write_json
+    from app.services.google_auth import CredentialManager
+
+    later = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0) + timedelta(hours=1)
+    token = {"token": "first", "refresh_token": "ref", "client_id": "id", "client_secret": "sec",
+             "token_uri": "https://oauth2.googleapis.com/token", "expiry": later.isoformat()}
+    CredentialManager._pool.clear()
+    with patch.object(settings, 'BASE_DIR', tmp_path), patch.object(settings, 'GOOGLE_TOKEN_JSON', None):
+        atomic_write_json(tmp_path / settings.TOKEN_FILE, token)
+        held = GoogleAuthService.load_credentials()
+
+        atomic_write_json(tmp_path / settings.TOKEN_FILE, dict(token, token="second", expiry=(later + timedelta(hours=1)).isoformat()))
+        # Same object (pooled API clients hold it), carrying the other worker's token
+        assert GoogleAuthService.load_credentials() is held
+        assert held.token == "second"
+        assert held.expiry == later + timedelta(hours=1)
+    CredentialManager._pool.clear()
@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
+from app.core.admission import Overloaded
 from app.main import app
 
 client = TestClient(app)
@@ -75,3 +76,108 @@ def test_book_meeting_invalid_email():
         response = client.post("/booking/book", json=slot_data)
         assert response.status_code == 400
         assert "Invalid email" in response.json()["error"]
+
+def _parse_sse(text):
+    import json
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_suggest_booking_ai_stream():
+    mock_slots = [{"start": "2025-01-02T10:00:00Z", "end": "2025-01-02T11:00:00Z"}]
+    final = {"suggested_slots": mock_slots, "ai_message": "Here are some slots."}
+
+    def fake_stream(legal_slots, user_feedback, busy):
+        yield "message", "Here are "
+        yield "message", "some slots."
+        yield "result", final
+
+    with patch("app.api.routes.CalendarService.get_available_slots", return_value=mock_slots), \
+         patch("app.api.routes.CalendarService.get_busy_index", return_value=None), \
+         patch("app.api.routes.AIService.stream_rank_slots", side_effect=fake_stream):
+        response = client.post("/booking/suggest-ai/stream", json={"timezone": "UTC"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [e[0] for e in events] == ["slots", "message", "message", "suggestions", "done"]
+    assert events[0][1] == {"legal_slots": mock_slots}
+    assert events[3][1] == final
+
+def test_suggest_booking_ai_stream_forwards_message_reset():
+    mock_slots = [{"start": "2025-01-02T10:00:00Z", "end": "2025-01-02T11:00:00Z"}]
+    degraded = {"suggested_slots": mock_slots, "ai_message": "Local ranking.", "degraded": True}
+
+    def fake_stream(legal_slots, user_feedback, busy):
+        yield "message", "Here are"
+        yield "message_reset", None
+        yield "message", "Local ranking."
+        yield "result", degraded
+
+    with patch("app.api.routes.CalendarService.get_available_slots", return_value=mock_slots), \
+         patch("app.api.routes.CalendarService.get_busy_index", return_value=None), \
+         patch("app.api.routes.AIService.stream_rank_slots", side_effect=fake_stream):
+        response = client.post("/booking/suggest-ai/stream", json={"timezone": "UTC"})
+
+    events = _parse_sse(response.text)
+    assert [e[0] for e in events] == ["slots", "message", "message_reset", "message", "suggestions", "done"]
+    assert events[2][1] == {}
+
+def test_suggest_booking_ai_stream_error():
+    with patch("app.api.routes.CalendarService.get_available_slots", side_effect=Exception("API Error")):
+        response = client.post("/booking/suggest-ai/stream", json={"timezone": "UTC"})
+
+    events = _parse_sse(response.text)
+    assert events[0] == ("error", {"error": "API Error"})
+    assert events[-1][0] == "done"
+
+def test_suggest_ai_routes_reject_bodies_that_are_not_json_objects():
+    for path in ("/booking/suggest-ai", "/booking/suggest-ai/stream"):
+        for content in (b"", b"{not json", b'[{"timezone": "UTC"}]'):
+            response = client.post(path, content=content, headers={"Content-Type": "application/json"})
+            assert response.status_code == 400, (path, content)
+            assert "Request body must be" in response.json()["error"]
+
+def test_list_slots_passes_query_and_rejects_bad_bounds():
+    page = {"slots": [{"start": "2025-01-02T10:00:00Z", "end": "2025-01-02T10:30:00Z"}], "next_cursor": None}
+    with patch("app.api.routes.CalendarService.get_slot_page", return_value=page) as get_page:
+        response = client.get("/booking/slots", params={"duration_minutes": 30, "step_minutes": 15, "horizon_days": 60, "limit": 10})
+        assert response.status_code == 200
+        assert response.json() == page
+        _, kwargs = get_page.call_args
+        assert kwargs["duration_minutes"] == 30 and kwargs["step_minutes"] == 15 and kwargs["horizon_days"] == 60
+        assert kwargs["limit"] == 10
+
+        response = client.get("/booking/slots", params={"day_start": "20:00", "day_end": "08:00"})
+        assert response.status_code == 400
+        assert "day_start" in response.json()["error"]
+
+def test_slot_page_cursor_round_trips_through_a_raw_query_string():
+    from app.services.calendar import CalendarService
+    from app.services.preferences import CompiledPreferences
+
+    # A positive UTC offset: an ISO cursor would carry a '+' that a raw query string decodes as a space
+    base = "/booking/slots?timezone=Asia/Kolkata&horizon_days=2&limit=7"
+    with patch("app.services.calendar.CalendarService.get_busy_times", return_value=[]), \
+         patch("app.services.calendar.PreferencesService.get_compiled", return_value=CompiledPreferences({"no_meetings": []})):
+        expected = CalendarService.get_available_slots("Asia/Kolkata", horizon_days=2)
+        slots, cursor = [], None
+        while True:
+            response = client.get(base + (f"&cursor={cursor}" if cursor else ""))
+            assert response.status_code == 200, response.json()
+            slots += response.json()["slots"]
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+        assert client.get(base + "&cursor=2025-01-02T10:00:00+05:30").status_code == 400
+
+    assert len(slots) > 7
+    assert slots == expected
+
+def test_overloaded_upstream_returns_503_with_retry_after():
+    with patch("app.api.routes.CalendarService.get_events", side_effect=Overloaded("google", 2.5)):
+        response = client.get("/calendar/events")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
@@ -0,0 +1,113 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from googleapiclient.errors import HttpError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.main import app
+from app.services.calendar import CalendarService
+from app.services.event_mirror import EventMirror
+
+client = TestClient(app)
+
+
+def _event(event_id, start, end, **extra):
+    return {"id": event_id, "start": {"dateTime": start}, "end": {"dateTime": end}, **extra}
+
+
+def _service(*pages):
+    """A Calendar service whose events().list returns (or raises) `pages` in order."""
+    service = MagicMock()
+    service.events.return_value.list.return_value.execute.side_effect = list(pages)
+    return service
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    with patch.object(settings, "BASE_DIR", tmp_path), patch.object(settings, "EVENT_MIRROR_ENABLED", True):
+        EventMirror._synced.clear()
+        CalendarService._events_cache.clear()
+        yield tmp_path
+    EventMirror._synced.clear()
+    CalendarService._events_cache.clear()
+
+
+def test_full_then_incremental_sync(mirror):
+    service = _service(
+        {"items": [_event("a", "2030-01-01T09:00:00Z", "2030-01-01T10:00:00Z")], "nextPageToken": "p2"},
+        {"items": [_event("b", "2030-01-01T12:00:00Z", "2030-01-01T13:00:00Z"),
+                   {"id": "c", "start": {"date": "2030-01-03"}, "end": {"date": "2030-01-04"}}],
+         "nextSyncToken": "s1", "timeZone": "Europe/Berlin"},
+        {"items": [{"id": "a", "status": "cancelled"},
+                   _event("d", "2030-01-01T15:00:00Z", "2030-01-01T16:00:00Z", transparency="transparent")],
+         "nextSyncToken": "s2"},
+    )
+    EventMirror.sync(service)
+    assert [e["id"] for e in EventMirror.events_between(None, None)] == ["a", "b", "c"]
+    # The all-day event is anchored in the calendar's timezone
+    busy = EventMirror.busy_between(None, None)
+    assert busy[-1] == {"start": "2030-01-02T23:00:00+00:00", "end": "2030-01-03T23:00:00+00:00"}
+
+    EventMirror.sync(service)
+    _, kwargs = service.events.return_value.list.call_args
+    assert kwargs["syncToken"] == "s1"
+    assert [e["id"] for e in EventMirror.events_between(None, None)] == ["b", "d", "c"]
+    # Transparent events are listed but do not block time
+    assert len(EventMirror.busy_between(None, None)) == 2
+    assert (mirror / settings.EVENT_MIRROR_FILE).exists()
+
+
+def test_expired_sync_token_triggers_full_sync(mirror):
+    gone = HttpError(MagicMock(status=410), b"")
+    service = _service(
+        {"items": [_event("a", "2030-01-01T09:00:00Z", "2030-01-01T10:00:00Z")], "nextSyncToken": "s1"},
+        gone,
+        {"items": [_event("b", "2030-01-01T12:00:00Z", "2030-01-01T13:00:00Z")], "nextSyncToken": "s2"},
+    )
+    EventMirror.sync(service)
+    EventMirror.sync(service)
+    assert [e["id"] for e in EventMirror.events_between(None, None)] == ["b"]
+    _, kwargs = service.events.return_value.list.call_args
+    assert "syncToken" not in kwargs
+
+
+def test_evicted_mirror_path_reinitializes_without_losing_events(mirror):
+    service = _service(
+        {"items": [_event("a", "2030-01-01T09:00:00Z", "2030-01-01T10:00:00Z")], "nextSyncToken": "s1"},
+    )
+    with patch.object(EventMirror, "_initialized", TTLCache(maxsize=1)):
+        EventMirror.sync(service)
+        # Another tenant's mirror pushes this one out of the bounded set
+        EventMirror._initialized.set("other-tenant.db", True)
+        assert len(EventMirror._initialized) == 1
+        assert [e["id"] for e in EventMirror.events_between(None, None)] == ["a"]
+
+
+def test_busy_times_are_served_from_the_mirror(mirror):
+    service = _service(
+        {"items": [_event("a", "2030-01-01T09:00:00Z", "2030-01-01T10:00:00Z"),
+                   _event("b", "2030-01-02T09:00:00Z", "2030-01-02T10:00:00Z")], "nextSyncToken": "s1"},
+    )
+    with patch.object(CalendarService, "get_service", return_value=service):
+        busy = CalendarService.get_busy_times("2030-01-01T00:00:00Z", "2030-01-02T00:00:00Z")
+        events = CalendarService.get_events("2030-01-01T00:00:00Z", "2030-01-03T00:00:00Z")
+    assert busy == [{"start": "2030-01-01T09:00:00+00:00", "end": "2030-01-01T10:00:00+00:00"}]
+    assert [e["id"] for e in events] == ["a", "b"]
+    # One sync answered both queries; Google's freebusy was never called
+    assert service.events.return_value.list.return_value.execute.call_count == 1
+    service.freebusy.assert_not_called()
+
+
+def test_webhook_checks_channel_token(mirror):
+    assert client.post("/calendar/webhook").status_code == 404
+
+    with patch.object(settings, "CALENDAR_WEBHOOK_TOKEN", "secret"), \
+         patch.object(CalendarService, "sync_mirror") as sync:
+        assert client.post("/calendar/webhook", headers={"X-Goog-Channel-Token": "wrong"}).status_code == 403
+        response = client.post("/calendar/webhook", headers={
+            "X-Goog-Channel-Token": "secret", "X-Goog-Resource-State": "exists"
+        })
+        assert response.status_code == 200
+    sync.assert_called_once()
@@ -0,0 +1,50 @@
+import json
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.calendar import CalendarService
+from app.services.google_auth import CredentialManager
+from app.services.google_client import CalendarClient
+from app.services.preferences import CompiledPreferences
+from loadtest.fake_google import FakeCalendar, serve
+
+
+def _reset():
+    CredentialManager._pool.clear()
+    CalendarClient.reset()
+    AIService.reset_engine()
+    AIService._ranking_cache.clear()
+    CalendarService._events_cache.clear()
+    CalendarService._calendar_tz_cache.clear()
+
+
+def test_services_run_against_local_stand_ins(monkeypatch):
+    calendar = FakeCalendar(events_per_day=6, days=10, latency_seconds=0)
+    server = serve(calendar)
+    api_root = f"http://127.0.0.1:{server.server_port}"
+    token = {"token": "t", "client_id": "c", "client_secret": "s", "token_uri": f"{api_root}/token"}
+    monkeypatch.setenv("FAKE_LLM_DELAY_SECONDS", "0")
+    try:
+        with patch.object(settings, "GOOGLE_API_ENDPOINT", f"{api_root}/calendar/v3/"), \
+             patch.object(settings, "GOOGLE_TOKEN_JSON", json.dumps(token)), \
+             patch.object(settings, "GOOGLE_AI_API_KEY", "load-test"), \
+             patch.object(settings, "AI_CHAT_MODEL_FACTORY", "loadtest.fake_llm:create"), \
+             patch("app.services.calendar.PreferencesService.get_compiled", return_value=CompiledPreferences({})), \
+             patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+            _reset()
+
+            slots = CalendarService.get_available_slots(None, horizon_days=3)
+            assert slots and slots[0]["start"].endswith(("+01:00", "+02:00"))  # the fake calendar's Europe/Berlin
+
+            result = AIService.rank_slots(slots, "mornings please")
+            assert 0 < len(result["suggested_slots"]) <= 8
+            assert all(s in slots for s in result["suggested_slots"])
+            assert result["token_usage"]["input_tokens"] > 0 and "degraded" not in result
+
+            event = CalendarService.book_slot(result["suggested_slots"][0])
+            assert event["hangoutLink"]
+            assert result["suggested_slots"][0] not in CalendarService.get_available_slots(None, horizon_days=3)
+    finally:
+        server.shutdown()
+        _reset()
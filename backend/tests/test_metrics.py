@@ -0,0 +1,59 @@
+from unittest.mock import patch, MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import Counter, Histogram, STAGE_DURATION, HALLUCINATED_SLOTS
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_histogram_and_counter_exposition():
+    hist = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    counter = Counter("demo_total", "Demo.", ("type",))
+    counter.inc(3, type="input")
+
+    text = hist.render() + "\n" + counter.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 2' in text
+    assert 'demo_seconds_count{stage="a"} 2' in text
+    assert 'demo_total{type="input"} 3' in text
+
+
+def test_metrics_endpoint_reports_routes_and_stages():
+    slots = [{"start": "2030-01-02T10:00:00+00:00", "end": "2030-01-02T11:00:00+00:00"}]
+    with patch("app.api.routes.CalendarService.get_available_slots", return_value=slots), \
+         patch("app.api.routes.CalendarService.get_busy_index", return_value=None), \
+         patch("app.api.routes.AIService.rank_slots", return_value={"suggested_slots": slots, "ai_message": ""}):
+        before = STAGE_DURATION.count(stage="suggest.rank")
+        assert client.post("/booking/suggest-ai", json={"timezone": "UTC"}).status_code == 200
+        assert STAGE_DURATION.count(stage="suggest.rank") == before + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/booking/suggest-ai"' in response.text
+    assert 'booking_stage_duration_seconds_count{stage="suggest.slots"}' in response.text
+
+
+def test_rejected_llm_slots_are_counted():
+    from app.core.config import settings
+    from app.models.schemas import SlotList
+    from app.services.ai_service import AIService
+
+    legal = [{"start": "2030-01-05T10:00:00+00:00", "end": "2030-01-05T11:00:00+00:00"}]
+    invented = {"start": "2030-01-05T03:00:00+00:00", "end": "2030-01-05T04:00:00+00:00"}
+    engine = MagicMock()
+    engine.run_structured.return_value = ("{}", lambda: SlotList(slots=[legal[0], invented], message="ok"))
+
+    before = HALLUCINATED_SLOTS.value()
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch.object(AIService, "get_engine", return_value=engine), \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+        result = AIService.rank_slots(legal)
+    assert result["suggested_slots"] == legal
+    assert HALLUCINATED_SLOTS.value() == before + 1
@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.services.calendar import CalendarService
+from app.services.reservations import ReservationLedger, SlotConflictError
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    ReservationLedger.clear()
+    CalendarService._events_cache.clear()
+    yield
+    ReservationLedger.clear()
+    CalendarService._events_cache.clear()
+
+
+def _slot():
+    start = (datetime.now(timezone.utc) + timedelta(days=2)).replace(minute=0, second=0, microsecond=0)
+    return {"start": start.isoformat(), "end": (start + timedelta(hours=1)).isoformat()}
+
+
+def test_concurrent_bookings_of_one_slot_book_once():
+    service = MagicMock()
+
+    def slow_insert():
+        time.sleep(0.05)
+        return {"id": "evt"}
+    service.events.return_value.insert.return_value.execute.side_effect = slow_insert
+
+    outcomes = []
+
+    def book():
+        try:
+            CalendarService.book_slot(_slot())
+            outcomes.append("booked")
+        except SlotConflictError:
+            outcomes.append("conflict")
+
+    with patch.object(CalendarService, "get_service", return_value=service), \
+         patch.object(CalendarService, "_fetch_busy", return_value=[]), \
+         patch("app.services.calendar.PreferencesService.get_compiled") as compiled:
+        compiled.return_value.is_blocked.return_value = False
+        threads = [threading.Thread(target=book) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert sorted(outcomes) == ["booked"] + ["conflict"] * 4
+        assert service.events.return_value.insert.call_count == 1
+
+        # The just-booked slot stays blocked locally even if freebusy lags behind
+        with pytest.raises(SlotConflictError):
+            CalendarService.book_slot(_slot())
+
+
+def test_failed_insert_releases_hold_and_stale_snapshot_is_rechecked():
+    service = MagicMock()
+    service.events.return_value.insert.return_value.execute.side_effect = Exception("boom")
+    slot = _slot()
+    start = datetime.fromisoformat(slot["start"])
+
+    with patch.object(CalendarService, "get_service", return_value=service), \
+         patch.object(CalendarService, "_fetch_busy", return_value=[]) as fetch, \
+         patch("app.services.calendar.PreferencesService.get_compiled") as compiled:
+        compiled.return_value.is_blocked.return_value = False
+        CalendarService.get_busy_times((start - timedelta(days=1)).isoformat(), (start + timedelta(days=1)).isoformat())
+        assert fetch.call_count == 1
+
+        with pytest.raises(Exception, match="boom"):
+            CalendarService.book_slot(slot)
+        # A fresh snapshot answered validation without another upstream read
+        assert fetch.call_count == 1
+
+        service.events.return_value.insert.return_value.execute.side_effect = None
+        with patch.object(settings, "BOOKING_SNAPSHOT_MAX_AGE_SECONDS", 0):
+            CalendarService.book_slot(slot)
+        # The failed attempt released its hold; the stale snapshot was re-read
+        assert fetch.call_count == 2
+
+
+def test_book_slots_validates_once_and_sends_one_batch():
+    service = MagicMock()
+    callbacks = []
+    batch = service.new_batch_http_request.return_value
+    batch.add.side_effect = lambda request, callback=None, request_id=None: callbacks.append((request_id, callback))
+
+    def execute():
+        for request_id, callback in callbacks:
+            if request_id == "3":
+                callback(request_id, None, Exception("quota"))
+            else:
+                callback(request_id, {"id": f"evt{request_id}"}, None)
+    batch.execute.side_effect = execute
+
+    first = _slot()
+    start = datetime.fromisoformat(first["start"])
+    second = {"start": (start + timedelta(days=7)).isoformat(), "end": (start + timedelta(days=7, hours=1)).isoformat()}
+    third = {"start": (start + timedelta(days=14)).isoformat(), "end": (start + timedelta(days=14, hours=1)).isoformat()}
+    busy = [{"start": second["start"], "end": second["end"]}]
+
+    with patch.object(CalendarService, "get_service", return_value=service), \
+         patch.object(CalendarService, "_fetch_busy", return_value=busy) as fetch, \
+         patch("app.services.calendar.PreferencesService.get_compiled") as compiled:
+        compiled.return_value.is_blocked.return_value = False
+        results = CalendarService.book_slots([first, second, dict(first), third, {"start": "nope", "end": "x"}])
+
+    assert fetch.call_count == 1
+    assert batch.execute.call_count == 1
+    assert [r["status"] for r in results] == ["booked", "rejected", "conflict", "failed", "rejected"]
+    assert results[0]["event"] == {"id": "evt0"}
+    # Only the booked slot stays held
+    held = ReservationLedger.busy_index()
+    assert len(held) == 1 and held.overlaps(start, start + timedelta(hours=1))
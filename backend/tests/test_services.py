@@ -1,6 +1,7 @@
 import pytest
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
+from app.core.config import settings
 from app.services.calendar import CalendarService
 
 # Sample preferences
@@ -55,3 +56,449 @@ def test_is_slot_blocked_partial_overlap():
     dt_start = datetime(2025, 11, 22, 22, 0, tzinfo=tz)
     dt_end = datetime(2025, 11, 22, 23, 0, tzinfo=tz)
     assert CalendarService.is_slot_blocked(dt_start, dt_end, test_prefs) is False
+
+def test_get_busy_ranges_merges_and_indexes():
+    tz = ZoneInfo("America/Los_Angeles")
+    events = [
+        {"start": {"dateTime": "2025-11-22T12:00:00-08:00"}, "end": {"dateTime": "2025-11-22T13:00:00-08:00"}},
+        {"start": {"dateTime": "2025-11-22T09:00:00-08:00"}, "end": {"dateTime": "2025-11-22T10:00:00-08:00"}},
+        {"start": {"dateTime": "2025-11-22T09:30:00-08:00"}, "end": {"dateTime": "2025-11-22T11:00:00-08:00"}},
+        {"start": {"date": "2025-11-24"}, "end": {"date": "2025-11-25"}},
+    ]
+    busy = CalendarService.get_busy_ranges(events, tz)
+
+    # Overlapping 09:00-10:00 and 09:30-11:00 are merged into a single range
+    assert len(busy) == 3
+    assert list(busy)[0] == (datetime(2025, 11, 22, 9, 0, tzinfo=tz), datetime(2025, 11, 22, 11, 0, tzinfo=tz))
+
+    assert busy.overlaps(datetime(2025, 11, 22, 10, 30, tzinfo=tz), datetime(2025, 11, 22, 11, 30, tzinfo=tz)) is True
+    # Touching boundaries are not conflicts
+    assert busy.overlaps(datetime(2025, 11, 22, 11, 0, tzinfo=tz), datetime(2025, 11, 22, 12, 0, tzinfo=tz)) is False
+    assert busy.overlaps(datetime(2025, 11, 22, 13, 0, tzinfo=tz), datetime(2025, 11, 22, 14, 0, tzinfo=tz)) is False
+    # All-day events are anchored in the calendar timezone
+    assert busy.overlaps(datetime(2025, 11, 24, 20, 0, tzinfo=tz), datetime(2025, 11, 24, 21, 0, tzinfo=tz)) is True
+    # Queries in another timezone compare by instant
+    assert busy.overlaps(datetime(2025, 11, 22, 20, 30, tzinfo=timezone.utc), datetime(2025, 11, 22, 21, 0, tzinfo=timezone.utc)) is True
+
+def test_compiled_preferences_overnight_split():
+    from app.services.preferences import CompiledPreferences
+    compiled = CompiledPreferences(sample_prefs)
+    tz = timezone.utc
+
+    # Sleep rule 22:00-07:00 is split into [22:00, 24:00) and [00:00, 07:00) on each listed day
+    assert (22 * 60, 24 * 60) in compiled.blocks_for(6)
+    assert (0, 7 * 60) in compiled.blocks_for(6)
+    assert compiled.carry_over_for(6) == [(0, 7 * 60)]
+
+    # Sunday 06:00-07:00 blocked, 07:00-08:00 free
+    assert compiled.is_blocked(datetime(2025, 11, 23, 6, 0, tzinfo=tz), datetime(2025, 11, 23, 7, 0, tzinfo=tz)) is True
+    assert compiled.is_blocked(datetime(2025, 11, 23, 7, 0, tzinfo=tz), datetime(2025, 11, 23, 8, 0, tzinfo=tz)) is False
+
+def test_preferences_cache_invalidated_on_update(tmp_path):
+    from unittest.mock import patch
+    from app.core.config import settings
+    from app.services.preferences import PreferencesService
+
+    prefs_file = tmp_path / "preferences.json"
+    prefs_file.write_text('{"no_meetings": [], "batch_meetings": false}')
+    with patch.object(settings, 'BASE_DIR', tmp_path):
+        assert PreferencesService.get_preferences() == {"no_meetings": [], "batch_meetings": False}
+        compiled = PreferencesService.get_compiled()
+        # Served from memory while the file is unchanged
+        assert PreferencesService.get_compiled() is compiled
+
+        PreferencesService.update_preferences(sample_prefs)
+        assert PreferencesService.get_preferences() == sample_prefs
+        assert PreferencesService.get_compiled() is not compiled
+        assert PreferencesService.get_compiled().is_blocked(
+            datetime(2025, 11, 17, 10, 0, tzinfo=timezone.utc), datetime(2025, 11, 17, 11, 0, tzinfo=timezone.utc)) is True
+
+def test_fetch_busy_falls_back_to_paginated_event_list():
+    from unittest.mock import patch, MagicMock
+    service = MagicMock()
+    service.freebusy().query().execute.side_effect = Exception("freebusy unavailable")
+    page1 = {
+        "items": [
+            {"start": {"dateTime": "2025-11-22T09:00:00Z"}, "end": {"dateTime": "2025-11-22T10:00:00Z"}},
+            {"start": {"dateTime": "2025-11-22T11:00:00Z"}, "end": {"dateTime": "2025-11-22T12:00:00Z"}, "transparency": "transparent"},
+        ],
+        "nextPageToken": "p2",
+    }
+    page2 = {
+        "items": [
+            {"start": {"dateTime": "2025-11-22T13:00:00Z"}, "end": {"dateTime": "2025-11-22T14:00:00Z"},
+             "attendees": [{"self": True, "responseStatus": "declined"}]},
+            {"start": {"dateTime": "2025-11-22T15:00:00Z"}, "end": {"dateTime": "2025-11-22T16:00:00Z"}},
+        ]
+    }
+    service.events().list().execute.side_effect = [page1, page2]
+
+    with patch.object(CalendarService, "get_service", return_value=service):
+        busy_times = CalendarService._fetch_busy("2025-11-22T00:00:00Z", "2025-11-23T00:00:00Z")
+
+    assert [b["start"]["dateTime"] for b in busy_times] == ["2025-11-22T09:00:00Z", "2025-11-22T15:00:00Z"]
+    assert service.events().list.call_args.kwargs["pageToken"] == "p2"
+    assert "fields" in service.events().list.call_args.kwargs
+
+def test_fetch_busy_uses_freebusy():
+    from unittest.mock import patch, MagicMock
+    service = MagicMock()
+    service.freebusy().query().execute.return_value = {
+        "calendars": {"primary": {"busy": [{"start": "2025-11-22T09:00:00Z", "end": "2025-11-22T10:00:00Z"}]}}
+    }
+    with patch.object(CalendarService, "get_service", return_value=service):
+        busy_times = CalendarService._fetch_busy("2025-11-22T00:00:00Z", "2025-11-23T00:00:00Z")
+
+    busy = CalendarService.get_busy_ranges(busy_times, timezone.utc)
+    assert busy.overlaps(datetime(2025, 11, 22, 9, 30, tzinfo=timezone.utc), datetime(2025, 11, 22, 10, 30, tzinfo=timezone.utc))
+    service.events().list().execute.assert_not_called()
+
+def test_calendar_client_reused_until_credentials_rotate():
+    from unittest.mock import patch, MagicMock
+    from app.services.google_client import CalendarClient
+
+    CalendarClient.reset()
+    creds = MagicMock(client_id="id", refresh_token="r1")
+    with patch("app.services.google_client.build", side_effect=lambda *a, **k: MagicMock()) as build:
+        first = CalendarClient.get(creds)
+        assert CalendarClient.get(MagicMock(client_id="id", refresh_token="r1")) is first
+        assert build.call_count == 1
+        assert build.call_args.kwargs["static_discovery"] is True
+
+        rotated = CalendarClient.get(MagicMock(client_id="id", refresh_token="r2"))
+        assert rotated is not first
+        assert build.call_count == 2
+    CalendarClient.reset()
+
+def test_rank_slots_cached_and_rechecked_against_legal_set():
+    from unittest.mock import patch, MagicMock
+    from app.models.schemas import SlotList
+    from app.services.ai_service import AIService
+
+    legal = [
+        {"start": "2025-11-22T19:00:00-08:00", "end": "2025-11-22T20:00:00-08:00"},
+        {"start": "2025-11-23T19:00:00-08:00", "end": "2025-11-23T20:00:00-08:00"},
+    ]
+    llm = MagicMock()
+    structured = llm.with_structured_output.return_value
+    structured.invoke.return_value = {
+        "raw": MagicMock(tool_calls=[{"args": {"slots": legal, "message": "Weekend evenings work best."}}]),
+        "parsed": SlotList(slots=legal, message="Weekend evenings work best."),
+        "parsing_error": None,
+    }
+
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch("app.services.ai_service.ChatGoogleGenerativeAI", return_value=llm), \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={"batch_meetings": True}):
+        first = AIService.rank_slots(legal, "Weekends, please!")
+        # Same slots and equivalent feedback: served from the cache
+        second = AIService.rank_slots(legal, "  weekends please ")
+        assert structured.invoke.call_count == 1
+        assert second["suggested_slots"] == first["suggested_slots"] == legal
+        assert AIService.ranking_cache_stats()["hits"] == 1
+
+        # A cached slot that is no longer legal is never returned
+        key = AIService.ranking_cache_key(legal, {"batch_meetings": True}, "weekends please")
+        rechecked = AIService._cached_ranking(key, legal[1:])
+        assert rechecked["suggested_slots"] == legal[1:]
+
+def test_heuristic_ranker_prefers_weekends_batching_and_requested_days():
+    from app.services.heuristic_ranker import HeuristicRanker
+    tz = ZoneInfo("America/Los_Angeles")
+
+    def slot(day, hour):
+        start = datetime(2025, 11, day, hour, 0, tzinfo=tz)
+        return {"start": start.isoformat(), "end": (start + timedelta(hours=1)).isoformat()}
+
+    wed_evening, wed_late = slot(19, 19), slot(19, 21)
+    sat_morning, sat_noon = slot(22, 9), slot(22, 12)
+    busy = CalendarService.get_busy_ranges(
+        [{"start": {"dateTime": "2025-11-22T13:00:00-08:00"}, "end": {"dateTime": "2025-11-22T14:00:00-08:00"}}], tz)
+    slots = [wed_evening, wed_late, sat_morning, sat_noon]
+
+    scores = HeuristicRanker.score_slots(slots, {"batch_meetings": True}, busy)
+    # Weekend beats weekday, late evening is penalised, adjacency to the 13:00 event is rewarded
+    assert scores[2] > scores[0] > scores[1]
+    assert scores[3] > scores[2]
+
+    assert HeuristicRanker.rank(slots, {"batch_meetings": True}, busy, "wednesday please", limit=1) == [wed_evening]
+    # top_k keeps chronological order and every day represented
+    assert HeuristicRanker.top_k(slots, 2, {"batch_meetings": True}, busy) == [wed_evening, sat_noon]
+
+def test_rank_slots_single_call_prompt_is_annotated():
+    from unittest.mock import patch, MagicMock
+    from app.models.schemas import SlotList
+    from app.services.ai_service import AIService
+
+    legal = [{"start": "2025-11-22T19:00:00-08:00", "end": "2025-11-22T20:00:00-08:00"}]
+    llm = MagicMock()
+    llm.with_structured_output.return_value.invoke.return_value = {
+        "raw": MagicMock(tool_calls=[]), "parsed": SlotList(slots=legal, message="ok"), "parsing_error": None,
+    }
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch.object(settings, "AI_PROMPT_ENCODING", "verbose"), \
+         patch("app.services.ai_service.ChatGoogleGenerativeAI", return_value=llm), \
+         patch("app.services.ai_service.AgentExecutor") as agent_executor, \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+        result = AIService.rank_slots(legal)
+
+    assert result["suggested_slots"] == legal
+    assert "Saturday 2025-11-22 19:00-20:00" in result["llm_input"]
+    llm.with_structured_output.assert_any_call(SlotList, include_raw=True)
+    assert llm.with_structured_output.return_value.invoke.call_count == 1
+    agent_executor.return_value.invoke.assert_not_called()
+
+def test_rank_slots_agent_mode_strips_json_fence():
+    import json
+    from unittest.mock import patch, MagicMock
+    from app.services.ai_service import AIService
+
+    legal = [{"start": "2025-11-22T19:00:00-08:00", "end": "2025-11-22T20:00:00-08:00"}]
+    executor = MagicMock()
+    executor.invoke.return_value = {"output": "```json\n" + json.dumps({"slots": legal, "message": "ok"}) + "\n```"}
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch.object(settings, "AI_RANKING_MODE", "agent"), \
+         patch("app.services.ai_service.ChatGoogleGenerativeAI"), \
+         patch("app.services.ai_service.create_tool_calling_agent"), \
+         patch("app.services.ai_service.AgentExecutor", return_value=executor), \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+        result = AIService.rank_slots(legal)
+
+    assert result["suggested_slots"] == legal
+    assert executor.invoke.call_count == 1
+
+def test_rank_slots_serves_local_ranking_past_deadline_and_caches_late_answer():
+    import time
+    from unittest.mock import patch, MagicMock
+    from app.models.schemas import SlotList
+    from app.services.ai_service import AIService
+
+    legal = [
+        {"start": "2025-11-19T19:00:00-08:00", "end": "2025-11-19T20:00:00-08:00"},
+        {"start": "2025-11-22T19:00:00-08:00", "end": "2025-11-22T20:00:00-08:00"},
+    ]
+    def slow_model(prompt, **kwargs):
+        time.sleep(0.3)
+        return "{}", lambda: SlotList(slots=legal[:1], message="Wednesday evening.")
+
+    engine = MagicMock()
+    engine.run_structured.side_effect = slow_model
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch.object(settings, "AI_RANKING_DEADLINE_SECONDS", 0.05), \
+         patch.object(AIService, "get_engine", return_value=engine), \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+        started = time.monotonic()
+        first = AIService.rank_slots(legal)
+        assert time.monotonic() - started < 0.25
+        assert first["degraded"] is True
+        assert first["suggested_slots"][0] == legal[1]  # the heuristic prefers the weekend
+
+        # The late answer is cached and served to the next identical request
+        deadline = time.monotonic() + 2
+        while not len(AIService._ranking_cache) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        second = AIService.rank_slots(legal)
+        assert second["suggested_slots"] == legal[:1]
+        assert "degraded" not in second
+        assert engine.run_structured.call_count == 1
+
+        engine.run_structured.side_effect = RuntimeError("503 from Gemini")
+        failed = AIService.rank_slots(legal, "something else")
+        assert failed["degraded"] is True and failed["suggested_slots"]
+
+def test_model_calls_still_queued_at_the_deadline_are_dropped():
+    import threading
+    from unittest.mock import patch, MagicMock
+    from app.core.concurrency import RANKING, get_executor
+    from app.models.schemas import SlotList
+    from app.services.ai_service import AIService
+
+    legal = [{"start": "2025-11-22T19:00:00-08:00", "end": "2025-11-22T20:00:00-08:00"}]
+    workers = get_executor(RANKING)._max_workers
+    release = threading.Event()
+    started = []
+
+    def hung_model(prompt, **kwargs):
+        started.append(prompt)
+        release.wait(5)
+        return "{}", lambda: SlotList(slots=legal, message="ok")
+
+    engine = MagicMock()
+    engine.run_structured.side_effect = hung_model
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch.object(settings, "AI_RANKING_DEADLINE_SECONDS", 0.02), \
+         patch.object(AIService, "get_engine", return_value=engine), \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+        for i in range(workers + 4):
+            assert AIService.rank_slots(legal, f"request {i}")["degraded"] is True
+        release.set()
+        # Wait for every pool thread to be free again
+        barrier = threading.Barrier(workers + 1)
+        for _ in range(workers):
+            get_executor(RANKING).submit(barrier.wait, 5)
+        barrier.wait(5)
+    # Only the calls that were already running reached the model
+    assert len(started) == workers
+
+def test_ranking_engine_reused_across_requests():
+    from unittest.mock import patch, MagicMock
+    from app.services.ai_service import AIService
+
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch("app.services.ai_service.ChatGoogleGenerativeAI") as chat_model, \
+         patch("app.services.ai_service.create_tool_calling_agent"), \
+         patch("app.services.ai_service.AgentExecutor"):
+        AIService.warm_up()
+        engine = AIService.get_engine()
+        assert AIService.get_engine() is engine
+        assert chat_model.call_count == 1
+
+        with patch.object(settings, "GOOGLE_AI_API_KEY", "rotated-key"):
+            assert AIService.get_engine() is not engine
+
+def test_stream_rank_slots_yields_message_deltas_then_result():
+    from unittest.mock import patch, MagicMock
+    from app.services.ai_service import AIService
+
+    legal = [{"start": "2025-11-22T19:00:00-08:00", "end": "2025-11-22T20:00:00-08:00"}]
+    partials = [
+        {"slots": legal},
+        {"slots": legal, "message": "Saturday"},
+        {"slots": legal, "message": "Saturday evening is free."},
+    ]
+    engine = MagicMock()
+    engine.stream_json.return_value = iter(partials)
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch.object(settings, "AI_PROMPT_ENCODING", "verbose"), \
+         patch.object(AIService, "get_engine", return_value=engine), \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+        events = list(AIService.stream_rank_slots(legal))
+
+    assert events[:2] == [("message", "Saturday"), ("message", " evening is free.")]
+    kind, result = events[-1]
+    assert kind == "result"
+    assert result["suggested_slots"] == legal
+    assert result["ai_message"] == "Saturday evening is free."
+
+
+@pytest.mark.parametrize("interruption", ["deadline", "error"])
+def test_stream_rank_slots_resets_partial_message_when_degraded(interruption):
+    import threading
+    from unittest.mock import patch, MagicMock
+    from app.services.ai_service import AIService
+
+    legal = [{"start": "2025-11-22T19:00:00-08:00", "end": "2025-11-22T20:00:00-08:00"}]
+    release = threading.Event()
+
+    def partial_then_interrupted(prompt, **kwargs):
+        yield {"slots": legal, "message": "Saturday evening is"}
+        if interruption == "error":
+            raise RuntimeError("503 from Gemini")
+        release.wait(5)
+
+    engine = MagicMock()
+    engine.stream_json.side_effect = partial_then_interrupted
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch.object(settings, "AI_PROMPT_ENCODING", "verbose"), \
+         patch.object(settings, "AI_RANKING_DEADLINE_SECONDS", 0.2), \
+         patch.object(AIService, "get_engine", return_value=engine), \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+        events = list(AIService.stream_rank_slots(legal))
+    release.set()
+
+    kind, result = events[-1]
+    assert kind == "result" and result["degraded"] is True
+    assert events[:2] == [("message", "Saturday evening is"), ("message_reset", None)]
+    # What the client holds after the reset is exactly the degraded message
+    assert "".join(payload for kind, payload in events[2:-1] if kind == "message") == result["ai_message"]
+
+def test_compact_prompt_lists_ranges_per_day_and_maps_ids_back():
+    from unittest.mock import patch, MagicMock
+    from app.models.schemas import SlotIdList
+    from app.services.ai_service import AIService
+    from app.services.prompt_encoding import PromptEncoder
+
+    tz = ZoneInfo("America/Los_Angeles")
+    first = datetime(2025, 11, 17, 7, 0, tzinfo=tz)
+    # A week of 30-minute slots every 15 minutes, 07:00-21:30, with a lunch gap
+    week = [
+        {"start": (first + timedelta(days=d, minutes=m)).isoformat(),
+         "end": (first + timedelta(days=d, minutes=m + 30)).isoformat()}
+        for d in range(7) for m in range(0, 14 * 60 + 45, 15) if not 300 <= m < 360
+    ]
+    compact = PromptEncoder.encode(week)
+    assert compact.text.splitlines()[5] == "6 Sat 2025-11-22: 07:00-11:45, 13:00-21:30"
+    assert compact.slots_by_id["6.1930"]["start"] == "2025-11-22T19:30:00-08:00"
+    assert len(compact.slots_by_id) == len(week)
+
+    # The whole week costs a fraction of one verbose line per slot
+    compact_prompt = AIService.build_prompt(week, {}, "evenings", compact)
+    assert len(compact_prompt) * 10 < len(AIService.build_prompt(week, {}, "evenings"))
+
+    engine = MagicMock()
+    answer = SlotIdList(slot_ids=["6.1930", " 7.09:00 ", "9.1200"], message="Weekend evening and morning.")
+    engine.run_structured.return_value = ("{}", lambda: answer)
+    with patch.object(settings, "GOOGLE_AI_API_KEY", "test-key"), \
+         patch.object(settings, "AI_PROMPT_ENCODING", "compact"), \
+         patch.object(AIService, "get_engine", return_value=engine), \
+         patch("app.services.ai_service.PreferencesService.get_preferences", return_value={}):
+        result = AIService.rank_slots(week)
+
+    assert engine.run_structured.call_args.kwargs["schema"] is SlotIdList
+    assert "6 Sat 2025-11-22: 07:00-11:45, 13:00-21:30" in result["llm_input"]
+    # IDs become the exact legal slots; the unknown day is dropped
+    assert result["suggested_slots"] == [
+        {"start": "2025-11-22T19:30:00-08:00", "end": "2025-11-22T20:00:00-08:00"},
+        {"start": "2025-11-23T09:00:00-08:00", "end": "2025-11-23T09:30:00-08:00"},
+    ]
+
+
+def test_iter_available_slots_custom_shape_fetches_busy_lazily():
+    from itertools import islice
+    from unittest.mock import patch
+    from app.services.preferences import CompiledPreferences
+
+    with patch.object(CalendarService, "resolve_timezone", return_value=timezone.utc), \
+         patch.object(CalendarService, "get_busy_times", return_value=[]) as busy_times, \
+         patch("app.services.calendar.PreferencesService.get_compiled", return_value=CompiledPreferences({"no_meetings": []})):
+        now = datetime.now(timezone.utc)
+        slots = CalendarService.iter_available_slots(duration_minutes=30, step_minutes=15, horizon_days=60,
+                                                     day_start="09:00", day_end="10:00")
+        # Stopping on the first day reads only the first chunk of the horizon
+        first_page = list(islice(slots, 3))
+        assert busy_times.call_count == 1
+
+        full = CalendarService.get_available_slots(duration_minutes=30, step_minutes=15, horizon_days=60,
+                                                   day_start="09:00", day_end="10:00")
+
+    starts = [datetime.fromisoformat(s["start"]) for s in full]
+    assert all(start > now for start in starts)
+    assert all(datetime.fromisoformat(s["end"]) - datetime.fromisoformat(s["start"]) == timedelta(minutes=30) for s in full)
+    # 09:00, 09:15, 09:30 per day (09:45 would end after 10:00)
+    assert {(s.hour, s.minute) for s in starts} <= {(9, 0), (9, 15), (9, 30)}
+    assert 59 * 3 <= len(full) <= 60 * 3
+    assert first_page == full[:3]
+    # 60 days in AVAILABILITY_FETCH_DAYS chunks
+    assert busy_times.call_count == 1 + -(-60 // settings.AVAILABILITY_FETCH_DAYS)
+
+
+def test_get_slot_page_cursor_resumes_after_last_slot():
+    from unittest.mock import patch
+    from app.services.preferences import CompiledPreferences
+
+    with patch.object(CalendarService, "resolve_timezone", return_value=timezone.utc), \
+         patch.object(CalendarService, "get_busy_times", return_value=[]), \
+         patch("app.services.calendar.PreferencesService.get_compiled", return_value=CompiledPreferences({"no_meetings": []})):
+        all_slots = CalendarService.get_available_slots(horizon_days=3)
+        pages, cursor = [], None
+        while True:
+            page = CalendarService.get_slot_page(limit=4, cursor=cursor, horizon_days=3)
+            pages += page["slots"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        with pytest.raises(ValueError):
+            CalendarService.get_slot_page(cursor="not-a-date")
+
+    assert pages == all_slots
@@ -0,0 +1,84 @@
+import random
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.calendar import CalendarService
+from app.services.preferences import CompiledPreferences
+from app.services.slot_mask import SlotMask
+
+PREFS = CompiledPreferences({
+    "no_meetings": [
+        {"days": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"], "start": "08:00", "end": "19:00"},
+        {"days": ["Thursday", "Friday"], "start": "22:30", "end": "06:15"},
+        {"days": ["Saturday"], "start": "01:30", "end": "03:30"},
+    ]
+})
+
+
+def _frozen_datetime(now: datetime):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now.astimezone(tz)
+    return FrozenDatetime
+
+
+def _busy(start: datetime, days: int, seed: int = 0):
+    rng = random.Random(seed)
+    busy = []
+    for _ in range(40 * days):
+        begin = start + timedelta(seconds=rng.randrange(0, days * 86400, 60 * 7))
+        busy.append({"start": begin.isoformat(), "end": (begin + timedelta(minutes=rng.choice([10, 45, 90]))).isoformat()})
+    return busy
+
+
+@pytest.mark.parametrize("tz_name,now,params", [
+    # US spring-forward (2030-03-10) and EU fall-back (2030-10-27) inside the horizon
+    ("America/New_York", datetime(2030, 3, 6, 14, 7, tzinfo=timezone.utc), {}),
+    ("Europe/Berlin", datetime(2030, 10, 22, 5, 0, tzinfo=timezone.utc),
+     {"duration_minutes": 30, "step_minutes": 15, "day_start": "00:00", "day_end": "23:59"}),
+    ("Asia/Kolkata", datetime(2030, 1, 1, 0, 0, tzinfo=timezone.utc),
+     {"duration_minutes": 45, "step_minutes": 20, "horizon_days": 30}),
+])
+def test_numpy_engine_matches_python_engine(tz_name, now, params):
+    busy = _busy(now, params.get("horizon_days", 7) + 1)
+    results = {}
+    with patch("app.services.calendar.datetime", _frozen_datetime(now)), \
+         patch.object(CalendarService, "resolve_timezone", return_value=ZoneInfo(tz_name)), \
+         patch.object(CalendarService, "get_busy_times", return_value=busy), \
+         patch("app.services.calendar.PreferencesService.get_compiled", return_value=PREFS):
+        for engine in ("python", "numpy"):
+            with patch.object(settings, "AVAILABILITY_ENGINE", engine):
+                results[engine] = CalendarService.get_available_slots(tz_name, **params)
+
+    assert results["python"]
+    assert results["numpy"] == results["python"]
+
+
+def test_busy_minutes_reads_every_timestamp_form_like_get_busy_ranges():
+    tz = ZoneInfo("America/Los_Angeles")
+    busy = [
+        {"start": "2030-03-09T17:00:00Z", "end": "2030-03-09T17:10:00Z"},
+        {"start": "2030-03-09T09:15:30-08:00", "end": "2030-03-09T09:45:00.500-08:00"},
+        {"start": "2030-03-10T01:00:00+05:30", "end": "2030-03-10T02:00:00+05:30"},
+        {"start": "2030-03-11T08:00:00", "end": "2030-03-11T09:00:00"},
+        {"start": "2028-02-29T23:00:00Z", "end": "2028-03-01T00:00:00Z"},
+        {"start": {"date": "2030-03-12"}, "end": {"date": "2030-03-13"}},
+        {"start": {"dateTime": "2030-03-14T10:00:00+01:00"}, "end": {"dateTime": "2030-03-14T11:00:00+01:00"}},
+    ]
+    starts, ends = SlotMask.busy_minutes(busy, tz)
+
+    expected = CalendarService.get_busy_ranges(busy, tz)
+    assert sorted(zip(starts.tolist(), ends.tolist())) == [
+        (int(np.floor(s.timestamp() / 60)), int(np.ceil(e.timestamp() / 60))) for s, e in expected
+    ]
+
+
+def test_busy_minutes_rejects_malformed_timestamps():
+    with pytest.raises(ValueError):
+        SlotMask.busy_minutes([{"start": "2030-02-30T10:00:00Z", "end": "2030-02-30T11:00:00Z"}], timezone.utc)
@@ -0,0 +1,65 @@
+import json
+from unittest.mock import patch, MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.tenants import TenantRegistry, get_current_tenant, use_tenant
+from app.main import app
+from app.services.calendar import CalendarService
+from app.services.preferences import PreferencesService
+
+client = TestClient(app)
+
+
+def _write_tenants(tmp_path, tenants):
+    (tmp_path / settings.TENANTS_FILE).write_text(json.dumps(tenants))
+
+
+def test_preferences_are_scoped_per_tenant(tmp_path):
+    _write_tenants(tmp_path, {"acme": {"owner_name": "Ada"}})
+    with patch.object(settings, "BASE_DIR", tmp_path):
+        PreferencesService._pool.clear()
+        response = client.post("/preferences", json={"batch_meetings": True}, headers={"X-Tenant-ID": "acme"})
+        assert response.status_code == 200
+
+        assert client.get("/preferences", headers={"X-Tenant-ID": "acme"}).json() == {"batch_meetings": True}
+        # The default owner's file is untouched
+        assert client.get("/preferences").json() == {}
+        assert (tmp_path / settings.TENANTS_DIR / "acme" / settings.PREFERENCES_FILE).exists()
+        assert not (tmp_path / settings.PREFERENCES_FILE).exists()
+
+        assert client.get("/preferences", headers={"X-Tenant-ID": "nobody"}).status_code == 404
+    PreferencesService._pool.clear()
+
+
+def test_booking_uses_tenant_calendar_and_owner_name(tmp_path):
+    _write_tenants(tmp_path, {"acme": {"owner_name": "Ada", "calendar_id": "ada@example.com"}})
+    service = MagicMock()
+    with patch.object(settings, "BASE_DIR", tmp_path), \
+         patch.object(CalendarService, "get_service", return_value=service), \
+         patch.object(CalendarService, "validate_slot"):
+        TenantRegistry._cache = None
+        with use_tenant(TenantRegistry.get("acme")):
+            CalendarService.book_slot({"start": "2030-01-02T10:00:00+00:00", "end": "2030-01-02T11:00:00+00:00"})
+        # Outside a request the default tenant applies
+        assert get_current_tenant().owner_name == settings.OWNER_NAME
+
+    _, kwargs = service.events.return_value.insert.call_args
+    assert kwargs["calendarId"] == "ada@example.com"
+    assert kwargs["body"]["summary"] == "Meeting with Ada"
+    TenantRegistry._cache = None
+
+
+def test_tenant_pools_are_bounded(tmp_path):
+    _write_tenants(tmp_path, {f"t{i}": {} for i in range(5)})
+    with patch.object(settings, "BASE_DIR", tmp_path), \
+         patch.object(PreferencesService._pool, "maxsize", 2):
+        PreferencesService._pool.clear()
+        TenantRegistry._cache = None
+        for i in range(5):
+            with use_tenant(TenantRegistry.get(f"t{i}")):
+                PreferencesService.get_compiled()
+        assert len(PreferencesService._pool) == 2
+    PreferencesService._pool.clear()
+    TenantRegistry._cache = None